@@ -0,0 +1,289 @@
+# avaliacao.py - Avaliação offline e paralela das estratégias do controller.py
+#
+# Roda controller.decidir (a mesma função do controle ao vivo) contra robôs
+# simulados (modelo de tração diferencial do simulador.py, com latência e
+# ruído), sem rede e mais rápido que o tempo real. Cada ensaio é uma
+# combinação (parâmetros, cenário, semente); os ensaios são distribuídos
+# num pool de processos.
+#
+# Cenários:
+#   circulo, fuga, parado       modelos cinemáticos do Pac-Man
+#   arquivo.jsonl               trajetória gravada: linhas com "t" (ou
+#                               "t_captura") e "objetos" no formato da visão;
+#                               a 1ª linha pode ser um cabeçalho
+#                               {"cenario", "duracao", "robos": [{"personagem", "x", "y", "angulo"}]}
+#
+# Grade de parâmetros (JSON): {"VEL_FRENTE": [110, 130, 150], "ZONA_MORTA_GRAUS": [10, 15, 20]}
+# (nomes de controller.parametros_padrao(); todas as combinações são testadas).
+#
+# Uso:
+#     python avaliacao.py grade.json circulo fuga gravacao.jsonl --sementes=5 [--processos=8]
+#                         [--saida=resultados.jsonl] [--mapa=pac-man_arena_rois.json]
+import os
+import sys
+import json
+import math
+import random
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import controller
+import interceptacao
+import planejador
+import simulador
+
+DURACAO_PADRAO = 60.0   # s simulados por ensaio (ou até a captura)
+RAIO_ROBO = 60          # px, igual ao RAIO_PERSONAGEM_PIXELS do servidor
+VEL_FUGA = 120          # px/s do Pac-Man no cenário "fuga"
+CENARIOS_MODELO = ("circulo", "fuga", "parado")
+
+_cenarios_carregados = {} # Cache por processo (cada worker lê o arquivo uma vez)
+
+
+# ----------------------------------------------------------------------
+# Cenários
+# ----------------------------------------------------------------------
+
+def carregar_cenario(nome):
+    if nome in _cenarios_carregados:
+        return _cenarios_carregados[nome]
+
+    robos = [r for r in simulador.ROBOS_SIM if r["personagem"] != "pac-man"]
+    inicio_pac = next(r for r in simulador.ROBOS_SIM if r["personagem"] == "pac-man")
+    cenario = {"nome": nome, "duracao": DURACAO_PADRAO, "robos": robos, "pacman": dict(inicio_pac),
+               "trajetoria": None}
+
+    if nome not in CENARIOS_MODELO:
+        trajetoria = []
+        with open(nome, "r") as f:
+            for linha in f:
+                if not linha.strip():
+                    continue
+                dados = json.loads(linha)
+                if "cenario" in dados:
+                    cenario["duracao"] = dados.get("duracao", cenario["duracao"])
+                    cenario["robos"] = dados.get("robos", cenario["robos"])
+                    continue
+                t = dados.get("t", dados.get("t_captura"))
+                pac = next((o for o in dados.get("objetos", []) if "pac-man" in o["personagem"]), None)
+                if t is not None and pac:
+                    trajetoria.append((t, pac["x_global"], pac["y_global"]))
+        if not trajetoria:
+            raise ValueError(f"Cenário {nome} sem posições do Pac-Man.")
+        t0 = trajetoria[0][0]
+        cenario["trajetoria"] = [(t - t0, x, y) for t, x, y in trajetoria]
+        cenario["duracao"] = min(cenario["duracao"], cenario["trajetoria"][-1][0])
+        cenario["nome"] = os.path.basename(nome)
+
+    _cenarios_carregados[nome] = cenario
+    return cenario
+
+
+def posicao_gravada(trajetoria, t, indice):
+    """ Interpola a trajetória gravada em t (indice: cursor que só avança). """
+    while indice + 1 < len(trajetoria) and trajetoria[indice + 1][0] <= t:
+        indice += 1
+    t0, x0, y0 = trajetoria[indice]
+    if indice + 1 >= len(trajetoria):
+        return x0, y0, indice
+    t1, x1, y1 = trajetoria[indice + 1]
+    a = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+    return x0 + a * (x1 - x0), y0 + a * (y1 - y0), indice
+
+
+class PacmanPonto:
+    """ Pac-Man como ponto (trajetória gravada, fuga ou parado). """
+
+    def __init__(self, cenario):
+        self.modo = "gravado" if cenario["trajetoria"] else cenario["nome"]
+        self.trajetoria = cenario["trajetoria"]
+        self.indice = 0
+        self.x, self.y = float(cenario["pacman"]["x"]), float(cenario["pacman"]["y"])
+        self.theta = 0.0
+
+    def passo(self, t, dt, fantasmas):
+        if self.modo == "gravado":
+            x, y, self.indice = posicao_gravada(self.trajetoria, t, self.indice)
+        elif self.modo == "fuga":
+            perto = min(fantasmas, key=lambda r: math.hypot(r.x - self.x, r.y - self.y))
+            dx, dy = self.x - perto.x, self.y - perto.y
+            d = math.hypot(dx, dy) or 1.0
+            x, y = self.x + VEL_FUGA * dt * dx / d, self.y + VEL_FUGA * dt * dy / d
+            ax, ay, aw, ah = simulador.ARENA
+            x, y = min(max(x, ax), ax + aw), min(max(y, ay), ay + ah)
+        else:
+            return
+        if (x, y) != (self.x, self.y):
+            self.theta = math.atan2(y - self.y, x - self.x)
+        self.x, self.y = x, y
+
+    def observar(self):
+        return {"personagem": "pac-man",
+                "x_global": int(round(self.x + random.gauss(0, simulador.RUIDO_POSICAO))),
+                "y_global": int(round(self.y + random.gauss(0, simulador.RUIDO_POSICAO))),
+                "angulo_graus": round(math.degrees(self.theta) % 360, 2)}
+
+
+# ----------------------------------------------------------------------
+# Um ensaio
+# ----------------------------------------------------------------------
+
+def na_parede(robo):
+    ax, ay, aw, ah = simulador.ARENA
+    return robo.x <= ax or robo.x >= ax + aw or robo.y <= ay or robo.y >= ay + ah
+
+
+def executar_ensaio(ensaio):
+    """ ensaio = (parametros, cenario, semente, arquivo_mapa). Retorna um dicionário de resultados. """
+    parametros, nome_cenario, semente, arquivo_mapa = ensaio
+    random.seed(semente)
+    p = controller.parametros_padrao()
+    p.update(parametros)
+    cenario = carregar_cenario(nome_cenario)
+    mapa = planejador.carregar_mapa(arquivo_mapa) if arquivo_mapa else None
+
+    sims = [simulador.RoboSimulado(r["personagem"], r["x"], r["y"], r.get("angulo", 0)) for r in cenario["robos"]]
+    robos = [controller.novo_robo(r.personagem, None, mapa) for r in sims]
+    if cenario["nome"] == "circulo":
+        pac = simulador.RoboSimulado("pac-man", cenario["pacman"]["x"], cenario["pacman"]["y"],
+                                     cenario["pacman"].get("angulo", 0), roteiro="circulo")
+    else:
+        pac = PacmanPonto(cenario)
+    estimador = interceptacao.EstimadorAlvo()
+
+    dt = simulador.DT_FISICA
+    periodo_camera = 1.0 / simulador.FPS_CAMERA
+    snapshots = deque() # (t_captura, objetos)
+    t = proximo_frame = proximo_controle = 0.0
+    t_captura, capturou = None, None
+    colisoes = travamentos = 0
+    em_contato, na_parede_antes = set(), set()
+
+    while t < cenario["duracao"]:
+        for robo in sims:
+            robo.passo(t, dt)
+        if isinstance(pac, PacmanPonto):
+            pac.passo(t, dt, sims)
+        else:
+            pac.passo(t, dt)
+        t += dt
+
+        # Captura (posições reais, não as observadas)
+        quem = next((r for r in sims if math.hypot(r.x - pac.x, r.y - pac.y) < 2 * RAIO_ROBO), None)
+        if quem:
+            t_captura, capturou = t, quem.personagem
+            break
+
+        # Colisões entre os robôs controlados e com as paredes (contadas na entrada do contato)
+        contato = {(a.personagem, b.personagem) for a, b in itertools.combinations(sims, 2)
+                   if math.hypot(a.x - b.x, a.y - b.y) < 2 * RAIO_ROBO}
+        parede = {r.personagem for r in sims if na_parede(r)}
+        colisoes += len(contato - em_contato) + len(parede - na_parede_antes)
+        em_contato, na_parede_antes = contato, parede
+
+        if t >= proximo_frame:
+            snapshots.append((t, [r.observar() for r in sims] + [pac.observar()]))
+            proximo_frame += periodo_camera
+
+        if t >= proximo_controle:
+            proximo_controle += p["FREQ_CONTROLE"]
+            # Snapshot mais novo que já "chegou" (latência da visão)
+            atual = None
+            while snapshots and snapshots[0][0] <= t - simulador.LATENCIA_VISAO:
+                atual = snapshots.popleft()
+            if atual is None:
+                continue
+            objetos = atual[1]
+            por_nome = {o["personagem"]: o for o in objetos}
+            alvo = controller.encontrar_alvo(objetos)
+            if alvo:
+                estimador.observar(t, alvo["x_global"], alvo["y_global"])
+            vel_alvo = estimador.velocidade()
+            for robo, sim in zip(robos, sims):
+                travado_antes = robo["modo_destravamento"]
+                cmd = controller.decidir(robo, {}, por_nome, alvo, vel_alvo, p)
+                if robo["modo_destravamento"] and not travado_antes:
+                    travamentos += 1
+                if cmd is not None:
+                    sim.comandar(t, cmd[0], cmd[1])
+
+    return {"parametros": parametros, "cenario": cenario["nome"], "semente": semente,
+            "capturado": capturou is not None, "t_captura": t_captura, "capturou": capturou,
+            "colisoes": colisoes, "travamentos": travamentos}
+
+
+# ----------------------------------------------------------------------
+# Grade, pool e relatório
+# ----------------------------------------------------------------------
+
+def combinacoes(grade):
+    validos = controller.parametros_padrao()
+    for nome in grade:
+        if nome not in validos:
+            raise KeyError(f"Parâmetro desconhecido: {nome} (válidos: {', '.join(validos)})")
+    nomes = list(grade)
+    for valores in itertools.product(*(grade[n] for n in nomes)):
+        yield dict(zip(nomes, valores))
+
+
+def relatorio(resultados):
+    grupos = {}
+    for r in resultados:
+        grupos.setdefault(json.dumps(r["parametros"], sort_keys=True), []).append(r)
+
+    linhas = []
+    for chave, rs in grupos.items():
+        tempos = [r["t_captura"] for r in rs if r["capturado"]]
+        linhas.append((
+            -len(tempos) / len(rs),
+            sum(tempos) / len(tempos) if tempos else float("inf"),
+            chave,
+            len(rs),
+            sum(r["colisoes"] for r in rs) / len(rs),
+            sum(r["travamentos"] for r in rs) / len(rs),
+        ))
+    linhas.sort()
+
+    print(f"\n{'captura':>8} {'t médio':>8} {'colisões':>9} {'travam.':>8} {'n':>4}  parâmetros")
+    for neg_taxa, t_medio, chave, n, col, trav in linhas:
+        t_txt = f"{t_medio:7.1f}s" if t_medio != float("inf") else "      -"
+        print(f"{-neg_taxa*100:7.0f}% {t_txt} {col:9.1f} {trav:8.1f} {n:4d}  {chave}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    opcoes = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+    sementes = int(opcoes.get("sementes", 3))
+    processos = int(opcoes["processos"]) if "processos" in opcoes else None
+    arquivo_mapa = opcoes.get("mapa")
+
+    grade = {}
+    if args and args[0].endswith(".json"):
+        with open(args.pop(0), "r") as f:
+            grade = json.load(f)
+    cenarios = args or list(CENARIOS_MODELO)
+
+    ensaios = [(params, cenario, semente, arquivo_mapa)
+               for params in combinacoes(grade)
+               for cenario in cenarios
+               for semente in range(sementes)]
+    print(f"[AVALIAÇÃO] {len(ensaios)} ensaios ({len(ensaios) // (len(cenarios) * sementes)} combinações x "
+          f"{len(cenarios)} cenários x {sementes} sementes)")
+
+    resultados = []
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        for i, r in enumerate(pool.map(executar_ensaio, ensaios, chunksize=4), 1):
+            resultados.append(r)
+            if i % 50 == 0:
+                print(f"[AVALIAÇÃO] {i}/{len(ensaios)}")
+
+    if "saida" in opcoes:
+        with open(opcoes["saida"], "w") as f:
+            for r in resultados:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    relatorio(resultados)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# bola.py - Rastreamento rápido da bola (modo Rocket League)
+#
+# A bola é pequena e rápida: procurar o maior contorno de cor no frame inteiro
+# é caro e confunde a bola com ruído. Aqui:
+#   * a posição é prevista (filtro alfa-beta) e a máscara HSV é calculada só
+#     numa janela em torno da previsão, que cresce enquanto a bola está perdida;
+#   * os candidatos passam por filtros de área e circularidade (4*pi*A/P^2);
+#   * gols são detectados pelo SEGMENTO entre duas posições consecutivas,
+#     então um chute que atravessa a área do gol entre dois frames não se perde.
+import math
+import cv2
+import numpy as np
+
+# --- PARÂMETROS PADRÃO (podem vir do bloco "Bola" do arquivo de configuração) ---
+AREA_MIN = 30
+AREA_MAX = 3000
+CIRCULARIDADE_MIN = 0.65
+JANELA_MIN = 60            # Meia-largura mínima da janela de busca (px)
+CRESCIMENTO_JANELA = 40    # Px adicionados por frame sem detecção
+FRAMES_ATE_BUSCA_GLOBAL = 10
+ALPHA = 0.85               # Peso da medida na posição (filtro alfa-beta)
+BETA = 0.4                 # Peso do resíduo na velocidade
+GOAL_COOLDOWN_FRAMES = 30  # Frames ignorando novos gols após um gol (bola dentro da rede)
+
+
+class RastreadorBola:
+    def __init__(self, cfg):
+        self.lower = np.array(cfg['lower'])
+        self.upper = np.array(cfg['upper'])
+        self.cfg = cfg
+        self.circularidade_min = cfg.get('circularidade_min', CIRCULARIDADE_MIN)
+        self.ajustar_escala(1.0)
+
+        self.pos = None          # (x, y) filtrada, coordenadas da arena
+        self.vel = (0.0, 0.0)    # px/s
+        self.t = None
+        self.perdidos = 0
+        self.janela = None       # (x0, y0, x1, y1) usada no último frame (para desenho)
+
+    def ajustar_escala(self, escala):
+        """ Adapta os filtros de tamanho a um frame reduzido por 'escala' e recomeça o rastreamento. """
+        self.area_min = self.cfg.get('area_min', AREA_MIN) * escala * escala
+        self.area_max = self.cfg.get('area_max', AREA_MAX) * escala * escala
+        self.janela_min = self.cfg.get('janela_min', JANELA_MIN) * escala
+        self.pos = None
+        self.vel = (0.0, 0.0)
+
+    def _janela_busca(self, t, h, w):
+        if self.pos is None or self.perdidos >= FRAMES_ATE_BUSCA_GLOBAL:
+            return 0, 0, w, h, None
+        dt = t - self.t
+        px = self.pos[0] + self.vel[0] * dt
+        py = self.pos[1] + self.vel[1] * dt
+        meia = int(self.janela_min + math.hypot(*self.vel) * dt + CRESCIMENTO_JANELA * self.perdidos)
+        x0, y0 = max(0, int(px) - meia), max(0, int(py) - meia)
+        x1, y1 = min(w, int(px) + meia), min(h, int(py) + meia)
+        if x1 <= x0 or y1 <= y0:
+            return 0, 0, w, h, None
+        return x0, y0, x1, y1, (px, py)
+
+    def _candidatos(self, recorte, x0, y0):
+        hsv = cv2.cvtColor(recorte, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, self.lower, self.upper)
+        contornos, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for c in contornos:
+            area = cv2.contourArea(c)
+            if area < self.area_min or area > self.area_max:
+                continue
+            perimetro = cv2.arcLength(c, True)
+            if perimetro <= 0 or 4 * math.pi * area / (perimetro * perimetro) < self.circularidade_min:
+                continue
+            (cx, cy), _ = cv2.minEnclosingCircle(c)
+            yield cx + x0, cy + y0, area
+
+    def atualizar(self, frame_arena, t):
+        """
+        Procura a bola no frame (coordenadas da arena) no instante t.
+
+        Retorna:
+            dict: {'x', 'y', 'vx', 'vy'} filtrados, ou None se a bola não foi vista.
+        """
+        h, w = frame_arena.shape[:2]
+        x0, y0, x1, y1, previsto = self._janela_busca(t, h, w)
+        self.janela = (x0, y0, x1, y1)
+        candidatos = list(self._candidatos(frame_arena[y0:y1, x0:x1], x0, y0))
+
+        if not candidatos:
+            self.perdidos += 1
+            return None
+
+        if previsto is not None:
+            mx, my, _ = min(candidatos, key=lambda c: (c[0] - previsto[0]) ** 2 + (c[1] - previsto[1]) ** 2)
+        else:
+            mx, my, _ = max(candidatos, key=lambda c: c[2])
+
+        if self.pos is None or self.perdidos >= FRAMES_ATE_BUSCA_GLOBAL or t <= self.t:
+            self.pos, self.vel = (mx, my), (0.0, 0.0)
+        else:
+            dt = t - self.t
+            px = self.pos[0] + self.vel[0] * dt
+            py = self.pos[1] + self.vel[1] * dt
+            rx, ry = mx - px, my - py
+            self.pos = (px + ALPHA * rx, py + ALPHA * ry)
+            self.vel = (self.vel[0] + BETA * rx / dt, self.vel[1] + BETA * ry / dt)
+
+        self.t = t
+        self.perdidos = 0
+        return {'x': self.pos[0], 'y': self.pos[1], 'vx': self.vel[0], 'vy': self.vel[1]}
+
+
+def segmento_cruza_retangulo(p0, p1, rect):
+    """ True se o segmento p0 -> p1 toca o retângulo [x, y, w, h] (Liang-Barsky). """
+    x, y, w, h = rect
+    dx, dy = p1[0] - p0[0], p1[1] - p0[1]
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, p0[0] - x), (dx, x + w - p0[0]), (-dy, p0[1] - y), (dy, y + h - p0[1])):
+        if p == 0:
+            if q < 0:
+                return False
+            continue
+        r = q / p
+        if p < 0:
+            t0 = max(t0, r)
+        else:
+            t1 = min(t1, r)
+        if t0 > t1:
+            return False
+    return True
+
+
+def dentro_retangulo(p, rect):
+    x, y, w, h = rect
+    return x <= p[0] <= x + w and y <= p[1] <= y + h
+
+
+class JuizGols:
+    """
+    Detecta gols pelo cruzamento da trajetória da bola com as áreas de gol (coordenadas globais).
+
+    Só conta a ENTRADA: a posição anterior precisa estar fora do gol. Depois de
+    um gol, aquele gol só volta a contar quando a bola for vista fora dele
+    (bola parada dentro do gol não marca de novo ao fim do cooldown).
+    """
+
+    def __init__(self, gols, cooldown=GOAL_COOLDOWN_FRAMES):
+        self.gols = gols
+        self.cooldown = cooldown
+        self.placar = {nome: 0 for nome in gols}
+        self.armado = {nome: True for nome in gols}
+        self.ultima_pos = None
+        self.espera = 0
+
+    def atualizar(self, pos_global):
+        """ Retorna o nome do gol marcado neste frame, ou None. """
+        if self.espera > 0:
+            self.espera -= 1
+        if pos_global is None:
+            return None # Mantém a última posição vista: o próximo segmento parte dela
+        anterior, self.ultima_pos = self.ultima_pos, pos_global
+        marcado = None
+        for nome, rect in self.gols.items():
+            if not dentro_retangulo(pos_global, rect):
+                self.armado[nome] = True # Bola vista fora: o gol volta a valer
+            if marcado is None and self.armado[nome] and self._entrou(anterior, pos_global, rect):
+                marcado = nome
+        if marcado:
+            self.placar[marcado] += 1
+            self.armado[marcado] = False
+            self.espera = self.cooldown
+        return marcado
+
+    def _entrou(self, anterior, atual, rect):
+        return (anterior is not None and self.espera == 0 and not dentro_retangulo(anterior, rect)
+                and segmento_cruza_retangulo(anterior, atual, rect))
@@ -0,0 +1,122 @@
+# cache_render.py - Camada de renderização com cache para o client_gui_v2.py
+#
+# * SpriteCache: sprites pré-renderizados e rotacionados, com chave
+#   (personagem/forma, cor, tamanho, ângulo quantizado). Nada é alocado no
+#   frame depois que o ângulo já foi visto uma vez.
+# * TextoCache: uma superfície por "slot" de texto; só renderiza de novo
+#   quando o texto (ou a cor) daquele slot muda.
+# * RenderSujo: os desenhos do frame são registrados como (superfície, rect);
+#   só as regiões que mudaram em relação ao frame anterior são apagadas,
+#   redesenhadas e enviadas à tela (pygame.display.update(rects)).
+import math
+import pygame
+
+PASSO_ANGULO = 5 # Graus por "degrau" de rotação dos sprites
+
+
+def quantizar_angulo(angulo, passo=PASSO_ANGULO):
+    return int(round(angulo / passo) * passo) % 360
+
+
+class SpriteCache:
+    """ Sprites rotacionados pré-renderizados por (forma, cor, tamanho, ângulo). """
+
+    def __init__(self, passo=PASSO_ANGULO):
+        self.passo = passo
+        self.sprites = {}
+
+    def retangulo(self, cor, w, h, angulo):
+        # Mesmo padrão do draw_rotated_rect: rotate(-angulo)
+        chave = ("ret", cor, w, h, quantizar_angulo(angulo, self.passo))
+        surf = self.sprites.get(chave)
+        if surf is None:
+            base = pygame.Surface((w, h), pygame.SRCALPHA)
+            pygame.draw.rect(base, cor, (0, 0, w, h))
+            surf = pygame.transform.rotate(base, -chave[-1])
+            self.sprites[chave] = surf
+        return surf
+
+    def pacman(self, cor, r, angulo):
+        # Mesmo padrão do draw_pacman: linha de direção com Y para cima
+        chave = ("pac", cor, r, quantizar_angulo(angulo, self.passo))
+        surf = self.sprites.get(chave)
+        if surf is None:
+            surf = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+            pygame.draw.circle(surf, cor, (r, r), r)
+            rad = math.radians(chave[-1])
+            pygame.draw.line(surf, (0, 0, 0), (r, r), (r + r * math.cos(rad), r - r * math.sin(rad)), 3)
+            self.sprites[chave] = surf
+        return surf
+
+    def anel(self, cor, r, espessura):
+        chave = ("anel", cor, r, espessura)
+        surf = self.sprites.get(chave)
+        if surf is None:
+            surf = pygame.Surface((2 * r + 1, 2 * r + 1), pygame.SRCALPHA)
+            pygame.draw.circle(surf, cor, (r, r), r, espessura)
+            self.sprites[chave] = surf
+        return surf
+
+
+class TextoCache:
+    """ Uma superfície por slot; re-renderiza só quando o texto do slot muda. """
+
+    def __init__(self):
+        self.slots = {}
+
+    def texto(self, slot, font, texto, cor):
+        atual = self.slots.get(slot)
+        if atual is None or atual[0] != texto or atual[1] != cor:
+            atual = (texto, cor, font.render(texto, True, cor))
+            self.slots[slot] = atual
+        return atual[2]
+
+
+class RenderSujo:
+    """
+    Desenho por retângulos sujos sobre um fundo de cor sólida.
+
+    A cada frame os desenhos são registrados com blit(); em fim_frame() apenas
+    as regiões cujos desenhos mudaram (surgiram, sumiram ou se moveram) são
+    limpas e redesenhadas, respeitando a ordem de desenho.
+    """
+
+    def __init__(self, screen, cor_fundo):
+        self.screen = screen
+        self.cor_fundo = cor_fundo
+        self.anterior = []
+        self.atual = []
+        self.forcar_total = True
+
+    def blit(self, surf, pos=None, center=None):
+        rect = surf.get_rect(center=center) if center is not None else surf.get_rect(topleft=pos)
+        self.atual.append((surf, rect))
+        return rect
+
+    def fim_frame(self):
+        chaves_ant = {(id(s), tuple(r)) for s, r in self.anterior}
+        chaves_atu = {(id(s), tuple(r)) for s, r in self.atual}
+
+        if self.forcar_total:
+            self.forcar_total = False
+            self.screen.fill(self.cor_fundo)
+            for surf, rect in self.atual:
+                self.screen.blit(surf, rect)
+            pygame.display.flip()
+        else:
+            sujos = [r for s, r in self.anterior if (id(s), tuple(r)) not in chaves_atu]
+            sujos += [r for s, r in self.atual if (id(s), tuple(r)) not in chaves_ant]
+            sujos = [r.clip(self.screen.get_rect()) for r in sujos]
+            sujos = [r for r in sujos if r.width and r.height]
+            for sujo in sujos:
+                self.screen.set_clip(sujo)
+                self.screen.fill(self.cor_fundo, sujo)
+                for surf, rect in self.atual:
+                    if rect.colliderect(sujo):
+                        self.screen.blit(surf, rect)
+            self.screen.set_clip(None)
+            if sujos:
+                pygame.display.update(sujos)
+
+        self.anterior = self.atual
+        self.atual = []
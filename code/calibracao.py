@@ -0,0 +1,235 @@
+# calibracao.py - Calibração da arena e das cores por cliques (gera config_arena_pac_man.json)
+#
+# Em vez de ajustar limites HSV à mão, clique sobre cada robô num frame ao
+# vivo (congelado com F) ou gravado: os pixels em volta de cada clique viram
+# amostras do personagem. Com as amostras são ajustados
+#   * a caixa HSV "lower"/"upper" (percentis, com margem) usada pelo modo "hsv";
+#   * um histograma 2D matiz x saturação ("histograma") usado pelo modo
+#     "retroprojecao" do servidor (cv2.calcBackProject), que segue a forma real
+#     da distribuição de cores e precisa de bem menos limpeza morfológica.
+#
+# Uso:
+#     python calibracao.py                      # câmera ao vivo (INDICE_CAMERA)
+#     python calibracao.py arena.png            # imagem ou vídeo gravado
+#     python calibracao.py --personagens=pac-man,fantasma_1
+#     python calibracao.py --deteccao=retroprojecao   # modo salvo em "Deteccao"
+#
+# Teclas:
+#   clique esq.  amostra do personagem atual     U    desfaz o último clique
+#   N / P        próximo / anterior personagem   C    limpa o personagem atual
+#   F            congela / descongela o frame    M    alterna a prévia (hsv / retroprojeção)
+#   D            alterna o modo de detecção salvo (hsv / retroprojeção; independe da prévia)
+#   R            seleciona o ROI da arena        Z    adiciona uma zona de gatilho
+#   S            salva a configuração            Q    sai
+import os
+import sys
+import json
+
+import cv2
+import numpy as np
+
+import captura
+
+CONFIG_FILE = "config_arena_pac_man.json"
+INDICE_CAMERA = 1
+RESOLUCAO = (1920, 1080)      # Mesma RESOLUCAO_BASE do servidor
+FPS = 30
+PERSONAGENS_PADRAO = ["pac-man", "fantasma_1", "fantasma_2", "fantasma_3", "fantasma_4"]
+MODOS_DETECCAO = ("hsv", "retroprojecao")
+
+ESCALA_EXIBICAO = 0.5         # Janela menor que o frame (os cliques são convertidos)
+RAIO_AMOSTRA = 6              # px em volta de cada clique
+PERCENTIS = (2, 98)           # Caixa HSV: ignora os extremos (reflexos, borda do robô)
+MARGEM_HSV = (4, 20, 20)      # Folga somada à caixa (H, S, V)
+BINS_HISTOGRAMA = (30, 32)    # Matiz (0-180) x saturação (0-256)
+LIMIAR_PREVIA = 50            # Mesmo papel do LIMIAR_RETROPROJECAO do servidor
+
+
+# ----------------------------------------------------------------------
+# Ajuste dos modelos de cor
+# ----------------------------------------------------------------------
+
+def amostrar(hsv, x, y, raio=RAIO_AMOSTRA):
+    """ Pixels HSV (N x 3) num disco em volta de (x, y). """
+    mascara = np.zeros(hsv.shape[:2], np.uint8)
+    cv2.circle(mascara, (int(x), int(y)), raio, 255, -1)
+    return hsv[mascara > 0]
+
+def ajustar_caixa(pixels):
+    """ lower/upper HSV pelos percentis das amostras, com MARGEM_HSV. """
+    baixo = np.percentile(pixels, PERCENTIS[0], axis=0) - MARGEM_HSV
+    alto = np.percentile(pixels, PERCENTIS[1], axis=0) + MARGEM_HSV
+    maximo = (179, 255, 255)
+    lower = [int(max(0, v)) for v in baixo]
+    upper = [int(min(m, v)) for v, m in zip(alto, maximo)]
+    return lower, upper
+
+def ajustar_histograma(pixels):
+    """ Histograma matiz x saturação normalizado para 0-255 (lista de listas de inteiros). """
+    hist = cv2.calcHist([pixels.reshape(-1, 1, 3)], [0, 1], None, list(BINS_HISTOGRAMA), [0, 180, 0, 256])
+    hist = cv2.GaussianBlur(hist, (3, 3), 0) # Espalha um pouco: poucas amostras não deixam "buracos"
+    cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+    return np.round(hist).astype(int).tolist()
+
+def ajustar_modelo(amostras):
+    pixels = np.concatenate(amostras)
+    lower, upper = ajustar_caixa(pixels)
+    if upper[0] - lower[0] > 90:
+        # Matiz dando a volta em 0/180 (vermelho): a caixa fica larga demais, o histograma não
+        print("AVISO: matiz passa por 0/180; prefira o modo 'retroprojecao' para este personagem.")
+    return {"lower": lower, "upper": upper, "histograma": ajustar_histograma(pixels), "amostras": len(pixels)}
+
+def mascara_previa(hsv, modelo, modo):
+    if modo == "retroprojecao" and "histograma" in modelo:
+        hist = np.array(modelo["histograma"], np.float32)
+        retro = cv2.calcBackProject([hsv], [0, 1], hist, [0, 180, 0, 256], 1)
+        return cv2.threshold(retro, LIMIAR_PREVIA, 255, cv2.THRESH_BINARY)[1]
+    return cv2.inRange(hsv, np.array(modelo["lower"], np.uint8), np.array(modelo["upper"], np.uint8))
+
+
+# ----------------------------------------------------------------------
+# Fonte de frames
+# ----------------------------------------------------------------------
+
+def abrir_fonte(caminho):
+    """ Retorna uma função que devolve o próximo frame (ou None). """
+    if caminho and os.path.splitext(caminho)[1].lower() in (".png", ".jpg", ".jpeg", ".bmp"):
+        imagem = cv2.imread(caminho)
+        if imagem is None:
+            raise FileNotFoundError(caminho)
+        return lambda: imagem
+    if caminho:
+        cap = cv2.VideoCapture(caminho)
+    else:
+        cap = captura.abrir_camera(INDICE_CAMERA, RESOLUCAO, FPS)
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir {caminho or f'a câmera {INDICE_CAMERA}'}.")
+
+    def ler():
+        ok, frame = cap.read()
+        if not ok and caminho:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # Vídeo: volta ao início
+            ok, frame = cap.read()
+        return frame if ok else None
+    return ler
+
+
+# ----------------------------------------------------------------------
+# Interface
+# ----------------------------------------------------------------------
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    opcoes = dict(a[2:].split("=", 1) for a in sys.argv[1:] if a.startswith("--") and "=" in a)
+
+    config = {}
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, "r") as f:
+            config = json.load(f)
+    cores = config.setdefault("Cores", {})
+    personagens = opcoes["personagens"].split(",") if "personagens" in opcoes else (list(cores) or PERSONAGENS_PADRAO)
+    amostras = {nome: [] for nome in personagens}
+    modelos = {nome: cores[nome] for nome in personagens if nome in cores}
+
+    deteccao = opcoes.get("deteccao", config.get("Deteccao", "hsv"))
+    if deteccao not in MODOS_DETECCAO:
+        print(f"Modo de detecção desconhecido '{deteccao}' (use {' ou '.join(MODOS_DETECCAO)}).")
+        sys.exit(1)
+
+    ler = abrir_fonte(args[0] if args else None)
+    # "modo" é só a prévia (M); "deteccao" é o que vai para o arquivo (D / --deteccao)
+    estado = {"atual": 0, "congelado": None, "modo": deteccao, "deteccao": deteccao, "hsv": None}
+
+    def ao_clicar(evento, x, y, flags, _):
+        if evento != cv2.EVENT_LBUTTONDOWN or estado["hsv"] is None:
+            return
+        x, y = x / ESCALA_EXIBICAO, y / ESCALA_EXIBICAO
+        nome = personagens[estado["atual"]]
+        amostras[nome].append(amostrar(estado["hsv"], x, y))
+        modelos[nome] = ajustar_modelo(amostras[nome])
+        print(f"[{nome}] {len(amostras[nome])} cliques, {modelos[nome]['amostras']} pixels: "
+              f"lower={modelos[nome]['lower']} upper={modelos[nome]['upper']}")
+
+    cv2.namedWindow("Calibracao")
+    cv2.setMouseCallback("Calibracao", ao_clicar)
+    print("Clique nos robôs. N/P troca de personagem, F congela, M alterna a prévia, D o modo de detecção, R ROI, Z zona, S salva, Q sai.")
+
+    while True:
+        frame = estado["congelado"] if estado["congelado"] is not None else ler()
+        if frame is None:
+            print("Sem frames da fonte.")
+            break
+        estado["hsv"] = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        nome = personagens[estado["atual"]]
+
+        exibicao = frame.copy()
+        if nome in modelos:
+            # Prévia: pixels aceitos pelo modelo do personagem atual em destaque
+            mascara = mascara_previa(estado["hsv"], modelos[nome], estado["modo"])
+            exibicao[mascara > 0] = (0.4 * exibicao[mascara > 0] + (0, 153, 0)).astype(np.uint8)
+        if "ROI" in config:
+            x, y, w, h = config["ROI"]
+            cv2.rectangle(exibicao, (x, y), (x + w, y + h), (255, 0, 0), 2)
+        for nome_zona, (x, y, w, h) in config.get("Zonas", {}).items():
+            cv2.rectangle(exibicao, (x, y), (x + w, y + h), (0, 255, 255), 2)
+            cv2.putText(exibicao, nome_zona, (x + 5, y + 25), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+        texto = (f"{nome} ({estado['atual'] + 1}/{len(personagens)})  cliques={len(amostras[nome])}  "
+                 f"previa={estado['modo']}  deteccao={estado['deteccao']}  "
+                 f"{'CONGELADO' if estado['congelado'] is not None else 'ao vivo'}")
+        exibicao = cv2.resize(exibicao, None, fx=ESCALA_EXIBICAO, fy=ESCALA_EXIBICAO)
+        cv2.putText(exibicao, texto, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        cv2.imshow("Calibracao", exibicao)
+
+        tecla = cv2.waitKey(30) & 0xFF
+        if tecla == ord('q'):
+            break
+        elif tecla == ord('n'):
+            estado["atual"] = (estado["atual"] + 1) % len(personagens)
+        elif tecla == ord('p'):
+            estado["atual"] = (estado["atual"] - 1) % len(personagens)
+        elif tecla == ord('f'):
+            estado["congelado"] = None if estado["congelado"] is not None else frame.copy()
+        elif tecla == ord('m'):
+            estado["modo"] = "retroprojecao" if estado["modo"] == "hsv" else "hsv"
+        elif tecla == ord('d'):
+            estado["deteccao"] = "retroprojecao" if estado["deteccao"] == "hsv" else "hsv"
+            print(f"Modo de detecção a salvar: '{estado['deteccao']}'.")
+        elif tecla in (ord('u'), ord('c')):
+            if tecla == ord('u') and amostras[nome]:
+                amostras[nome].pop()
+            else:
+                amostras[nome].clear()
+            if amostras[nome]:
+                modelos[nome] = ajustar_modelo(amostras[nome])
+            else:
+                modelos.pop(nome, None)
+        elif tecla in (ord('r'), ord('z')):
+            pequeno = cv2.resize(frame, None, fx=ESCALA_EXIBICAO, fy=ESCALA_EXIBICAO)
+            x, y, w, h = cv2.selectROI("Calibracao", pequeno, showCrosshair=False)
+            if w and h:
+                caixa = [int(v / ESCALA_EXIBICAO) for v in (x, y, w, h)]
+                if tecla == ord('r'):
+                    config["ROI"] = caixa
+                else:
+                    zonas = config.setdefault("Zonas", {})
+                    zonas[f"zona_{len(zonas) + 1}"] = caixa
+                print(f"{'ROI' if tecla == ord('r') else 'Zona'}: {caixa}")
+        elif tecla == ord('s'):
+            if "ROI" not in config:
+                print("Selecione o ROI (tecla R) antes de salvar.")
+                continue
+            for nome_modelo, modelo in modelos.items():
+                # Atualiza no lugar: mantém outros campos que o usuário já tenha configurado
+                cores.setdefault(nome_modelo, {}).update(
+                    {k: modelo[k] for k in ("lower", "upper", "histograma") if k in modelo})
+            config["Deteccao"] = estado["deteccao"]
+            with open(CONFIG_FILE, "w") as f:
+                json.dump(config, f)
+            print(f"Configuração salva em {CONFIG_FILE}: {len(cores)} personagens, detecção '{estado['deteccao']}'.")
+
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    main()
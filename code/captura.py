@@ -0,0 +1,98 @@
+# captura.py - Abertura da câmera com o backend nativo de cada sistema
+#
+# Windows: DirectShow (como sempre foi). Linux: V4L2 configurado para baixa
+# latência, em vez do padrão (YUYV sem compressão, fps baixo, vários buffers):
+#   * formato comprimido (MJPG por padrão) pedido ANTES da resolução, senão o
+#     driver negocia YUYV e limita o fps em resoluções altas;
+#   * fila do driver com 1 buffer: cap.read() entrega o frame mais novo;
+#   * exposição, ganho e balanço de branco travados pelo bloco "Camera" da
+#     configuração, para que os limites HSV calibrados continuem válidos.
+#
+# Configuração (opcional, bloco "Camera" do arquivo da arena):
+#   "Camera": {"formato": "MJPG", "buffer": 1, "exposicao": 150,
+#              "ganho": 0, "balanco_branco": 4500, "foco": 0}
+# Valores de exposição dependem do driver (no UVC, unidades de 100 us).
+import sys
+
+import cv2
+
+FORMATO_PADRAO = "MJPG"
+BUFFER_PADRAO = 1
+
+# CAP_PROP_AUTO_EXPOSURE no V4L2: 1 = manual, 3 = automática (modo "aperture priority")
+V4L2_EXPOSICAO_MANUAL = 1
+
+
+def backend_padrao():
+    if sys.platform.startswith("win"):
+        return cv2.CAP_DSHOW
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+def fourcc_texto(valor):
+    valor = int(valor)
+    return "".join(chr((valor >> 8 * i) & 0xFF) for i in range(4))
+
+
+def abrir_camera(indice, resolucao, fps, cfg=None, backend=None):
+    """
+    Abre e configura a câmera. Retorna o cv2.VideoCapture (verifique isOpened()).
+
+    cfg: bloco "Camera" da configuração (formato, buffer, exposição, ganho,
+    balanço de branco, foco). Chaves ausentes ficam no padrão do driver.
+    """
+    cfg = cfg or {}
+    backend = backend_padrao() if backend is None else backend
+    cap = cv2.VideoCapture(indice, backend)
+    if not cap.isOpened():
+        return cap
+
+    if backend == cv2.CAP_V4L2:
+        formato = cfg.get("formato", FORMATO_PADRAO)
+        if formato:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*formato))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolucao[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolucao[1])
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, cfg.get("buffer", BUFFER_PADRAO))
+
+    if "exposicao" in cfg:
+        cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, V4L2_EXPOSICAO_MANUAL if backend == cv2.CAP_V4L2 else 0.25)
+        cap.set(cv2.CAP_PROP_EXPOSURE, cfg["exposicao"])
+    if "ganho" in cfg:
+        cap.set(cv2.CAP_PROP_GAIN, cfg["ganho"])
+    if "balanco_branco" in cfg:
+        cap.set(cv2.CAP_PROP_AUTO_WB, 0)
+        cap.set(cv2.CAP_PROP_WB_TEMPERATURE, cfg["balanco_branco"])
+    if "foco" in cfg:
+        cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+        cap.set(cv2.CAP_PROP_FOCUS, cfg["foco"])
+
+    relatar_formato(cap, indice, resolucao, fps)
+    return cap
+
+
+def formato_negociado(cap):
+    """ O que o driver realmente aceitou. """
+    return {
+        "backend": cap.getBackendName(),
+        "formato": fourcc_texto(cap.get(cv2.CAP_PROP_FOURCC)),
+        "resolucao": (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "buffer": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+        "exposicao_auto": cap.get(cv2.CAP_PROP_AUTO_EXPOSURE),
+        "exposicao": cap.get(cv2.CAP_PROP_EXPOSURE),
+        "wb_auto": cap.get(cv2.CAP_PROP_AUTO_WB),
+    }
+
+
+def relatar_formato(cap, indice, resolucao, fps):
+    neg = formato_negociado(cap)
+    print(f"[CÂMERA {indice}] {neg['backend']}: {neg['formato']} {neg['resolucao'][0]}x{neg['resolucao'][1]} "
+          f"@ {neg['fps']:.1f} fps, buffer={neg['buffer']}, exposição={neg['exposicao']} "
+          f"(auto={neg['exposicao_auto']}), wb_auto={neg['wb_auto']}")
+    if neg["resolucao"] != tuple(resolucao) or (neg["fps"] and neg["fps"] < fps):
+        print(f"[CÂMERA {indice}] AVISO: pedido {resolucao[0]}x{resolucao[1]} @ {fps} fps não foi aceito integralmente.")
+    return neg
@@ -1,134 +1,200 @@
 import websocket
 import json
+import sys
 import threading
 import time
+from collections import deque
 
 # --- CONFIGURAÇÕES ---
 # Lembre-se de substituir o IP pelo IP real do seu ESP32!
 ESP32_IP = "172.16.105.43"  # Exemplo: Adapte ao IP do seu ESP32
 WEBSOCKET_PORT = 81
 WEBSOCKET_URL = f"ws://{ESP32_IP}:{WEBSOCKET_PORT}"
+# Também aceita a URL como argumento: python client_car_ws.py ws://127.0.0.1:8101
+# (ex.: um robô do simulador.py)
+
+# --- PARÂMETROS DO PERFIL DE LATÊNCIA ---
+TAXAS_HZ = [5, 10, 20, 50, 100]  # Taxas de comando testadas, em ordem
+DURACAO_POR_TAXA = 3.0           # Segundos em cada taxa
+ESPERA_FINAL = 0.5               # Tempo para chegarem as respostas atrasadas
+PWM_TESTE_MAX = 30               # Valores pequenos (abaixo da zona morta): o robô quase não anda
+LIMITE_RTT_MS = 100              # p95 máximo aceito para considerar a taxa sustentável
+PERDA_MAXIMA = 0.01              # Fração máxima de comandos sem confirmação
+
+# Cada comando recebe um par (motor1, motor2) único dentro da janela de teste;
+# assim a telemetria {"motor1": {"vel"}, "motor2": {"vel"}} identifica qual
+# comando ela está ecoando. As marcas de tempo ficam no cliente (o firmware
+# não devolve campos extras).
+VALORES = list(range(-PWM_TESTE_MAX, PWM_TESTE_MAX + 1))
+
+
+def par_do_comando(seq):
+    """ Par (m1, m2) único para o número de sequência seq. """
+    n = len(VALORES)
+    return VALORES[seq % n], VALORES[(seq // n) % n]
+
+
+def percentil(valores, p):
+    if not valores:
+        return float('nan')
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def desvio_padrao(valores):
+    if len(valores) < 2:
+        return 0.0
+    media = sum(valores) / len(valores)
+    return (sum((v - media) ** 2 for v in valores) / (len(valores) - 1)) ** 0.5
+
+
+class Perfilador:
+    """ Envia comandos marcados no tempo e casa as respostas/telemetria com eles. """
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.lock = threading.Lock()
+        self.rodando = True
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self.lock:
+            self.acks_pendentes = deque()   # Instantes de envio, na ordem (o firmware responde em ordem)
+            self.ecos_pendentes = {}        # (m1, m2) -> instante de envio
+            self.rtt_ack = []               # ms: envio -> {"status": "ok"}
+            self.lat_eco = []               # ms: envio -> telemetria com os mesmos valores
+            self.enviados = 0
+            self.erros = 0
+
+    def enviar(self, seq):
+        m1, m2 = par_do_comando(seq)
+        t = time.perf_counter()
+        with self.lock:
+            self.acks_pendentes.append(t)
+            self.ecos_pendentes[(m1, m2)] = t
+            self.enviados += 1
+        self.ws.send(json.dumps({"motor1_vel": m1, "motor2_vel": m2}))
+
+    def receber(self):
+        """ Thread de recepção: respostas de comando e telemetria. """
+        while self.rodando:
+            try:
+                message = self.ws.recv()
+            except websocket.WebSocketTimeoutException:
+                continue
+            except Exception:
+                break
+            t = time.perf_counter()
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict):
+                continue
+
+            with self.lock:
+                if "status" in data:
+                    if data["status"] != "ok":
+                        self.erros += 1
+                    if self.acks_pendentes:
+                        self.rtt_ack.append((t - self.acks_pendentes.popleft()) * 1000)
+                elif "motor1" in data:
+                    par = (data.get('motor1', {}).get('vel'), data.get('motor2', {}).get('vel'))
+                    t_envio = self.ecos_pendentes.pop(par, None)
+                    if t_envio is not None:
+                        self.lat_eco.append((t - t_envio) * 1000)
+
+    def medir_taxa(self, taxa_hz, seq_inicial):
+        """ Envia comandos a taxa_hz por DURACAO_POR_TAXA segundos e retorna o resumo. """
+        self.reiniciar()
+        periodo = 1.0 / taxa_hz
+        inicio = time.perf_counter()
+        proximo = inicio
+        seq = seq_inicial
+        while time.perf_counter() - inicio < DURACAO_POR_TAXA:
+            self.enviar(seq)
+            seq += 1
+            proximo += periodo
+            espera = proximo - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        duracao = time.perf_counter() - inicio
+        time.sleep(ESPERA_FINAL)
+
+        with self.lock:
+            rtt, eco = list(self.rtt_ack), list(self.lat_eco)
+            enviados, erros = self.enviados, self.erros
+        perda = 1 - len(rtt) / enviados if enviados else 0.0
+        return seq, {
+            "taxa_hz": taxa_hz,
+            "taxa_real_hz": enviados / duracao,
+            "enviados": enviados,
+            "perda": perda,
+            "erros": erros,
+            "rtt_p50": percentil(rtt, 50), "rtt_p95": percentil(rtt, 95),
+            "rtt_p99": percentil(rtt, 99), "rtt_max": max(rtt) if rtt else float('nan'),
+            "jitter": desvio_padrao(rtt),
+            "eco_p50": percentil(eco, 50), "eco_p95": percentil(eco, 95),
+            "ecos": len(eco),
+        }
+
+
+def sustentavel(r):
+    return (r["perda"] <= PERDA_MAXIMA and r["rtt_p95"] <= LIMITE_RTT_MS
+            and r["taxa_real_hz"] >= 0.95 * r["taxa_hz"])
+
+
+def imprimir_resultado(r):
+    print(f"[{r['taxa_hz']:>4} Hz] enviados={r['enviados']:<5} real={r['taxa_real_hz']:6.1f} Hz | "
+          f"RTT p50={r['rtt_p50']:6.1f} p95={r['rtt_p95']:6.1f} p99={r['rtt_p99']:6.1f} "
+          f"max={r['rtt_max']:6.1f} jitter={r['jitter']:5.1f} ms | perda={r['perda']*100:4.1f}% | "
+          f"eco telemetria p50={r['eco_p50']:6.1f} p95={r['eco_p95']:6.1f} ms ({r['ecos']} ecos)"
+          f"{'' if sustentavel(r) else '  <-- NÃO SUSTENTÁVEL'}")
 
-# Objeto global para armazenar o estado atual da telemetria
-telemetria_atual = {}
 
-# --- FUNÇÕES DE HANDLER WEBSOCKET ---
+# --- INICIALIZAÇÃO ---
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 else WEBSOCKET_URL
+    print(f"Tentando conectar a: {url}")
 
-def on_message(ws, message):
-    """Lida com mensagens recebidas (Telemetria)"""
-    global telemetria_atual
-    try:
-        data = json.loads(message)
-        # Se a mensagem for um objeto JSON válido, assume que é telemetria
-        if isinstance(data, dict):
-            telemetria_atual = data
-            
-            # Formatação simples para impressão da telemetria
-            distancia = telemetria_atual.get('distancia_cm', 'N/A')
-            motor1_vel = telemetria_atual.get('motor1', {}).get('vel', 'N/A')
-            motor2_vel = telemetria_atual.get('motor2', {}).get('vel', 'N/A')
-            sensor_tras = telemetria_atual.get('presenca', {}).get('tras', 'N/A')
-            
-            print(f"\n[TELEMETRIA] Distância: {distancia}cm | Sensor traseiro: {sensor_tras} | Motor 1 Vel: {motor1_vel} | Motor 2 Vel: {motor2_vel}", end="\r")
-        else:
-            # Pode ser uma mensagem de status/erro do ESP32
-            print(f"\n[STATUS DO CARRO] {message}")
-
-    except json.JSONDecodeError:
-        print(f"\n[ERRO JSON] Mensagem não JSON: {message}")
-    except Exception as e:
-        print(f"\n[ERRO] Falha ao processar mensagem: {e}")
-
-def on_error(ws, error):
-    """Lida com erros da conexão"""
-    print(f"\n[ERRO DE CONEXÃO] {error}")
-
-def on_close(ws, close_status_code, close_msg):
-    """Lida com o fechamento da conexão"""
-    print(f"\n### Conexão Fechada (Status: {close_status_code}, Msg: {close_msg}) ###")
-
-def on_open(ws):
-    """Lida com a abertura da conexão e inicia o loop de controle"""
-    print(f"### Conexão Aberta com {WEBSOCKET_URL} ###")
-    
-    # Inicia o thread para enviar comandos de controle
-    control_thread = threading.Thread(target=send_commands_loop, args=(ws,))
-    control_thread.daemon = True
-    control_thread.start()
-
-# --- FUNÇÃO DE CONTROLE DE COMANDOS ---
-
-def send_command(ws, motor1_vel, motor2_vel):
-    """Cria e envia o comando JSON para o ESP32"""
-    comando = {
-        "motor1_vel": motor1_vel,
-        "motor2_vel": motor2_vel
-    }
-    
     try:
-        ws.send(json.dumps(comando))
-        # Opcional: print(f"Comando enviado: M1={motor1_vel}, M2={motor2_vel}")
-    except websocket.WebSocketConnectionClosedException:
-        print("\n[ERRO] Conexão fechada. Não foi possível enviar o comando.")
+        ws = websocket.create_connection(url, timeout=1)
     except Exception as e:
-        print(f"\n[ERRO] Falha ao enviar comando: {e}")
+        print(f"[ERRO DE CONEXÃO] {e}")
+        sys.exit(1)
+    print(f"### Conexão Aberta com {url} ###")
 
-def send_commands_loop(ws):
-    """Loop principal para demonstrar o envio de comandos"""
-    
-    # === SEQUÊNCIA DE MOVIMENTO DE EXEMPLO ===
-    try:
-        # 1. Parado
-        print("\n[COMANDO] Carro parado (5s)...")
-        send_command(ws, 0, 0)
-        time.sleep(1)
-        
-        # 2. Frente Rápido
-        print("\n[COMANDO] Movendo para frente (3s)...")
-        send_command(ws, 255, 255)
-        time.sleep(1)
-
-        # 3. Girar Esquerda
-        print("\n[COMANDO] Girando à esquerda (2s)...")
-        send_command(ws, 200, -200)
-        time.sleep(1)
-
-        # 4. Ré Lento
-        print("\n[COMANDO] Movendo em ré (3s)...")
-        send_command(ws, -100, -100)
-        time.sleep(1)
-
-        # 5. Parar Novamente
-        print("\n[COMANDO] Parando e encerrando (3s)...")
-        send_command(ws, 0, 0)
-        time.sleep(3)
+    perfilador = Perfilador(ws)
+    receptor = threading.Thread(target=perfilador.receber, daemon=True)
+    receptor.start()
 
+    resultados = []
+    seq = 0
+    try:
+        for taxa in TAXAS_HZ:
+            seq, r = perfilador.medir_taxa(taxa, seq)
+            resultados.append(r)
+            imprimir_resultado(r)
+    except KeyboardInterrupt:
+        print("\nPerfil interrompido pelo usuário (Ctrl+C).")
     except Exception as e:
         print(f"\n[ERRO NO LOOP DE COMANDO] {e}")
     finally:
-        # Garante que o carro pare se o loop terminar
-        send_command(ws, 0, 0)
-        print("\n[FINALIZADO] Loop de comandos concluído. Fechando conexão...")
+        # Garante que o carro pare
+        try:
+            ws.send(json.dumps({"motor1_vel": 0, "motor2_vel": 0}))
+        except Exception:
+            pass
+        perfilador.rodando = False
         ws.close()
 
-# --- INICIALIZAÇÃO ---
-
-if __name__ == "__main__":
-    # Define o modo de rastreamento para facilitar a depuração
-    # websocket.enableTrace(True) 
-    
-    print(f"Tentando conectar a: {WEBSOCKET_URL}")
-
-    # Cria a instância do WebSocket
-    ws = websocket.WebSocketApp(
-        WEBSOCKET_URL,
-        on_open=on_open,
-        on_message=on_message,
-        on_error=on_error,
-        on_close=on_close
-    )
-
-    # Roda a aplicação em um loop contínuo
-    # O `run_forever` usa um loop síncrono para gerenciar a conexão e o recebimento de mensagens.
-    # O envio de comandos é gerenciado por um thread separado (`send_commands_loop`).
-    ws.run_forever()
\ No newline at end of file
+    ok = [r["taxa_hz"] for r in resultados if sustentavel(r)]
+    if ok:
+        print(f"\n[RESULTADO] Taxa máxima sustentável: {max(ok)} Hz "
+              f"(perda <= {PERDA_MAXIMA*100:.0f}%, RTT p95 <= {LIMITE_RTT_MS} ms)")
+    else:
+        print("\n[RESULTADO] Nenhuma das taxas testadas foi sustentável.")
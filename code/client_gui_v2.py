@@ -3,9 +3,11 @@ import websockets
 import json
 import pygame
 import threading
-import queue
 import sys
-import math
+import time
+from collections import deque
+
+import cache_render
 
 # --- CONFIGURAÇÕES VISUAIS ---
 WEBSOCKET_URI = "ws://127.0.0.1:8765"
@@ -37,21 +39,43 @@ VOLUMES = {
     "gameover": 1.0
 }
 
-data_queue = queue.Queue()
+# --- INTERPOLAÇÃO ---
+# Os snapshots chegam a cada ~100 ms; a tela é desenhada "um pouco no passado"
+# (ATRASO_RENDER) para sempre haver dois snapshots entre os quais interpolar.
+ATRASO_RENDER = 0.1
+
+# --- CAIXA DE CORREIO (apenas os 2 últimos snapshots) ---
+# Substitui a fila sem limite: memória constante, o receptor nunca espera a UI.
+mailbox_lock = threading.Lock()
+mailbox = deque(maxlen=2) # (t_chegada, data)
+ws_encerrado = False
+
+def mailbox_put(data):
+    with mailbox_lock:
+        mailbox.append((time.monotonic(), data))
+
+def mailbox_get():
+    """ Retorna os dois últimos snapshots como ((t0, d0), (t1, d1)); o primeiro pode ser None. """
+    with mailbox_lock:
+        if not mailbox:
+            return None, None
+        if len(mailbox) == 1:
+            return None, mailbox[0]
+        return mailbox[0], mailbox[1]
 
 # --- WEBSOCKET THREAD ---
 async def websocket_client_async():
+    global ws_encerrado
     try:
         async with websockets.connect(WEBSOCKET_URI) as websocket:
             while True:
                 msg = await websocket.recv()
                 try:
                     data = json.loads(msg)
-                    if isinstance(data, dict): data_queue.put(data)
-                    print(data)
+                    if isinstance(data, dict): mailbox_put(data)
                 except: pass
     except Exception as e:
-        print(f"WS Error: {e}"); data_queue.put(None)
+        print(f"WS Error: {e}"); ws_encerrado = True
 
 def start_ws_thread():
     def run():
@@ -62,20 +86,43 @@ def start_ws_thread():
     t = threading.Thread(target=run, daemon=True); t.start()
     return t
 
-# --- DRAWING ---
-def draw_rotated_rect(surface, color, cx, cy, w, h, angle):
-    rect = pygame.Rect(0, 0, w, h); rect.center = (cx, cy)
-    surf = pygame.Surface(rect.size, pygame.SRCALPHA)
-    pygame.draw.rect(surf, color, (0, 0, w, h))
-    rot_surf = pygame.transform.rotate(surf, -angle)
-    surface.blit(rot_surf, rot_surf.get_rect(center=rect.center))
-
-def draw_pacman(surface, cx, cy, r, angle, is_hunter):
-    color = COLOR_PACMAN_HUNTER if is_hunter else COLOR_PACMAN
-    pygame.draw.circle(surface, color, (cx, cy), r)
-    rad = math.radians(angle)
-    ex = cx + r * math.cos(rad); ey = cy - r * math.sin(rad)
-    pygame.draw.line(surface, (0,0,0), (cx, cy), (ex, ey), 3)
+def interpolar_angulo(a0, a1, alpha):
+    # Caminho mais curto entre os ângulos (trata a passagem 360 -> 0)
+    diff = (a1 - a0 + 180) % 360 - 180
+    return (a0 + diff * alpha) % 360
+
+def interpolar_objetos(anterior, atual, t_render):
+    """
+    Posições dos objetos no instante t_render, interpolando entre os dois últimos snapshots.
+    Objetos que não existem no snapshot anterior são desenhados na posição atual.
+    """
+    t1, d1 = atual
+    objetos = d1.get("objetos", [])
+    if anterior is None:
+        return objetos
+    t0, d0 = anterior
+    if t1 <= t0:
+        return objetos
+    alpha = min(1.0, max(0.0, (t_render - t0) / (t1 - t0)))
+    if alpha >= 1.0:
+        return objetos
+
+    antes = {o.get("personagem"): o for o in d0.get("objetos", [])}
+    resultado = []
+    for obj in objetos:
+        o0 = antes.get(obj.get("personagem"))
+        if o0 is None:
+            resultado.append(obj); continue
+        try:
+            resultado.append({
+                "personagem": obj.get("personagem", ""),
+                "x_global": o0['x_global'] + (obj['x_global'] - o0['x_global']) * alpha,
+                "y_global": o0['y_global'] + (obj['y_global'] - o0['y_global']) * alpha,
+                "angulo_graus": interpolar_angulo(float(o0['angulo_graus']), float(obj['angulo_graus']), alpha),
+            })
+        except (KeyError, TypeError, ValueError):
+            resultado.append(obj)
+    return resultado
 
 # --- SISTEMA DE SOM (Helper) ---
 def load_sound(filename, volume_key):
@@ -104,6 +151,13 @@ def pygame_loop():
     font_main = pygame.font.Font(None, 24)
     font_hud = pygame.font.Font(None, 40)
     font_big = pygame.font.Font(None, 80)
+
+    # Camada de renderização: sprites/textos em cache e retângulos sujos
+    sprites = cache_render.SpriteCache()
+    textos = cache_render.TextoCache()
+    render = cache_render.RenderSujo(screen, BACKGROUND_COLOR)
+    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
     
     # ---------------------------------------------------------
     # 1. CARREGAMENTO DE ÁUDIO
@@ -151,19 +205,18 @@ def pygame_loop():
             if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_q):
                 running = False
         
-        try:
-            while not data_queue.empty():
-                d = data_queue.get_nowait()
-                if d is None: running = False
-                else: current_data = d
-        except: pass
-
+        if ws_encerrado: running = False
         if not running: break
 
-        screen.fill(BACKGROUND_COLOR)
-        
+        anterior, atual = mailbox_get()
+        if atual is not None:
+            current_data = atual[1]
+            # Renderiza "no passado" para interpolar entre os dois últimos snapshots
+            objetos = interpolar_objetos(anterior, atual, time.monotonic() - ATRASO_RENDER)
+        else:
+            objetos = current_data.get("objetos", [])
+
         # Extrair dados
-        objetos = current_data.get("objetos", [])
         estado = current_data.get("estado_jogo", {})
         
         power_active = estado.get("power_active", False)
@@ -241,58 +294,54 @@ def pygame_loop():
             except: continue
 
             if 'pac-man' in nome:
-                draw_pacman(screen, mx, my, 25, ang, power_active)
+                color = COLOR_PACMAN_HUNTER if power_active else COLOR_PACMAN
+                render.blit(sprites.pacman(color, 25, ang), center=(mx, my))
                 if immunity: 
-                    pygame.draw.circle(screen, (255, 255, 255), (mx, my), 30, 2)
+                    render.blit(sprites.anel((255, 255, 255), 30, 2), center=(mx, my))
             elif 'fantasma' in nome:
                 color = COLOR_FANTASMA_VULNERAVEL if power_active else COLOR_FANTASMA
-                draw_rotated_rect(screen, color, mx, my, 40, 40, ang)
+                render.blit(sprites.retangulo(color, 40, 40, ang), center=(mx, my))
             
-            lbl = font_main.render(f"{nome}", True, COLOR_TEXTO)
-            screen.blit(lbl, (mx+20, my-20))
+            lbl = textos.texto(("nome", nome), font_main, f"{nome}", COLOR_TEXTO)
+            render.blit(lbl, (mx+20, my-20))
 
         # 4. HUD
         mins, secs = divmod(int(time_rem), 60)
         timer_str = f"{mins:02}:{secs:02}"
         color_time = (255, 0, 0) if time_rem < 30 else (255, 255, 255)
         
-        hud_timer = font_hud.render(f"TEMPO: {timer_str}", True, color_time)
-        hud_score = font_hud.render(f"PONTOS: {score}", True, (0, 255, 0))
-        hud_lives = font_hud.render(f"VIDAS: {lives}", True, (0, 0, 255))
+        hud_timer = textos.texto("timer", font_hud, f"TEMPO: {timer_str}", color_time)
+        hud_score = textos.texto("score", font_hud, f"PONTOS: {score}", (0, 255, 0))
+        hud_lives = textos.texto("lives", font_hud, f"VIDAS: {lives}", (0, 0, 255))
         
-        screen.blit(hud_timer, (20, 20))
-        screen.blit(hud_score, (300, 20))
-        screen.blit(hud_lives, (600, 20))
+        render.blit(hud_timer, (20, 20))
+        render.blit(hud_score, (300, 20))
+        render.blit(hud_lives, (600, 20))
         
         if power_active:
-            p_surf = font_main.render(f"CAÇADOR: {estado.get('power_timer',0)}s", True, COLOR_PACMAN_HUNTER)
-            screen.blit(p_surf, (20, 60))
+            p_surf = textos.texto("power", font_main, f"CAÇADOR: {estado.get('power_timer',0)}s", COLOR_PACMAN_HUNTER)
+            render.blit(p_surf, (20, 60))
         if estado.get("speed_active"):
-            s_surf = font_main.render(f"SPEED: {estado.get('speed_timer',0)}s", True, (0, 255, 255))
-            screen.blit(s_surf, (20, 85))
+            s_surf = textos.texto("speed", font_main, f"SPEED: {estado.get('speed_timer',0)}s", (0, 255, 255))
+            render.blit(s_surf, (20, 85))
 
-        # 5. Overlays
+        # 5. Overlays (overlay escuro criado uma única vez)
         if game_over:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180)) 
-            screen.blit(overlay, (0,0))
-            go_text = font_big.render("GAME OVER", True, (255, 0, 0))
-            final_score = font_hud.render(f"PONTUAÇÃO FINAL: {score}", True, (255, 255, 255))
+            render.blit(overlay, (0,0))
+            go_text = textos.texto("go", font_big, "GAME OVER", (255, 0, 0))
+            final_score = textos.texto("final", font_hud, f"PONTUAÇÃO FINAL: {score}", (255, 255, 255))
             
-            rect_go = go_text.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
-            rect_sc = final_score.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
-            screen.blit(go_text, rect_go)
-            screen.blit(final_score, rect_sc)
+            render.blit(go_text, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 - 50))
+            render.blit(final_score, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 20))
             
         elif paused:
-            msg = font_big.render("PAUSADO", True, (255, 255, 0))
-            sub = font_hud.render("Aguardando Servidor ou Tecla ESPAÇO...", True, (200, 200, 200))
-            rect_msg = msg.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
-            rect_sub = sub.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 60))
-            screen.blit(msg, rect_msg)
-            screen.blit(sub, rect_sub)
-
-        pygame.display.flip()
+            msg = textos.texto("pausado", font_big, "PAUSADO", (255, 255, 0))
+            sub = textos.texto("pausado_sub", font_hud, "Aguardando Servidor ou Tecla ESPAÇO...", (200, 200, 200))
+            render.blit(msg, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2))
+            render.blit(sub, center=(SCREEN_WIDTH//2, SCREEN_HEIGHT//2 + 60))
+
+        # Atualiza só as regiões que mudaram
+        render.fim_frame()
         clock.tick(60)
     
     pygame.quit()
@@ -303,4 +352,4 @@ if __name__ == "__main__":
     except Exception as e: print(e)
     finally: sys.exit()
 
-    
\ No newline at end of file
+    
\ No newline at end of file
@@ -4,12 +4,15 @@ sys.stdout.reconfigure(line_buffering=True)
 
 import asyncio
 import json
-import pygame
 import threading
 import queue
 import math
 import time
 
+import interceptacao
+import planejador
+import rastreio
+
 try:
     import websocket # pip install websocket-client
     import websockets # pip install websockets
@@ -22,6 +25,51 @@ WEBSOCKET_URI_GAME = "ws://127.0.0.1:8765"
 WEBSOCKET_URI_CAR = "ws://192.168.1.102:81"
 MEU_PERSONAGEM = "fantasma_1" # Confirme o nome no JSON!
 
+# --- MODO MULTI-ROBÔ ---
+# Se um arquivo de robôs for informado (constante ou 1º argumento da linha de
+# comando), um único processo controla todos os robôs listados nele:
+# uma só conexão com a visão, um só parse por snapshot e um escalonador comum.
+# Formato: {"robos": [{"personagem": "fantasma_1", "uri": "ws://IP:81"}, ...]}
+ARQUIVO_ROBOS = None # Ex: "robos_controle.json"
+
+# --- PLANEJADOR (CAMPO DE FLUXO) ---
+# Arquivo com a arena e os obstáculos fixos (ver planejador.carregar_mapa).
+# Se None, o robô mira direto no alvo (angulo_para_alvo).
+ARQUIVO_MAPA = None # Ex: "pac-man_arena_rois.json"
+
+# --- INTERCEPTAÇÃO ---
+# Persegue o ponto onde o alvo estará (velocidade estimada pelo histórico)
+# em vez da posição reportada, que já chega atrasada.
+USAR_INTERCEPTACAO = True
+VEL_ROBO_PX_S = 150   # Velocidade média do robô em VEL_FRENTE (pixels/s) - calibre!
+LATENCIA_VISAO = interceptacao.LATENCIA_PADRAO # Idade típica de um snapshot (s)
+
+# --- JANELA DE STATUS ---
+# Sem janela (--headless ou MOSTRAR_JANELA = False) o pygame nem é importado
+# e o status sai como linhas JSON no terminal. Com janela, ela é desenhada
+# na thread principal a no máximo FPS_JANELA, lendo apenas um snapshot do status.
+MOSTRAR_JANELA = True
+FPS_JANELA = 10
+
+# --- RASTREIO DE LATÊNCIA (ver rastreio.py) ---
+# Com um arquivo definido (ou --rastreio=arquivo.jsonl), grava para cada
+# frame_id quando o snapshot chegou, quando cada robô decidiu e quando o
+# comando calculado a partir dele foi enviado ao ESP32.
+RASTREIO_ARQUIVO = None # Ex: "rastreio_controle.jsonl"
+
+# --- ASSINATURA DA VISÃO ---
+# Pede ao servidor só os próprios robôs, os alvos e o estado do jogo.
+# Com o planejador ativo (ARQUIVO_MAPA) todos os personagens são pedidos,
+# pois os outros robôs são obstáculos.
+FILTRAR_VISAO = True
+ALVOS = ["pac-man", "bola"]
+
+# --- HISTÓRICO AO CONECTAR ---
+# Ao (re)conectar, pede ao servidor as últimas poses dos próprios robôs e dos
+# alvos: o detector de travamento e o estimador de velocidade do alvo
+# funcionam desde o primeiro passo, sem esperar ~2 s de histórico.
+PEDIR_HISTORICO = True
+
 # --- PARAMETROS DE MOVIMENTO ---
 FREQ_CONTROLE = 0.2  # 5 Hz (1 / 5 = 0.2 segundos)
 
@@ -30,37 +78,97 @@ VEL_FRENTE = 130     # Velocidade de cruzeiro
 VEL_CURVA_FORTE = 130 # Roda externa da curva
 VEL_CURVA_FRACA = 90  # Roda interna (Positiva para andar pra frente fazendo arco)
 VEL_RE = -100         # Para sair de travamentos
+ZONA_MORTA_GRAUS = 15 # Erro de ângulo abaixo do qual o robô vai reto
 
 # --- FILAS E ESTADO ---
 data_queue = queue.Queue()
-command_queue = queue.Queue()
+historico_queue = queue.Queue() # Respostas {"historico": ...} do servidor (separadas dos snapshots)
+# Sinalizado quando estado_jogo.paused muda: o loop de controle não espera o
+# próximo passo de FREQ_CONTROLE para zerar (ou religar) os motores.
+evento_pausa = threading.Event()
 running = True
+headless = False
+rastreador = None
+assinatura = None # Mensagem enviada ao servidor ao conectar (ver FILTRAR_VISAO)
+
+# Snapshot do status para a janela: lista de (personagem, status, comando).
+# É substituída inteira a cada passo (troca atômica), nunca alterada no lugar.
+status_atual = []
+
+# Histórico do alvo (compartilhado por todos os robôs do processo)
+estimador_alvo = interceptacao.EstimadorAlvo()
 
 # Histórico para detectar travamento
-historico_posicao = [] 
 MAX_HISTORICO = 10 # Guarda os últimos 10 posições (~2 segundos a 5Hz)
-MODO_DESTRAMENTO = False
-TIMER_DESTRAMENTO = 0
+TEMPO_DESTRAVAMENTO = 1.0 # Segundos de ré ao detectar travamento
+
+# ==========================================
+# 0. ESTADO POR ROBÔ
+# ==========================================
+def parametros_padrao():
+    """
+    Parâmetros de decisão lidos das constantes do módulo.
+
+    decidir() recebe esse dicionário, então outro programa (ex. avaliacao.py)
+    pode testar valores diferentes sem alterar as constantes.
+    """
+    return {
+        "VEL_FRENTE": VEL_FRENTE,
+        "VEL_CURVA_FORTE": VEL_CURVA_FORTE,
+        "VEL_CURVA_FRACA": VEL_CURVA_FRACA,
+        "VEL_RE": VEL_RE,
+        "ZONA_MORTA_GRAUS": ZONA_MORTA_GRAUS,
+        "MAX_HISTORICO": MAX_HISTORICO,
+        "TEMPO_DESTRAVAMENTO": TEMPO_DESTRAVAMENTO,
+        "FREQ_CONTROLE": FREQ_CONTROLE,
+        "USAR_INTERCEPTACAO": USAR_INTERCEPTACAO,
+        "VEL_ROBO_PX_S": VEL_ROBO_PX_S,
+        "LATENCIA_VISAO": LATENCIA_VISAO,
+    }
+
+def novo_robo(personagem, uri_carro, mapa=None):
+    """ Cria o estado de controle e o canal de comandos de um robô. """
+    return {
+        "personagem": personagem,
+        "uri_carro": uri_carro,
+        "command_queue": queue.Queue(),
+        "historico_posicao": [],
+        "modo_destravamento": False,
+        "timer_destravamento": 0.0,
+        "status_msg": "Iniciando...",
+        "cmd_txt": "0, 0",
+        # Cada robô tem seu campo: os "outros robôs" (obstáculos) dependem de quem pergunta
+        "planejador": planejador.CampoFluxo(*mapa) if mapa else None,
+    }
+
+def carregar_robos(arquivo, mapa=None):
+    """ Lê a lista de robôs (personagem e URI do ESP32) do arquivo de configuração. """
+    with open(arquivo, 'r') as f:
+        config = json.load(f)
+    return [novo_robo(r['personagem'], r['uri'], mapa) for r in config['robos']]
 
 # ==========================================
 # 1. THREAD CARRO (Envia Comandos)
 # ==========================================
-def car_thread():
+def car_thread(robo):
+    uri_carro, command_queue = robo["uri_carro"], robo["command_queue"]
     ws = None
     while running:
         # Conexão
         if ws is None or not ws.connected:
             try:
-                ws = websocket.create_connection(WEBSOCKET_URI_CAR, timeout=1)
-                print(">>> [ROBÔ] Conectado.")
+                ws = websocket.create_connection(uri_carro, timeout=1)
+                print(f">>> [ROBÔ] Conectado em {uri_carro}.")
             except:
                 time.sleep(1); continue
 
         # Envio
         try:
-            m1, m2 = command_queue.get(timeout=0.2)
+            m1, m2, frame_id = command_queue.get(timeout=0.2)
             msg = json.dumps({"motor1_vel": int(m1), "motor2_vel": int(m2)})
             ws.send(msg)
+            if rastreador:
+                rastreador.evento(frame_id, "enviado", robo=robo["personagem"])
             # print(f"   -> Enviado: {m1}, {m2}") # Descomente para debug intenso
         except queue.Empty:
             pass
@@ -71,16 +179,41 @@ def car_thread():
 # 2. THREAD VISÃO (Recebe Dados)
 # ==========================================
 async def vision_loop():
+    ultimo_frame = None
+    pausado = None
     while running:
         try:
             async with websockets.connect(WEBSOCKET_URI_GAME) as ws:
                 print(">>> [VISÃO] Conectado.")
+                if assinatura:
+                    await ws.send(json.dumps({"assinatura": assinatura}))
+                if PEDIR_HISTORICO:
+                    await ws.send(json.dumps({"historico": {
+                        "personagens": assinatura.get("personagens") if assinatura else None,
+                        "segundos": MAX_HISTORICO * FREQ_CONTROLE,
+                        "periodo": FREQ_CONTROLE}}))
                 while running:
                     msg = await ws.recv()
                     data = json.loads(msg)
-                    # Mantém apenas o dado mais recente
+                    if "historico" in data:
+                        if data["historico"]:
+                            historico_queue.put((time.time(), data["historico"]))
+                        continue
+                    if "erro" in data: # Ex.: relay recusando a assinatura
+                        print(f">>> [VISÃO] Aviso do servidor: {data['erro']}")
+                        continue
+                    # O servidor reenvia o mesmo frame até haver um novo: registra só a 1ª chegada
+                    frame_id = data.get("frame_id")
+                    if rastreador and frame_id != ultimo_frame:
+                        rastreador.evento(frame_id, "recebido")
+                    ultimo_frame = frame_id
+                    # Mantém apenas o dado mais recente (com o instante de chegada)
                     with data_queue.mutex: data_queue.queue.clear()
-                    data_queue.put(data)
+                    data_queue.put((time.time(), data))
+                    pausado_agora = bool(data.get("estado_jogo", {}).get("paused"))
+                    if pausado is not None and pausado_agora != pausado:
+                        evento_pausa.set()
+                    pausado = pausado_agora
         except:
             await asyncio.sleep(1)
 
@@ -104,155 +237,285 @@ def normalizar_erro(erro):
     # Traz o erro para o intervalo [-180, 180]
     return (erro + 180) % 360 - 180
 
-def checar_travamento(pos_atual):
+def checar_travamento(historico_posicao, pos_atual, max_historico=None):
     """ Retorna True se o robô estiver parado no mesmo lugar (pixel) há muito tempo """
-    global historico_posicao
-    
+    if max_historico is None:
+        max_historico = MAX_HISTORICO
     historico_posicao.append(pos_atual)
-    if len(historico_posicao) > MAX_HISTORICO:
+    if len(historico_posicao) > max_historico:
         historico_posicao.pop(0)
-    
-    if len(historico_posicao) < MAX_HISTORICO:
+
+    if len(historico_posicao) < max_historico:
         return False
 
     # Calcula deslocamento total nos últimos N frames
     p_ini = historico_posicao[0]
     p_fim = historico_posicao[-1]
     dist = math.hypot(p_fim[0] - p_ini[0], p_fim[1] - p_ini[1])
-    
+
     # Se moveu menos de 10 pixels em 2 segundos e estamos tentando andar... travou.
     return dist < 10
 
+def encontrar_alvo(objetos):
+    # Alvo: Tenta achar 'bola' ou 'pac-man' (genérico)
+    return next((o for o in objetos if 'bola' in o['personagem'] or 'pac-man' in o['personagem']), None)
+
+def direcao_navegacao(robo, eu, alvo, por_nome, mira):
+    """ Direção (graus) até a mira: campo de fluxo se houver mapa, senão reta. """
+    campo = robo["planejador"]
+    if campo is not None:
+        outros = [(o['x_global'], o['y_global']) for nome, o in por_nome.items()
+                  if nome != robo["personagem"] and o is not alvo]
+        campo.atualizar((mira['x_global'], mira['y_global']), outros)
+        direcao = campo.direcao(eu['x_global'], eu['y_global'])
+        if direcao is not None:
+            return direcao
+    return angulo_para_alvo(eu, mira)
+
+def decidir(robo, estado, por_nome, alvo, vel_alvo=(0.0, 0.0), p=None):
+    """
+    Calcula o comando de um robô para um snapshot da visão.
+
+    Só depende dos argumentos (nada de rede ou globais mutáveis): o mesmo
+    código roda no controle ao vivo e na avaliação offline (avaliacao.py).
+
+    Argumentos:
+        robo (dict): Estado de controle do robô (ver novo_robo). É atualizado.
+        estado (dict): 'estado_jogo' do snapshot.
+        por_nome (dict): Objetos do snapshot indexados por personagem.
+        alvo (dict): Objeto alvo (ou None).
+        vel_alvo (tuple): Velocidade estimada do alvo (px/s), usada na interceptação.
+        p (dict): Parâmetros de decisão (padrão: parametros_padrao()).
+
+    Retorna:
+        tuple: (m1, m2), ou None se nenhum comando novo deve ser enviado.
+    """
+    if p is None:
+        p = parametros_padrao()
+
+    # Regra de PAUSA / GAME OVER
+    if estado.get("paused") or estado.get("game_over"):
+        robo["status_msg"] = "JOGO PAUSADO / GAME OVER"
+        # Limpa histórico para não detectar travamento enquanto pausado
+        robo["historico_posicao"] = []
+        return 0, 0
+
+    eu = por_nome.get(robo["personagem"])
+
+    if not eu:
+        robo["status_msg"] = f"PROCURANDO {robo['personagem']}..."
+        return 0, 0
+    if not alvo:
+        robo["status_msg"] = "SEM ALVO VISÍVEL"
+        return 0, 0
+
+    # --- LÓGICA DE DESTRAVAMENTO ---
+    if robo["modo_destravamento"]:
+        # Se ativado, anda de ré por TEMPO_DESTRAVAMENTO segundos
+        robo["status_msg"] = "!!! DESTRAVANDO (RÉ) !!!"
+        robo["timer_destravamento"] -= p["FREQ_CONTROLE"]
+        if robo["timer_destravamento"] <= 0:
+            robo["modo_destravamento"] = False
+            robo["historico_posicao"] = [] # Reset histórico
+        return p["VEL_RE"], p["VEL_RE"]
+
+    # Verifica se travou (Se estamos tentando mover mas a posição (x,y) não muda)
+    pos_xy = (eu['x_global'], eu['y_global'])
+    if checar_travamento(robo["historico_posicao"], pos_xy, p["MAX_HISTORICO"]):
+        robo["modo_destravamento"] = True
+        robo["timer_destravamento"] = p["TEMPO_DESTRAVAMENTO"]
+        return None
+    # -------------------------------
+
+    # --- CÁLCULO DE NAVEGAÇÃO ---
+    ang_robo = float(eu['angulo_graus'])
+    if p["USAR_INTERCEPTACAO"]:
+        mira = interceptacao.ponto_interceptacao(eu, alvo, vel_alvo, p["VEL_ROBO_PX_S"], p["LATENCIA_VISAO"])
+    else:
+        mira = alvo
+    ang_alvo = direcao_navegacao(robo, eu, alvo, por_nome, mira)
+    erro = normalizar_erro(ang_alvo - ang_robo)
+
+    # Zona Morta (Alinhado)
+    if abs(erro) < p["ZONA_MORTA_GRAUS"]:
+        robo["status_msg"] = f"FRENTE (Erro {erro:.1f})"
+        return p["VEL_FRENTE"], p["VEL_FRENTE"]
+
+    # Curva para Direita (Erro Positivo)
+    # IMPORTANTE: Se o robô virar para a esquerda, inverta este bloco!
+    if erro > 0:
+        robo["status_msg"] = f"CURVA DIREITA (Erro {erro:.1f})"
+        return p["VEL_CURVA_FORTE"], p["VEL_CURVA_FRACA"] # Esquerda Força, Direita Suave (mas positiva!)
+
+    # Curva para Esquerda (Erro Negativo)
+    robo["status_msg"] = f"CURVA ESQUERDA (Erro {erro:.1f})"
+    return p["VEL_CURVA_FRACA"], p["VEL_CURVA_FORTE"] # Esquerda Suave, Direita Força
+
+def semear_historico(robos, historico, t_recebido):
+    """ Preenche o histórico de travamento dos robôs e o estimador do alvo com as poses recebidas. """
+    poses = historico["personagens"]
+    for robo in robos:
+        p = poses.get(robo["personagem"])
+        if p:
+            robo["historico_posicao"] = list(zip(p["x"], p["y"]))[-MAX_HISTORICO:]
+    alvo = next((poses[nome] for nome in ALVOS if nome in poses), None)
+    if alvo:
+        # Tempos relativos à pose mais nova -> t_captura do servidor (mesmo relógio dos snapshots)
+        t_ref = historico.get("t_ref") or t_recebido
+        estimador_alvo.limpar()
+        for t, x, y in zip(alvo["t"], alvo["x"], alvo["y"]):
+            estimador_alvo.observar(t_ref + t, x, y)
+    resumo = ", ".join(f"{n} ({len(p['t'])})" for n, p in poses.items())
+    print(f">>> [VISÃO] Histórico recebido: {resumo}")
+
+def passo_controle(robos, data, t_recebido):
+    """ Processa um snapshot (já decodificado) para todos os robôs do processo. """
+    estado = data.get("estado_jogo", {})
+    objetos = data.get("objetos", [])
+    # Índice por personagem, alvo e velocidade do alvo calculados uma única vez por snapshot
+    por_nome = {o['personagem']: o for o in objetos}
+    alvo = encontrar_alvo(objetos)
+    if alvo:
+        # Instante da captura, não da chegada: um snapshot reenviado (mesmo frame)
+        # tem o mesmo t_captura e é descartado pelo estimador como repetido
+        estimador_alvo.observar(data.get("t_captura", t_recebido), alvo['x_global'], alvo['y_global'])
+    vel_alvo = estimador_alvo.velocidade()
+
+    frame_id = data.get("frame_id")
+    p = parametros_padrao()
+
+    for robo in robos:
+        cmd = decidir(robo, estado, por_nome, alvo, vel_alvo, p)
+        if cmd is None:
+            continue
+        m1, m2 = cmd
+        if rastreador:
+            rastreador.evento(frame_id, "decidido", robo=robo["personagem"])
+        robo["cmd_txt"] = f"{m1}, {m2}"
+        robo["command_queue"].put((m1, m2, frame_id))
+        log_status(robo, m1, m2)
+
+def log_status(robo, m1, m2):
+    if headless:
+        print(json.dumps({"t": round(time.time(), 3), "robo": robo["personagem"],
+                          "status": robo["status_msg"], "cmd": [m1, m2]}, ensure_ascii=False))
+    else:
+        print(f"[5Hz] {robo['personagem']}: {robo['status_msg']} | Cmd: {m1}, {m2}")
+
 # ==========================================
-# 4. LOOP PRINCIPAL (5 Hz)
+# 4. LOOP DE CONTROLE (5 Hz)
 # ==========================================
-def main():
-    global running, MODO_DESTRAMENTO, TIMER_DESTRAMENTO
-    
-    # Inicializa Pygame (Janela de Status)
+def loop_controle(robos):
+    """ Escalonador: um passo a cada FREQ_CONTROLE, dormindo entre os passos. """
+    global status_atual
+    proximo = time.monotonic()
+    while running:
+        while not historico_queue.empty():
+            t_recebido, historico = historico_queue.get()
+            semear_historico(robos, historico, t_recebido)
+
+        # Obter Dados
+        if not data_queue.empty():
+            t_recebido, data = data_queue.get()
+            passo_controle(robos, data, t_recebido)
+            status_atual = [(r["personagem"], r["status_msg"], r["cmd_txt"]) for r in robos]
+
+        proximo += FREQ_CONTROLE
+        espera = proximo - time.monotonic()
+        if espera > 0:
+            if evento_pausa.wait(espera):
+                # Pausa/retomada: processa o snapshot novo já, e retoma o período a partir daqui
+                evento_pausa.clear()
+                proximo = time.monotonic() - FREQ_CONTROLE
+        else:
+            proximo = time.monotonic() # Atrasou: não tenta recuperar passos perdidos
+
+# ==========================================
+# 5. JANELA DE STATUS (opcional, FPS limitado)
+# ==========================================
+def janela_status(nomes, n_robos):
+    global running
+    import pygame # Só importado quando há janela
+
     pygame.init()
-    screen = pygame.display.set_mode((400, 300))
-    pygame.display.set_caption(f"Controle 5Hz: {MEU_PERSONAGEM}")
+    screen = pygame.display.set_mode((400, 100 + 120 * n_robos))
+    pygame.display.set_caption(f"Controle 5Hz: {nomes}")
     font = pygame.font.Font(None, 24)
     clock = pygame.time.Clock()
 
-    # Inicia Threads
-    threading.Thread(target=car_thread, daemon=True).start()
-    threading.Thread(target=run_vision, daemon=True).start()
-
-    last_process_time = time.time()
-    status_msg = "Iniciando..."
-    cmd_txt = "0, 0"
-
-    print(f">>> INICIANDO CONTROLE MALHA FECHADA ({1/FREQ_CONTROLE:.0f} Hz)")
-
+    desenhado = None
     while running:
         # Eventos UI
         for event in pygame.event.get():
             if event.type == pygame.QUIT: running = False
 
-        # Verifica Timer de Controle (5Hz)
-        now = time.time()
-        if now - last_process_time >= FREQ_CONTROLE:
-            last_process_time = now
-            
-            # 1. Obter Dados
-            if data_queue.empty():
-                continue
-            
-            data = data_queue.get()
-            estado = data.get("estado_jogo", {})
-            objetos = data.get("objetos", [])
-
-            # 2. Regra de PAUSA / GAME OVER
-            if estado.get("paused") or estado.get("game_over"):
-                status_msg = "JOGO PAUSADO / GAME OVER"
-                command_queue.put((0, 0))
-                # Limpa histórico para não detectar travamento enquanto pausado
-                historico_posicao = [] 
-                print(f"[5Hz] {status_msg} -> Motores 0")
-                continue
-
-            # 3. Identificar Entidades
-            eu = next((o for o in objetos if o['personagem'] == MEU_PERSONAGEM), None)
-            # Alvo: Tenta achar 'bola' ou 'fantasma' (genérico)
-            alvo = next((o for o in objetos if 'bola' in o['personagem'] or 'pac-man' in o['personagem']), None)
-
-            if eu and alvo:
-                # --- LÓGICA DE DESTRAVAMENTO ---
-                if MODO_DESTRAMENTO:
-                    # Se ativado, anda de ré por 1 segundo
-                    status_msg = "!!! DESTRAVANDO (RÉ) !!!"
-                    command_queue.put((VEL_RE, VEL_RE))
-                    TIMER_DESTRAMENTO -= FREQ_CONTROLE
-                    if TIMER_DESTRAMENTO <= 0:
-                        MODO_DESTRAMENTO = False
-                        historico_posicao = [] # Reset histórico
-                    print(f"[5Hz] {status_msg}")
-                    continue
-
-                # Verifica se travou (Se estamos tentando mover mas a posição (x,y) não muda)
-                pos_xy = (eu['x_global'], eu['y_global'])
-                if checar_travamento(pos_xy):
-                    MODO_DESTRAMENTO = True
-                    TIMER_DESTRAMENTO = 1.0 # 1 segundo de ré
-                    continue
-                # -------------------------------
-
-                # --- CÁLCULO DE NAVEGAÇÃO ---
-                ang_robo = float(eu['angulo_graus'])
-                ang_alvo = angulo_para_alvo(eu, alvo)
-                erro = normalizar_erro(ang_alvo - ang_robo)
-
-                m1, m2 = 0, 0
-                
-                # Zona Morta (Alinhado)
-                if abs(erro) < 15: 
-                    status_msg = f"FRENTE (Erro {erro:.1f})"
-                    m1, m2 = VEL_FRENTE, VEL_FRENTE
-                
-                # Curva para Direita (Erro Positivo)
-                # IMPORTANTE: Se o robô virar para a esquerda, inverta este bloco!
-                elif erro > 0:
-                    status_msg = f"CURVA DIREITA (Erro {erro:.1f})"
-                    m1 = VEL_CURVA_FORTE  # Esquerda Força
-                    m2 = VEL_CURVA_FRACA  # Direita Suave (mas positiva!)
-                
-                # Curva para Esquerda (Erro Negativo)
-                else:
-                    status_msg = f"CURVA ESQUERDA (Erro {erro:.1f})"
-                    m1 = VEL_CURVA_FRACA  # Esquerda Suave
-                    m2 = VEL_CURVA_FORTE  # Direita Força
-
-                cmd_txt = f"{m1}, {m2}"
-                command_queue.put((m1, m2))
-                print(f"[5Hz] {status_msg} | Cmd: {m1}, {m2}")
-
-            elif not eu:
-                status_msg = f"PROCURANDO {MEU_PERSONAGEM}..."
-                command_queue.put((0, 0))
-                print(f"[5Hz] {status_msg}")
-            else:
-                status_msg = "SEM ALVO VISÍVEL"
-                command_queue.put((0, 0))
-
-        # --- UI Pygame ---
-        screen.fill((0,0,0))
-        lines = [
-            f"Robo: {MEU_PERSONAGEM}",
-            f"Status: {status_msg}",
-            f"Comando Atual: {cmd_txt}",
-            f"Freq: 5Hz"
-        ]
-        y = 20
-        for l in lines:
-            color = (255, 50, 50) if "DESTRAVANDO" in status_msg else (0, 255, 0)
-            screen.blit(font.render(l, True, color), (20, y))
-            y += 30
-        pygame.display.flip()
-        
+        # Redesenha apenas quando o snapshot muda
+        snapshot = status_atual
+        if snapshot is not desenhado:
+            desenhado = snapshot
+            screen.fill((0,0,0))
+            y = 20
+            for personagem, status_msg, cmd_txt in snapshot:
+                lines = [
+                    f"Robo: {personagem}",
+                    f"Status: {status_msg}",
+                    f"Comando Atual: {cmd_txt}",
+                ]
+                color = (255, 50, 50) if "DESTRAVANDO" in status_msg else (0, 255, 0)
+                for l in lines:
+                    screen.blit(font.render(l, True, color), (20, y))
+                    y += 30
+                y += 30
+            screen.blit(font.render("Freq: 5Hz", True, (0, 255, 0)), (20, y))
+            pygame.display.flip()
+
+        clock.tick(FPS_JANELA)
+
     pygame.quit()
 
+# ==========================================
+# 6. PONTO DE ENTRADA
+# ==========================================
+def main():
+    global running, headless, status_atual, rastreador, assinatura
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    headless = "--headless" in sys.argv or not MOSTRAR_JANELA
+    arquivo_rastreio = next((a.split("=", 1)[1] for a in sys.argv if a.startswith("--rastreio=")), RASTREIO_ARQUIVO)
+    if arquivo_rastreio:
+        rastreador = rastreio.Rastreador(arquivo_rastreio, "controle")
+
+    mapa = planejador.carregar_mapa(ARQUIVO_MAPA) if ARQUIVO_MAPA else None
+    arquivo = args[0] if args else ARQUIVO_ROBOS
+    if arquivo:
+        robos = carregar_robos(arquivo, mapa)
+    else:
+        robos = [novo_robo(MEU_PERSONAGEM, WEBSOCKET_URI_CAR, mapa)]
+    nomes = ", ".join(r["personagem"] for r in robos)
+    if FILTRAR_VISAO:
+        assinatura = {"campos": ["pose", "velocidade", "estado"]}
+        if mapa is None:
+            assinatura["personagens"] = [r["personagem"] for r in robos] + ALVOS
+    status_atual = [(r["personagem"], r["status_msg"], r["cmd_txt"]) for r in robos]
+
+    # Inicia Threads (uma conexão com a visão, um link por robô)
+    for robo in robos:
+        threading.Thread(target=car_thread, args=(robo,), daemon=True).start()
+    threading.Thread(target=run_vision, daemon=True).start()
+
+    print(f">>> INICIANDO CONTROLE MALHA FECHADA ({1/FREQ_CONTROLE:.0f} Hz): {nomes}")
+
+    if headless:
+        loop_controle(robos)
+        return
+
+    # Com janela: o controle roda em sua própria thread, independente do custo da UI
+    threading.Thread(target=loop_controle, args=(robos,), daemon=True).start()
+    try:
+        janela_status(nomes, len(robos))
+    finally:
+        running = False
+
 if __name__ == "__main__":
     try: main()
 
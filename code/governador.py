@@ -0,0 +1,80 @@
+# governador.py - Ajuste automático de qualidade do loop de detecção
+#
+# Mede o tempo de processamento de cada frame contra um orçamento de latência
+# e sobe/desce um degrau de qualidade (resolução de captura, escala de
+# processamento, modo de detecção), com histerese:
+#   * desce quando o p90 da janela passa do orçamento;
+#   * sobe só depois de JANELAS_PARA_SUBIR janelas seguidas com folga
+#     (p90 abaixo de FOLGA_SUBIDA * orçamento);
+#   * após cada troca a janela recomeça (o custo do nível novo é medido do zero).
+#
+# O nível ativo é publicado no snapshot ("qualidade") pelo servidor.
+
+# Do mais caro ao mais barato. Coordenadas publicadas continuam na resolução
+# base (1920x1080); o servidor converte de volta.
+NIVEIS = [
+    {"nome": "maximo", "resolucao": (1920, 1080), "escala": 1.0,  "morfologia": True},
+    {"nome": "alto",   "resolucao": (1920, 1080), "escala": 0.75, "morfologia": True},
+    {"nome": "medio",  "resolucao": (1280, 720),  "escala": 0.75, "morfologia": True},
+    {"nome": "baixo",  "resolucao": (1280, 720),  "escala": 0.5,  "morfologia": True},
+    {"nome": "minimo", "resolucao": (1280, 720),  "escala": 0.5,  "morfologia": False},
+]
+
+JANELA_FRAMES = 30        # Frames por avaliação
+FOLGA_SUBIDA = 0.6        # Sobe só se p90 < 60% do orçamento
+JANELAS_PARA_SUBIR = 3    # Janelas seguidas com folga antes de subir
+
+
+class Governador:
+    def __init__(self, orcamento_s, niveis=NIVEIS, nivel_inicial=0):
+        self.orcamento = orcamento_s
+        self.niveis = niveis
+        self.indice = nivel_inicial
+        self.amostras = []
+        self.folgas = 0
+        self.p90 = 0.0
+
+    @property
+    def nivel(self):
+        return self.niveis[self.indice]
+
+    def registrar(self, t_processamento):
+        """ Registra o tempo (s) de um frame. Retorna True quando o nível muda. """
+        self.amostras.append(t_processamento)
+        if len(self.amostras) < JANELA_FRAMES:
+            return False
+
+        ordenados = sorted(self.amostras)
+        self.p90 = ordenados[int(0.9 * (len(ordenados) - 1))]
+        self.amostras.clear()
+
+        if self.p90 > self.orcamento and self.indice < len(self.niveis) - 1:
+            self.folgas = 0
+            return self._trocar(self.indice + 1)
+
+        if self.p90 < FOLGA_SUBIDA * self.orcamento and self.indice > 0:
+            self.folgas += 1
+            if self.folgas >= JANELAS_PARA_SUBIR:
+                self.folgas = 0
+                return self._trocar(self.indice - 1)
+        else:
+            self.folgas = 0
+        return False
+
+    def _trocar(self, indice):
+        anterior = self.nivel["nome"]
+        self.indice = indice
+        print(f"[GOVERNADOR] p90={self.p90*1000:.1f} ms (orçamento {self.orcamento*1000:.0f} ms): "
+              f"{anterior} -> {self.nivel['nome']}")
+        return True
+
+    def publicar(self):
+        """ Dicionário publicado no snapshot. """
+        return {
+            "nivel": self.indice,
+            "nome": self.nivel["nome"],
+            "resolucao": list(self.nivel["resolucao"]),
+            "escala": self.nivel["escala"],
+            "morfologia": self.nivel["morfologia"],
+            "p90_ms": round(self.p90 * 1000, 1),
+        }
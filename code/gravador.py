@@ -0,0 +1,148 @@
+# gravador.py - "Caixa-preta" de frames lentos do loop de detecção
+#
+# Guarda num anel os tempos e entradas dos últimos N frames. O ROI de cada
+# frame é copiado num buffer reaproveitado antes da detecção (que desenha no
+# frame); quando um frame passa do limite (absoluto, ou FATOR_LENTO vezes a
+# mediana recente), o ROI daquele frame vai para uma thread de escrita, que grava em
+# PASTA/frame_<id>_<hora>/:
+#   roi.png      imagem do ROI como a detecção recebeu
+#   info.json    tempos do frame, contornos por personagem, configuração de
+#                cores e o anel com os frames anteriores
+#   perfil.txt   amostras de pilha da thread de detecção durante o frame lento
+#
+# O perfil vem de uma thread amostradora (sys._current_frames a cada
+# PERIODO_AMOSTRAGEM): não instrumenta o código e só é lida no dump, mas roda
+# a partir do momento em que GRAVADOR_PASTA é definido e cada amostra pega o GIL para
+# percorrer a pilha. Custo medido num laço Python puro: ~2,5% a 500 Hz,
+# dentro do ruído a 200 Hz (o padrão). 200 Hz dão ~6 amostras num frame de
+# 33 ms e dezenas num frame lento, o suficiente para o perfil.
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from collections import Counter, deque
+
+import cv2
+import numpy as np
+
+TAMANHO_ANEL = 120          # Frames guardados
+FATOR_LENTO = 3.0           # Lento = FATOR_LENTO x mediana do anel (se não houver limite absoluto)
+INTERVALO_MIN_DUMPS = 5.0   # s entre dumps (uma rajada de frames lentos gera um só)
+PERIODO_AMOSTRAGEM = 0.005  # s entre amostras de pilha (200 Hz)
+AMOSTRAS_GUARDADAS = 800    # ~4 s de amostras
+LINHAS_PERFIL = 25
+
+
+class Amostrador:
+    """ Amostra a pilha de uma thread em intervalos fixos (perfil estatístico). """
+
+    def __init__(self, thread_id, periodo=PERIODO_AMOSTRAGEM):
+        self.thread_id = thread_id
+        self.periodo = periodo
+        self.amostras = deque(maxlen=AMOSTRAS_GUARDADAS) # (t, ((arquivo, linha, função), ...))
+        threading.Thread(target=self._executar, daemon=True).start()
+
+    def _executar(self):
+        while True:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                pilha = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    pilha.append((os.path.basename(codigo.co_filename), frame.f_lineno, codigo.co_name))
+                    frame = frame.f_back
+                self.amostras.append((time.perf_counter(), tuple(pilha)))
+            time.sleep(self.periodo)
+
+    def perfil(self, t_inicio, t_fim):
+        """ Texto com as linhas mais amostradas (topo da pilha) e as funções mais presentes. """
+        pilhas = [p for t, p in list(self.amostras) if t_inicio <= t <= t_fim]
+        if not pilhas:
+            return "Sem amostras no intervalo do frame.\n"
+        topo = Counter(p[0] for p in pilhas)
+        inclusivo = Counter()
+        for p in pilhas:
+            inclusivo.update({(arq, func) for arq, _, func in p})
+
+        linhas = [f"{len(pilhas)} amostras em {(t_fim - t_inicio)*1000:.1f} ms", "", "## Topo da pilha (exclusivo)"]
+        for (arq, linha, func), n in topo.most_common(LINHAS_PERFIL):
+            linhas.append(f"{100*n/len(pilhas):6.1f}%  {arq}:{linha} {func}")
+        linhas += ["", "## Funções na pilha (inclusivo)"]
+        for (arq, func), n in inclusivo.most_common(LINHAS_PERFIL):
+            linhas.append(f"{100*n/len(pilhas):6.1f}%  {arq} {func}")
+        return "\n".join(linhas) + "\n"
+
+
+class GravadorVoo:
+    """
+    Uso no loop (mesma thread da detecção):
+        inicio = gravador.inicio_frame(frame_arena)
+        ... detecção ...
+        gravador.fim_frame(inicio, frame_id, etapas, contornos)
+    """
+
+    def __init__(self, pasta, config, limite_s=None, tamanho=TAMANHO_ANEL):
+        self.pasta = pasta
+        self.config = config
+        self.limite_s = limite_s
+        self.anel = deque(maxlen=tamanho)
+        self.ultimo_dump = 0.0
+        self.entrada = None # Cópia do ROI do frame atual (buffer reaproveitado)
+        self.fila = queue.SimpleQueue()
+        self.amostrador = Amostrador(threading.get_ident())
+        threading.Thread(target=self._escritor, daemon=True).start()
+
+    def inicio_frame(self, frame_arena):
+        """ Guarda a entrada do frame (ROI bruto) e retorna o instante de início. """
+        t_inicio = time.perf_counter()
+        if self.entrada is None or self.entrada.shape != frame_arena.shape:
+            self.entrada = frame_arena.copy()
+        else:
+            np.copyto(self.entrada, frame_arena)
+        return t_inicio
+
+    def _limite(self):
+        if self.limite_s is not None:
+            return self.limite_s
+        if len(self.anel) < 10:
+            return None
+        duracoes = sorted(r["duracao_s"] for r in self.anel)
+        return FATOR_LENTO * duracoes[len(duracoes) // 2]
+
+    def fim_frame(self, t_inicio, frame_id, etapas, contornos):
+        """ Registra o frame; se for lento, agenda o dump (só então o ROI guardado é duplicado). """
+        t_fim = time.perf_counter()
+        registro = {
+            "frame_id": frame_id,
+            "t": time.time(),
+            "duracao_s": round(t_fim - t_inicio, 6),
+            "etapas_s": {k: round(v, 6) for k, v in etapas.items()},
+            "contornos": dict(contornos),
+        }
+        limite = self._limite()
+        self.anel.append(registro)
+        if limite is None or registro["duracao_s"] <= limite or t_fim - self.ultimo_dump < INTERVALO_MIN_DUMPS:
+            return False
+        self.ultimo_dump = t_fim
+        self.fila.put((registro, limite, list(self.anel), self.entrada.copy(), t_inicio, t_fim))
+        print(f"[GRAVADOR] Frame {frame_id} lento ({registro['duracao_s']*1000:.1f} ms > "
+              f"{limite*1000:.1f} ms). Gravando em {self.pasta}.")
+        return True
+
+    def _escritor(self):
+        while True:
+            registro, limite, anel, roi, t_inicio, t_fim = self.fila.get()
+            try:
+                nome = f"frame_{registro['frame_id']}_{time.strftime('%H%M%S', time.localtime(registro['t']))}"
+                destino = os.path.join(self.pasta, nome)
+                os.makedirs(destino, exist_ok=True)
+                cv2.imwrite(os.path.join(destino, "roi.png"), roi)
+                with open(os.path.join(destino, "perfil.txt"), "w") as f:
+                    f.write(self.amostrador.perfil(t_inicio, t_fim))
+                with open(os.path.join(destino, "info.json"), "w") as f:
+                    json.dump({"frame": registro, "limite_s": limite, "config": self.config,
+                               "anel": anel}, f, indent=2, default=str)
+            except OSError as e:
+                print(f"[GRAVADOR] Erro ao gravar dump: {e}")
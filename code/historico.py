@@ -0,0 +1,98 @@
+# historico.py - Anel com as últimas poses de cada personagem (no servidor)
+#
+# Cada personagem tem um array numpy de tamanho fixo (t, x, y, ângulo) usado
+# como anel: gravar uma pose é escrever uma linha e avançar um contador, sem
+# alocar nada por frame (o array só é criado quando o personagem aparece pela
+# 1ª vez). Clientes que acabam de conectar pedem as últimas poses numa única
+# mensagem e não precisam esperar o próprio histórico encher.
+#
+# Pedido (pelo WebSocket do servidor):
+#     {"historico": {"personagens": ["fantasma_1"], "segundos": 3, "periodo": 0.2}}
+# Resposta (colunas; t relativo a "t_ref", o t_captura da pose mais nova):
+#     {"historico": {"t_ref": 1712.5, "personagens": {"fantasma_1":
+#         {"t": [-2.97, ..., 0.0], "x": [...], "y": [...], "angulo": [...]}}}}
+import threading
+
+import numpy as np
+
+SEGUNDOS_PADRAO = 10.0
+TAXA_MAX_HZ = 30   # Poses por segundo guardadas (a mais, o anel cobre menos tempo)
+
+
+class HistoricoPoses:
+    def __init__(self, segundos=SEGUNDOS_PADRAO, taxa_hz=TAXA_MAX_HZ):
+        self.segundos = segundos
+        self.capacidade = int(segundos * taxa_hz)
+        self.periodo_min = 0.8 / taxa_hz # Folga para o jitter entre frames
+        self.aneis = {}     # personagem -> array (capacidade, 4): t, x, y, angulo
+        self.escritos = {}  # personagem -> total de poses já gravadas
+        self.t_ref = None
+        self._trava = threading.Lock() # Só para criar anéis (escrita x leitura de outra thread)
+
+    def registrar(self, t, objetos):
+        """ Grava as poses de um snapshot (chamado pelo loop de detecção). """
+        for obj in objetos:
+            nome = obj["personagem"]
+            anel = self.aneis.get(nome)
+            if anel is None:
+                with self._trava:
+                    anel = self.aneis[nome] = np.full((self.capacidade, 4), np.nan)
+                    self.escritos[nome] = 0
+            n = self.escritos[nome]
+            if n and t - anel[(n - 1) % self.capacidade, 0] < self.periodo_min:
+                continue
+            linha = anel[n % self.capacidade]
+            linha[0] = t
+            linha[1] = obj["x_global"]
+            linha[2] = obj["y_global"]
+            linha[3] = obj.get("angulo_graus", np.nan)
+            self.escritos[nome] = n + 1
+        self.t_ref = t
+
+    def consultar(self, personagens=None, segundos=None, periodo=None):
+        """
+        Últimas poses por personagem, em ordem cronológica.
+
+        Argumentos:
+            personagens (list): Nomes pedidos (None = todos).
+            segundos (float): Janela (limitada ao tamanho do anel).
+            periodo (float): Espaçamento mínimo entre poses devolvidas (s).
+
+        Retorna:
+            dict: {"t_ref", "personagens": {nome: {"t", "x", "y", "angulo"}}}
+        """
+        segundos = min(segundos or self.segundos, self.segundos)
+        t_ref = self.t_ref
+        resposta = {"t_ref": None if t_ref is None else round(t_ref, 4), "personagens": {}}
+        if t_ref is None:
+            return resposta
+        with self._trava:
+            nomes = list(self.aneis) if personagens is None else [p for p in personagens if p in self.aneis]
+
+        for nome in nomes:
+            n = self.escritos[nome]
+            # Deixa uma linha de folga: a detecção pode estar sobrescrevendo a mais antiga
+            k = min(n, self.capacidade - 1)
+            indices = np.arange(n - k, n) % self.capacidade
+            poses = self.aneis[nome][indices]
+            poses = poses[poses[:, 0] >= t_ref - segundos]
+            if periodo and len(poses) > 1:
+                poses = poses[self._decimar(poses[:, 0], periodo)]
+            resposta["personagens"][nome] = {
+                "t": np.round(poses[:, 0] - t_ref, 3).tolist(),
+                "x": np.round(poses[:, 1], 1).tolist(),
+                "y": np.round(poses[:, 2], 1).tolist(),
+                "angulo": [None if np.isnan(a) else round(float(a), 1) for a in poses[:, 3]],
+            }
+        return resposta
+
+    @staticmethod
+    def _decimar(tempos, periodo):
+        """ Índices com pelo menos 'periodo' s entre si, ancorados na pose mais nova. """
+        escolhidos = []
+        proximo = np.inf
+        for i in range(len(tempos) - 1, -1, -1):
+            if tempos[i] <= proximo:
+                escolhidos.append(i)
+                proximo = tempos[i] - periodo + 1e-3 # Tolerância de arredondamento
+        return escolhidos[::-1]
@@ -0,0 +1,103 @@
+# interceptacao.py - Predição de movimento do alvo e ponto de interceptação
+#
+# A posição do alvo recebida da visão já está atrasada (um frame + rede).
+# Este módulo estima a velocidade do alvo pelo histórico recente de snapshots
+# (mínimos quadrados sobre poucas amostras) e resolve o ponto onde um
+# perseguidor com velocidade conhecida consegue alcançá-lo:
+#
+#     |P + V*t - R| = s*t   ->   (V.V - s^2) t^2 + 2 (D.V) t + D.D = 0,  D = P - R
+#
+# Tudo em Python puro, sem alocação relevante: poucos microssegundos por passo.
+import math
+from collections import deque
+
+# --- PARÂMETROS ---
+MAX_AMOSTRAS = 6          # Amostras usadas na estimativa de velocidade
+MAX_INTERVALO = 1.0       # Segundos sem ver o alvo para descartar o histórico
+HORIZONTE_MAX = 2.0       # Limite (s) da previsão; evita mirar longe demais
+LATENCIA_PADRAO = 0.15    # Atraso estimado visão + rede (s) compensado na previsão
+
+
+class EstimadorAlvo:
+    """ Mantém as últimas posições do alvo e estima sua velocidade (px/s). """
+
+    def __init__(self, max_amostras=MAX_AMOSTRAS):
+        self.amostras = deque(maxlen=max_amostras)
+
+    def observar(self, t, x, y):
+        if self.amostras and t - self.amostras[-1][0] > MAX_INTERVALO:
+            self.amostras.clear()
+        if self.amostras and t <= self.amostras[-1][0]:
+            return # Snapshot repetido
+        self.amostras.append((t, x, y))
+
+    def limpar(self):
+        self.amostras.clear()
+
+    def velocidade(self):
+        """ Retorna (vx, vy) em px/s pela regressão linear das amostras; (0, 0) se não há dados. """
+        n = len(self.amostras)
+        if n < 2:
+            return 0.0, 0.0
+        t0 = self.amostras[0][0]
+        st = sx = sy = stt = stx = sty = 0.0
+        for t, x, y in self.amostras:
+            t -= t0
+            st += t; sx += x; sy += y
+            stt += t * t; stx += t * x; sty += t * y
+        den = n * stt - st * st
+        if den <= 0:
+            return 0.0, 0.0
+        return (n * stx - st * sx) / den, (n * sty - st * sy) / den
+
+
+def tempo_interceptacao(dx, dy, vx, vy, vel_perseguidor):
+    """
+    Menor t >= 0 tal que o perseguidor (velocidade escalar vel_perseguidor)
+    alcança o alvo que está em (dx, dy) relativo a ele e anda a (vx, vy).
+    Retorna None se não há solução.
+    """
+    a = vx * vx + vy * vy - vel_perseguidor * vel_perseguidor
+    b = 2 * (dx * vx + dy * vy)
+    c = dx * dx + dy * dy
+
+    if abs(a) < 1e-9:
+        # Mesma velocidade: equação linear
+        if b >= 0:
+            return None
+        return -c / b
+
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return None
+    raiz = math.sqrt(disc)
+    t1 = (-b - raiz) / (2 * a)
+    t2 = (-b + raiz) / (2 * a)
+    candidatos = [t for t in (t1, t2) if t >= 0]
+    return min(candidatos) if candidatos else None
+
+
+def ponto_interceptacao(eu, alvo, vel_alvo, vel_perseguidor, latencia=LATENCIA_PADRAO):
+    """
+    Calcula o ponto de mira para perseguir o alvo.
+
+    Argumentos:
+        eu (dict), alvo (dict): Objetos do snapshot (x_global, y_global).
+        vel_alvo (tuple): (vx, vy) do alvo em px/s.
+        vel_perseguidor (float): Velocidade do robô em px/s.
+        latencia (float): Idade estimada do snapshot (s); o alvo é avançado por ela.
+
+    Retorna:
+        dict: {'x_global', 'y_global'} do ponto de mira (mesmo formato dos objetos).
+    """
+    vx, vy = vel_alvo
+    # Compensa o atraso: onde o alvo está "agora"
+    px = alvo['x_global'] + vx * latencia
+    py = alvo['y_global'] + vy * latencia
+
+    t = tempo_interceptacao(px - eu['x_global'], py - eu['y_global'], vx, vy, vel_perseguidor)
+    if t is None:
+        t = 0.0 # Alvo mais rápido e se afastando: mira na posição atual
+    t = min(t, HORIZONTE_MAX)
+
+    return {'x_global': px + vx * t, 'y_global': py + vy * t}
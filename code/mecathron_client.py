@@ -0,0 +1,199 @@
+# mecathron_client.py - Cliente reutilizável do servidor de visão (ws://...:8765)
+#
+# Centraliza o protocolo que hoje é reimplementado em cada script:
+#   * Snapshots e objetos com __slots__ (acesso por atributo, sem dict.get com strings);
+#   * Índice personagem -> posição construído uma vez por conexão (reconstruído
+#     só quando a lista de personagens detectados muda);
+#   * Reconexão automática com backoff exponencial;
+#   * API por callback (executar) e por iterador assíncrono (async for);
+#   * Assinatura opcional (filtro de personagens/campos/taxa aplicado no servidor);
+#   * Usa orjson quando instalado (pip install orjson), senão json.
+#
+# Exemplo:
+#     async for snap in ClienteMecathron("ws://192.168.1.101:8765"):
+#         eu = snap.get("fantasma_1")
+#         if snap.pacman and eu: ...
+import asyncio
+import json
+import time
+
+import websockets
+
+try:
+    import orjson
+    _loads = orjson.loads
+    PARSER_JSON = "orjson"
+except ImportError:
+    _loads = json.loads
+    PARSER_JSON = "json"
+
+WEBSOCKET_URI = "ws://127.0.0.1:8765"
+BACKOFF_MIN = 0.5   # Segundos até a 1ª tentativa de reconexão
+BACKOFF_MAX = 8.0   # Limite do backoff exponencial
+
+
+class Objeto:
+    """
+    Um personagem detectado (coordenadas globais em pixels, ângulo em graus).
+    vx/vy (px/s): velocidade publicada pelo servidor (hoje só a bola); None se ausente.
+    """
+    __slots__ = ("personagem", "x", "y", "angulo", "vx", "vy")
+
+    def __init__(self, personagem, x, y, angulo, vx=None, vy=None):
+        self.personagem = personagem
+        self.x = x
+        self.y = y
+        self.angulo = angulo
+        self.vx = vx
+        self.vy = vy
+
+    def __repr__(self):
+        velocidade = f", vx={self.vx}, vy={self.vy}" if self.vx is not None else ""
+        return f"Objeto({self.personagem!r}, x={self.x}, y={self.y}, angulo={self.angulo}{velocidade})"
+
+
+class EstadoJogo:
+    """ Campos de 'estado_jogo' (valores padrão quando o servidor não os envia). """
+    __slots__ = ("paused", "game_over", "time_remaining", "lives", "score",
+                 "power_active", "speed_active", "power_timer", "speed_timer", "immunity")
+
+    def __init__(self, d=None):
+        d = d or {}
+        self.paused = bool(d.get("paused", False))
+        self.game_over = bool(d.get("game_over", False))
+        self.time_remaining = d.get("time_remaining", 0)
+        self.lives = d.get("lives", 0)
+        self.score = d.get("score", 0)
+        self.power_active = bool(d.get("power_active", False))
+        self.speed_active = bool(d.get("speed_active", False))
+        self.power_timer = d.get("power_timer", 0)
+        self.speed_timer = d.get("speed_timer", 0)
+        self.immunity = bool(d.get("immunity", False))
+
+    @property
+    def parado(self):
+        """ True se os motores devem ficar em zero (pausa ou fim de jogo). """
+        return self.paused or self.game_over
+
+
+_ESTADO_VAZIO = EstadoJogo()
+
+
+class Snapshot:
+    """ Uma mensagem do servidor de visão já decodificada. """
+    __slots__ = ("frame_id", "t_recebido", "objetos", "estado", "zonas", "coletas", "pacman", "_indice")
+
+    def __init__(self, frame_id, t_recebido, objetos, indice, estado, zonas, coletas, pacman):
+        self.frame_id = frame_id
+        self.t_recebido = t_recebido
+        self.objetos = objetos
+        self._indice = indice
+        self.estado = estado
+        self.zonas = zonas
+        self.coletas = coletas
+        self.pacman = pacman
+
+    def get(self, personagem):
+        """ Objeto do personagem, ou None se não foi detectado neste snapshot. """
+        i = self._indice.get(personagem)
+        return None if i is None else self.objetos[i]
+
+
+class Decodificador:
+    """
+    Converte mensagens JSON em Snapshot.
+
+    Guarda, por conexão, a sequência de personagens e o índice nome -> posição;
+    enquanto o servidor mandar os mesmos personagens na mesma ordem o índice é reaproveitado.
+    """
+
+    def __init__(self, nome_pacman="pac-man"):
+        self.nome_pacman = nome_pacman
+        self._nomes = ()
+        self._indice = {}
+
+    def decodificar(self, mensagem, t_recebido=None):
+        dados = _loads(mensagem)
+        if isinstance(dados, dict) and "erro" in dados:
+            raise ValueError(f"aviso do servidor: {dados['erro']}") # Ex.: relay recusando a assinatura
+        if t_recebido is None:
+            t_recebido = time.time()
+
+        brutos = dados.get("objetos", ()) if isinstance(dados, dict) else dados
+        objetos = [Objeto(o["personagem"], o.get("x_global"), o.get("y_global"), o.get("angulo_graus"),
+                          o.get("vx"), o.get("vy")) for o in brutos]
+
+        nomes = self._nomes
+        if len(nomes) != len(objetos) or any(o.personagem != n for o, n in zip(objetos, nomes)):
+            self._nomes = tuple(o.personagem for o in objetos)
+            self._indice = {n: i for i, n in enumerate(self._nomes)}
+
+        i_pac = self._indice.get(self.nome_pacman)
+        pacman = objetos[i_pac] if i_pac is not None else None
+
+        if isinstance(dados, dict):
+            estado = EstadoJogo(dados["estado_jogo"]) if "estado_jogo" in dados else _ESTADO_VAZIO
+            return Snapshot(dados.get("frame_id"), t_recebido, objetos, self._indice, estado,
+                            dados.get("zonas", {}), dados.get("coletas", {}), pacman)
+        # Formato Rocket League: lista pura de objetos
+        return Snapshot(None, t_recebido, objetos, self._indice, _ESTADO_VAZIO, {}, {}, pacman)
+
+
+class ClienteMecathron:
+    """
+    Conexão com o servidor de visão com reconexão automática.
+
+    assinatura (dict, opcional): filtro enviado ao servidor a cada conexão,
+    ex. {"personagens": ["fantasma_1", "pac-man"], "campos": ["pose", "estado"], "taxa_max_hz": 5}.
+    """
+
+    def __init__(self, uri=WEBSOCKET_URI, backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX,
+                 nome_pacman="pac-man", verbose=True, assinatura=None):
+        self.uri = uri
+        self.assinatura = assinatura
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.nome_pacman = nome_pacman
+        self.verbose = verbose
+        self.rodando = True
+        self.conectado = False
+
+    def parar(self):
+        self.rodando = False
+
+    def _log(self, msg):
+        if self.verbose:
+            print(msg)
+
+    async def __aiter__(self):
+        espera = self.backoff_min
+        while self.rodando:
+            try:
+                async with websockets.connect(self.uri) as ws:
+                    self.conectado = True
+                    espera = self.backoff_min
+                    decodificador = Decodificador(self.nome_pacman) # Índice novo a cada conexão
+                    self._log(f"[MECATHRON] Conectado a {self.uri} (parser: {PARSER_JSON}).")
+                    if self.assinatura:
+                        await ws.send(json.dumps({"assinatura": self.assinatura}))
+                    async for mensagem in ws:
+                        if not self.rodando:
+                            return
+                        try:
+                            yield decodificador.decodificar(mensagem)
+                        except (ValueError, KeyError, TypeError) as e:
+                            self._log(f"[MECATHRON] Mensagem ignorada: {e}")
+            except (OSError, websockets.exceptions.WebSocketException) as e:
+                self._log(f"[MECATHRON] Sem conexão ({e}). Tentando de novo em {espera:.1f}s...")
+            finally:
+                self.conectado = False
+            if self.rodando:
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, self.backoff_max)
+
+    async def executar(self, callback):
+        """ Chama callback(snapshot) para cada snapshot recebido (callback pode ser async). """
+        async for snap in self:
+            resultado = callback(snap)
+            if asyncio.iscoroutine(resultado):
+                await resultado
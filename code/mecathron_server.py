@@ -3,9 +3,22 @@ import cv2
 import numpy as np
 import sys
 import json
+import time
 import asyncio
+import threading
+import tracemalloc
 from websockets.server import serve
 
+import bola
+import captura
+import governador
+import gravador
+import historico
+import metricas
+import multicamera
+import persistencia
+import rastreio
+
 # --- CONFIGURAÇÃO DE FILTRO ---
 # Fator de suavização (Alpha) para o filtro de média ponderada.
 # 0.05 a 0.20 é um bom ponto de partida. Quanto menor, mais suave, mas mais atraso.
@@ -18,6 +31,23 @@ LOWER_DARK_GREEN = np.array([40, 50, 50])
 UPPER_DARK_GREEN = np.array([80, 255, 150]) 
 MIN_GREEN_AREA = 500 
 
+# --- SINAL DE PARADA DO JUIZ ---
+# O verde escuro (detectar_cor_parada) é procurado a PERIODO_PARADA, não a cada
+# frame: numa cópia reduzida (ESCALA_PARADA) do frame inteiro ou, com
+# PARADA_NO_ROI = True, no HSV do ROI que a detecção já calculou, dentro da
+# própria thread da detecção (custo ~zero, mas o sinal precisa aparecer
+# dentro do ROI). Quando o sinal aparece ou some,
+# o snapshot sai com "estado_jogo": {"paused": ...} e os clientes são acordados
+# na hora, sem esperar o próprio período de envio.
+DETECTAR_PARADA = True
+PERIODO_PARADA = 0.2      # s entre verificações (5 Hz)
+ESCALA_PARADA = 0.25      # Escala do frame reduzido (MIN_GREEN_AREA é corrigida por escala²)
+PARADA_NO_ROI = False
+DETECTOR_PARADA = None
+ESTADO_PUBLICADO = None # Último estado_jogo publicado (mudança = envio imediato)
+LOOP_ASYNC = None       # Loop do WebSocket (para acordar os clientes a partir da thread do OpenCV)
+EVENTO_ENVIO = asyncio.Event() # Trocado a cada mudança de estado; quem espera nele é acordado
+
 CONFIG_FILE = "config_arena_pac_man.json"
 WEBSOCKET_PORT = 8765
 WEBSOCKET_HOST = "127.0.0.1" 
@@ -31,6 +61,154 @@ MOSTRAR_IMAGEM = True
 RAIO_PERSONAGEM_PIXELS = 60
 POWER_UP = False
 
+# --- RASTREIO DE LATÊNCIA (ver rastreio.py) ---
+# Cada snapshot leva "frame_id"; com um arquivo definido, o servidor grava
+# os instantes de captura, processamento e envio de cada frame.
+RASTREIO_ARQUIVO = None # Ex: "rastreio_servidor.jsonl"
+RASTREADOR = None
+
+# --- ASSINATURAS (FILTROS POR CLIENTE) ---
+# Após conectar, o cliente pode enviar:
+#   {"assinatura": {"personagens": ["fantasma_1", "pac-man"],
+#                   "campos": ["pose", "velocidade", "zonas", "estado"],
+#                   "taxa_max_hz": 5}}
+# Qualquer chave omitida = sem filtro naquele aspecto. Cada filtro distinto é
+# serializado uma única vez por frame e o JSON é compartilhado entre os clientes.
+PERIODO_ENVIO = 0.1 # Intervalo padrão entre envios para cada cliente (s)
+CAMPOS_OBJETO = {
+    "pose": ("x_global", "y_global", "angulo_graus"),
+    "velocidade": ("vx", "vy"),
+}
+CAMPOS_SNAPSHOT = {
+    "zonas": ("zonas",),
+    "estado": ("estado_jogo", "placar", "ultimo_gol"),
+    "qualidade": ("qualidade",),
+}
+CACHE_JSON = {} # chave do filtro -> json, só do frame CACHE_FRAME_ID (esvaziado a cada frame novo)
+CACHE_FRAME_ID = None
+
+# --- MODO DE JOGO ---
+# "pac-man" (padrão) ou "rocket-league" (chave "Modo" do arquivo de configuração).
+# No Rocket League a bola é rastreada à parte (ver bola.py) com a configuração
+# do bloco "Bola" (ou da cor "bola" em "Cores") e os gols vêm do bloco "Gols"
+# ({"GOL_1": [x, y, w, h], ...} em coordenadas globais).
+MODO_JOGO = "pac-man"
+CFG_BOLA = None
+RASTREADOR_BOLA = None
+JUIZ_GOLS = None
+ULTIMO_GOL = None      # {"gol", "frame_id", "t"} do último gol (persistente no snapshot)
+PAUSADO_GOL = False    # Após um gol o jogo pausa até a tecla ESPAÇO
+
+# --- BUFFERS DE TRABALHO ---
+# A detecção reaproveita imagens (HSV, máscaras) alocadas uma vez por tamanho de
+# ROI, via saídas dst= do OpenCV. Com MEDIR_ALOCACOES = True o servidor imprime
+# a cada PERIODO_MEDICAO frames a memória transitória por frame (tracemalloc,
+# que enxerga as alocações do numpy) e quantas vezes os buffers foram refeitos.
+KERNEL_MORFOLOGIA = np.ones((5, 5), np.uint8)
+MEDIR_ALOCACOES = False
+PERIODO_MEDICAO = 300
+
+# --- MODO DE DETECÇÃO (ver calibracao.py) ---
+# "hsv": caixa lower/upper por personagem + erosão/dilatação (padrão).
+# "retroprojecao": histograma matiz x saturação de cada personagem
+# (chave "histograma" em "Cores", gerada pelo calibracao.py) retroprojetado no
+# HSV do frame e limiarizado. A máscara já sai limpa: a morfologia vira uma
+# abertura 3x3 (ou nenhuma). Personagens sem histograma continuam no modo hsv.
+# Lido da chave "Deteccao" da configuração.
+MODO_DETECCAO = "hsv"
+LIMIAR_RETROPROJECAO = 50   # 0-255: probabilidade mínima (histograma normalizado) para o pixel entrar na máscara
+KERNEL_RETROPROJECAO = np.ones((3, 3), np.uint8) # None = sem morfologia na retroprojeção
+
+# --- GOVERNADOR DE QUALIDADE (ver governador.py) ---
+# Mede o tempo de processamento de cada frame e troca resolução de captura,
+# escala de processamento e modo de detecção para caber no orçamento.
+# O nível ativo vai no snapshot em "qualidade". Só no modo de uma câmera.
+USAR_GOVERNADOR = True
+ORCAMENTO_FRAME = 0.025   # s de processamento por frame (câmera a 30 fps = 33 ms)
+RESOLUCAO_BASE = (1920, 1080) # Resolução em que ROI, zonas e coordenadas publicadas são definidos
+
+# --- CÂMERA (ver captura.py) ---
+# Backend nativo do sistema (DirectShow no Windows, V4L2 com MJPG e buffer
+# mínimo no Linux). Exposição/ganho/balanço de branco travados pelo bloco
+# "Camera" da configuração.
+INDICE_CAMERA = 1
+CAMERA_CONFIG = {}
+
+# --- MÉTRICAS (ver metricas.py) ---
+# GET http://<host>:PORTA_METRICAS/metrics no formato do Prometheus.
+# No loop de frames só há somas em memória; o texto é montado na thread HTTP.
+PORTA_METRICAS = 9100          # None desliga o endpoint
+FPS_CAMERA = 30                # Período esperado entre frames (para contar frames perdidos)
+LIMITE_BUFFER_ENVIO = 256 * 1024 # Bytes pendentes no socket acima dos quais o envio ao cliente é descartado
+
+REGISTRO = metricas.Registro()
+M_FRAMES = REGISTRO.contador("mecathron_frames_total", "Frames capturados e processados")
+M_FRAMES_PERDIDOS = REGISTRO.contador("mecathron_frames_perdidos_total",
+                                      "Frames perdidos (falha de leitura ou intervalo maior que o período da câmera)")
+M_FPS = REGISTRO.medidor("mecathron_fps", "Frames processados por segundo (média exponencial)")
+M_ETAPA = REGISTRO.histograma("mecathron_etapa_segundos", "Tempo de cada etapa do processamento", rotulo="etapa")
+M_CLIENTES = REGISTRO.medidor("mecathron_clientes_conectados", "Clientes WebSocket conectados")
+M_ENVIOS = REGISTRO.contador("mecathron_envios_total", "Snapshots enviados aos clientes")
+M_DESCARTES = REGISTRO.contador("mecathron_envios_descartados_total",
+                                "Snapshots descartados porque o buffer de envio do cliente estava cheio")
+M_DETECCOES = REGISTRO.contador("mecathron_deteccoes_total", "Frames em que o personagem foi detectado", rotulo="personagem")
+M_FALHAS = REGISTRO.contador("mecathron_falhas_deteccao_total", "Frames em que o personagem não foi detectado", rotulo="personagem")
+M_CONFIANCA = REGISTRO.medidor("mecathron_confianca_deteccao",
+                               "Preenchimento do contorno na caixa mínima (0 a 1), média exponencial", rotulo="personagem")
+M_COLISOES = REGISTRO.contador("mecathron_colisoes_total", "Frames com colisão Pac-Man x fantasma")
+M_PARADA = REGISTRO.medidor("mecathron_sinal_parada", "1 enquanto o sinal de parada do juiz está visível")
+# Filhos usados a cada frame, resolvidos uma vez
+M_CAPTURA = M_ETAPA.com("captura")
+M_SEGMENTACAO = M_ETAPA.com("segmentacao")
+M_SUAVIZACAO = M_ETAPA.com("suavizacao")
+M_BOLA = M_ETAPA.com("bola")
+M_REGRAS = M_ETAPA.com("zonas_colisoes")
+M_ENVIO = M_ETAPA.com("envio")
+M_TOTAL = M_ETAPA.com("total")
+PESO_MEDIA_METRICAS = 0.05 # Peso da amostra nova nas médias exponenciais (fps, confiança)
+
+# --- GRAVADOR DE FRAMES LENTOS (ver gravador.py) ---
+# Com uma pasta definida, frames acima do limite (ou de gravador.FATOR_LENTO
+# vezes a mediana recente, se LIMITE_FRAME_LENTO = None) geram um dump com o
+# ROI bruto, os contornos por personagem, as cores e um perfil amostrado.
+GRAVADOR_PASTA = None       # Ex: "frames_lentos"
+LIMITE_FRAME_LENTO = None   # s; None = relativo à mediana
+
+# --- REGISTRO DAS PARTIDAS (ver persistencia.py) ---
+# Rodadas, colisões, entradas em zonas, gols, pontos e trajetórias vão para
+# SQLite por uma thread própria. Desligado por padrão: defina BANCO_PARTIDAS
+# (ex.: "mecathron_partidas.db") para ativar; trajetórias só são gravadas
+# durante uma rodada.
+# Uma rodada começa com a tecla 'r' na janela ou, sem janela, pela mensagem
+# WebSocket {"rodada": "iniciar"} (ou "encerrar"), aplicada no próximo frame.
+# Pontuação registrada (docs/regras.md): fantasma que captura o Pac-Man ganha
+# os segundos restantes da rodada; no Rocket League, 1 ponto por gol (registrado
+# com o nome da área de gol em que a bola entrou).
+BANCO_PARTIDAS = None    # Ex: "mecathron_partidas.db"
+DURACAO_RODADA = {"pac-man": 180, "rocket-league": 300}
+PERSISTENCIA = None
+PEDIDO_RODADA = None     # "iniciar"/"encerrar" vindo do WebSocket, tratado na thread de detecção
+COLISOES_ANTERIORES = {} # fantasma -> último instante em contato com o Pac-Man
+ZONAS_ANTERIORES = {}
+# Um contato só conta como nova colisão depois de o fantasma ficar este tempo
+# sem tocar no Pac-Man (evita recontar tremidas no raio de colisão e frames
+# perdidos). A 1ª captura pontua e encerra a rodada.
+TEMPO_FORA_CONTATO = 1.0 # s
+
+# --- HISTÓRICO DE POSES (ver historico.py) ---
+# Anel de tamanho fixo com as últimas HISTORICO_SEGUNDOS de poses de cada
+# personagem. Um cliente que conecta (ou reconecta) pode pedir pelo WebSocket
+#   {"historico": {"personagens": ["fantasma_1"], "segundos": 3, "periodo": 0.2}}
+# e recebe as poses numa só mensagem {"historico": {...}}, sem esperar o
+# próprio histórico (velocidade, travamento, rastros) encher.
+HISTORICO_SEGUNDOS = 10.0 # None desliga
+HISTORICO = historico.HistoricoPoses(HISTORICO_SEGUNDOS, FPS_CAMERA) if HISTORICO_SEGUNDOS else None
+
+# --- VÁRIAS CÂMERAS (ver multicamera.py) ---
+# Com o bloco "Cameras" na configuração, cada câmera é capturada e processada
+# em paralelo e as detecções são fundidas em coordenadas globais da arena.
+CAMERAS_CONFIG = []
+
 # --- CARREGAR CONFIGURAÇÃO ---
 try:
     with open(CONFIG_FILE, 'r') as f:
@@ -46,7 +224,26 @@ try:
         else:
             print("AVISO: Nenhuma zona de gatilho encontrada na configuração.")
         
-        print(f"Configuração carregada com {len(CORES_CONFIG)} personagens.")
+        CAMERA_CONFIG = CONFIG.get('Camera', {})
+        CAMERAS_CONFIG = CONFIG.get('Cameras', [])
+        if CAMERAS_CONFIG:
+            print(f"{len(CAMERAS_CONFIG)} câmeras configuradas (captura paralela).")
+
+        MODO_JOGO = CONFIG.get('Modo', MODO_JOGO)
+        MODO_DETECCAO = CONFIG.get('Deteccao', MODO_DETECCAO)
+        if MODO_JOGO == "rocket-league":
+            # A bola nunca é detectada como personagem: sai de "Cores" mesmo quando há bloco "Bola"
+            cor_bola = CORES_CONFIG.pop('bola', None)
+            CFG_BOLA = CONFIG.get('Bola') or cor_bola
+            if not CFG_BOLA:
+                print("ERRO: Modo 'rocket-league' sem cor da bola (bloco \"Bola\" ou \"bola\" em \"Cores\").")
+                print("Execute 'calibracao.py' com --personagens=...,bola ou adicione o bloco \"Bola\".")
+                sys.exit()
+            RASTREADOR_BOLA = bola.RastreadorBola(CFG_BOLA)
+            JUIZ_GOLS = bola.JuizGols(CONFIG.get('Gols', {}))
+            print(f"Modo Rocket League: bola rastreada à parte, {len(JUIZ_GOLS.gols)} gols.")
+
+        print(f"Configuração carregada com {len(CORES_CONFIG)} personagens (detecção '{MODO_DETECCAO}').")
         
         # ... (restante da inicialização de LAST_SMOOTHED_POSITIONS)
         for nome in CORES_CONFIG.keys():
@@ -138,50 +335,173 @@ def checar_colisoes(objetos_detectados_filtrados):
 # 3. Funções de Detecção e WS
 # ----------------------------------------------------------------------
 
-# Mantida a função detectar_cor_parada (inalterada)
-def detectar_cor_parada(frame):
-    """ Verifica a presença da cor Verde Escuro. """
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    mask = cv2.inRange(hsv, LOWER_DARK_GREEN, UPPER_DARK_GREEN)
+def detectar_cor_parada(frame, hsv=None, area_min=MIN_GREEN_AREA, mascara=None):
+    """ Verifica a presença da cor Verde Escuro (hsv: imagem já convertida, se houver). """
+    if hsv is None:
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, LOWER_DARK_GREEN, UPPER_DARK_GREEN, dst=mascara)
     
     contornos, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
     if contornos:
         maior_contorno = max(contornos, key=cv2.contourArea)
-        if cv2.contourArea(maior_contorno) >= MIN_GREEN_AREA:
+        if cv2.contourArea(maior_contorno) >= area_min:
             return True
     return False
 
-def processar_frame(frame):
+class DetectorParada:
+    """ Verificação do sinal de parada em baixa taxa, com buffers reaproveitados. """
+
+    def __init__(self, periodo=PERIODO_PARADA, escala=ESCALA_PARADA):
+        self.periodo = periodo
+        self.escala = escala
+        self.proximo = 0.0
+        self.ativo = False
+        self.reduzido = None
+        self.hsv = None
+        self.mascara = None
+
+    def verificar(self, t, frame=None, hsv=None, escala_hsv=1.0):
+        """
+        frame: frame completo (é reduzido e convertido aqui); ou hsv: imagem HSV
+        já calculada, em escala_hsv da resolução base.
+
+        Retorna:
+            bool: True se o estado do sinal mudou nesta verificação.
+        """
+        if t < self.proximo:
+            return False
+        self.proximo = t + self.periodo
+        if hsv is None:
+            h, w = frame.shape[:2]
+            tamanho = (max(1, int(w * self.escala)), max(1, int(h * self.escala)))
+            if self.reduzido is None or self.reduzido.shape[1::-1] != tamanho:
+                self.reduzido = np.empty((tamanho[1], tamanho[0], 3), np.uint8)
+                self.hsv = np.empty_like(self.reduzido)
+            cv2.resize(frame, tamanho, dst=self.reduzido, interpolation=cv2.INTER_AREA)
+            hsv = cv2.cvtColor(self.reduzido, cv2.COLOR_BGR2HSV, dst=self.hsv)
+            escala_hsv = self.escala * w / RESOLUCAO_BASE[0]
+        if self.mascara is None or self.mascara.shape != hsv.shape[:2]:
+            self.mascara = np.empty(hsv.shape[:2], np.uint8)
+
+        presente = detectar_cor_parada(None, hsv, MIN_GREEN_AREA * escala_hsv ** 2, self.mascara)
+        if presente == self.ativo:
+            return False
+        self.ativo = presente
+        return True
+
+class BuffersDeteccao:
+    """
+    Imagens de trabalho de um ROI, alocadas uma vez e reaproveitadas a cada
+    frame (saídas dst= do OpenCV). Também guarda os limites HSV já convertidos
+    para arrays, para não recriá-los por personagem e por frame.
+    """
+    alocacoes = 0 # Total de (re)alocações, de todas as câmeras
+
+    def __init__(self, forma, cores):
+        h, w = forma[:2]
+        self.forma = (h, w)
+        self.cores = cores
+        self.hsv = np.empty((h, w, 3), np.uint8)
+        self.mascara = np.empty((h, w), np.uint8)
+        self.temp = np.empty((h, w), np.uint8)
+        self.limites = {nome: (np.array(cor['lower'], np.uint8), np.array(cor['upper'], np.uint8))
+                        for nome, cor in cores.items()}
+        self.histogramas = {}
+        if MODO_DETECCAO == "retroprojecao":
+            self.histogramas = {nome: np.array(cor['histograma'], np.float32)
+                                for nome, cor in cores.items() if 'histograma' in cor}
+        self.contornos = {} # Contornos encontrados por personagem no último frame (para o gravador)
+        BuffersDeteccao.alocacoes += 1
+
+    def serve(self, frame, cores):
+        return self.forma == frame.shape[:2] and self.cores is cores
+
+def buffers_para(estado, frame, cores):
+    """ Buffers da câmera (estado['buffers']), refeitos só se o ROI ou as cores mudarem. """
+    buffers = estado.get('buffers')
+    if buffers is None or not buffers.serve(frame, cores):
+        buffers = estado['buffers'] = BuffersDeteccao(frame.shape, cores)
+    return buffers
+
+class ContadorAlocacoes:
+    """ Mede com tracemalloc a memória alocada e liberada dentro de cada período (em regime deve ficar ~0). """
+
+    def __init__(self, periodo=PERIODO_MEDICAO):
+        self.periodo = periodo
+        self.frames = 0
+        tracemalloc.start()
+
+    def frame(self):
+        self.frames += 1
+        if self.frames % self.periodo:
+            return
+        atual, pico = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        print(f"[MEM] {self.frames} frames: em uso={atual/1024:.0f} KiB, "
+              f"pico transitório no período={(pico - atual)/1024:.1f} KiB, "
+              f"realocações de buffers={BuffersDeteccao.alocacoes}")
+
+def processar_frame(frame, cores=None, suavizadas=None, buffers=None, morfologia=True):
     """
     Processa um único frame para detectar todos os personagens configurados.
+
+    cores e suavizadas permitem que cada câmera tenha calibração e filtro
+    próprios (padrão: CORES_CONFIG e LAST_SMOOTHED_POSITIONS). O frame não
+    é alterado; a caixa de cada detecção vai em 'caixa' para desenhar_deteccoes.
+    morfologia=False pula a erosão/dilatação (modo mais barato do governador).
+    Com MODO_DETECCAO = "retroprojecao", personagens com histograma usam a
+    retroprojeção no lugar da caixa HSV.
     """
-    frame_processado = frame.copy()
+    if cores is None:
+        cores = CORES_CONFIG
+    if suavizadas is None:
+        suavizadas = LAST_SMOOTHED_POSITIONS
+    if buffers is None:
+        buffers = BuffersDeteccao(frame.shape, cores)
     resultados = []
+    t_inicio = time.perf_counter()
+    t_suavizacao = 0.0
 
-    for nome_personagem, cor_hsv in CORES_CONFIG.items():
-        lower_hsv = np.array(cor_hsv['lower'])
-        upper_hsv = np.array(cor_hsv['upper'])
-        
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(hsv, lower_hsv, upper_hsv)
-        
-        kernel = np.ones((5, 5), np.uint8)
-        mask = cv2.erode(mask, kernel, iterations=1)
-        mask = cv2.dilate(mask, kernel, iterations=1)
+    # Conversão HSV uma vez por frame (e não por personagem), no buffer reaproveitado
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=buffers.hsv)
+
+    for nome_personagem in cores:
+        histograma = buffers.histogramas.get(nome_personagem)
+        if histograma is not None:
+            cv2.calcBackProject([hsv], [0, 1], histograma, [0, 180, 0, 256], 1, dst=buffers.temp)
+            cv2.threshold(buffers.temp, LIMIAR_RETROPROJECAO, 255, cv2.THRESH_BINARY, dst=buffers.mascara)
+            kernel = KERNEL_RETROPROJECAO
+        else:
+            lower_hsv, upper_hsv = buffers.limites[nome_personagem]
+            cv2.inRange(hsv, lower_hsv, upper_hsv, dst=buffers.mascara)
+            kernel = KERNEL_MORFOLOGIA
+
+        mask = buffers.mascara
+        if morfologia and kernel is not None:
+            cv2.erode(buffers.mascara, kernel, dst=buffers.temp, iterations=1)
+            mask = cv2.dilate(buffers.temp, kernel, dst=buffers.mascara, iterations=1)
 
         contornos, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        buffers.contornos[nome_personagem] = len(contornos)
 
         if not contornos:
+            M_FALHAS.com(nome_personagem).inc()
             continue # Nenhuma detecção, pula para o próximo personagem
 
         # Encontra o maior contorno (assume-se que é o personagem)
         contorno = max(contornos, key=cv2.contourArea)
-        if cv2.contourArea(contorno) < 50: 
+        area = cv2.contourArea(contorno)
+        if area < 50: 
+            M_FALHAS.com(nome_personagem).inc()
             continue
 
         rect = cv2.minAreaRect(contorno)
         (x_center, y_center), (width, height), angle = rect
+
+        M_DETECCOES.com(nome_personagem).inc()
+        confianca = M_CONFIANCA.com(nome_personagem)
+        confianca.set(confianca.valor + PESO_MEDIA_METRICAS * (area / max(width * height, 1) - confianca.valor))
         
         posicao_x_raw = int(x_center)
         posicao_y_raw = int(y_center)
@@ -197,8 +517,9 @@ def processar_frame(frame):
         # ------------------------------------------------------------------
         # --- APLICAÇÃO DO FILTRO DE SUAVIZAÇÃO (Exponential Smoothing) ---
         # ------------------------------------------------------------------
+        t_suav_inicio = time.perf_counter()
         
-        last_pos = LAST_SMOOTHED_POSITIONS[nome_personagem]
+        last_pos = suavizadas.get(nome_personagem)
         
         if last_pos is None:
             # Primeira detecção: define a posição atual como a posição suavizada
@@ -220,58 +541,187 @@ def processar_frame(frame):
             smoothed_angle = smoothed_angle % 360
 
         # Atualiza a variável global de posições suavizadas
-        LAST_SMOOTHED_POSITIONS[nome_personagem] = {
+        suavizadas[nome_personagem] = {
             'x': smoothed_x,
             'y': smoothed_y,
             'angulo': smoothed_angle
         }
+        t_suavizacao += time.perf_counter() - t_suav_inicio
         
         # ------------------------------------------------------------------
 
-        # Desenha no frame USANDO AS POSIÇÕES SUAVIZADAS
-        if MOSTRAR_IMAGEM:
+        resultados.append({
+            "personagem": nome_personagem,
+            "x_arena": smoothed_x, 
+            "y_arena": smoothed_y, 
+            "angulo_graus": round(smoothed_angle, 2),
+            "caixa": rect # Posição bruta, usada só para desenho
+        })
+
+    M_SEGMENTACAO.observar(time.perf_counter() - t_inicio - t_suavizacao)
+    M_SUAVIZACAO.observar(t_suavizacao)
+    return resultados
+
+def desenhar_deteccoes(frame, objetos):
+    """
+    Desenha as detecções (coordenadas do ROI) sobre o frame de exibição.
+    Chamado só depois de toda a detecção do frame, para não contaminar as cores.
+    """
+    for obj in objetos:
+        if 'caixa' in obj:
             # Usamos a posição bruta para desenhar o retângulo (mais preciso para o objeto)
-            box = cv2.boxPoints(rect)
-            box = np.int32(box)
+            box = np.int32(cv2.boxPoints(obj['caixa']))
             
             bgr_color = (255, 0, 0) 
-            if 'pac-man' in nome_personagem:
+            if 'pac-man' in obj['personagem']:
                 bgr_color = (0, 255, 255)
             
-            cv2.drawContours(frame_processado, [box], 0, bgr_color, 2) 
-            
-            # O CENTRO É DESENHADO USANDO A POSIÇÃO SUAVIZADA
-            cv2.circle(frame_processado, (smoothed_x, smoothed_y), 5, (0, 0, 255), -1)
+            cv2.drawContours(frame, [box], 0, bgr_color, 2) 
+        
+        # O CENTRO É DESENHADO USANDO A POSIÇÃO SUAVIZADA
+        cv2.circle(frame, (int(obj['x_arena']), int(obj['y_arena'])), 5, (0, 0, 255), -1)
 
-        resultados.append({
-            "personagem": nome_personagem,
-            "x_arena": smoothed_x, 
-            "y_arena": smoothed_y, 
-            "angulo_graus": round(smoothed_angle, 2)
-        })
 
-    return frame_processado, resultados
+def chave_assinatura(assinatura):
+    """
+    Converte a mensagem de assinatura em uma chave canônica (hashable).
+
+    Retorna:
+        tuple: (personagens ou None, campos ou None, periodo de envio)
+    """
+    personagens = assinatura.get("personagens")
+    campos = assinatura.get("campos")
+    taxa = assinatura.get("taxa_max_hz")
+    periodo = max(PERIODO_ENVIO, 1.0 / taxa) if taxa else PERIODO_ENVIO
+    return (tuple(sorted(personagens)) if personagens is not None else None,
+            tuple(sorted(campos)) if campos is not None else None,
+            periodo)
+
+def filtrar_snapshot(dados, personagens, campos):
+    """ Monta o payload reduzido de um cliente a partir do snapshot completo. """
+    filtrado = {k: dados[k] for k in ("frame_id", "t_captura") if k in dados}
+
+    chaves_obj = ["personagem"]
+    for campo in campos if campos is not None else CAMPOS_OBJETO:
+        chaves_obj.extend(CAMPOS_OBJETO.get(campo, ()))
+    filtrado["objetos"] = [
+        {k: obj[k] for k in chaves_obj if k in obj}
+        for obj in dados.get("objetos", [])
+        if personagens is None or obj["personagem"] in personagens
+    ]
+
+    for campo, chaves in CAMPOS_SNAPSHOT.items():
+        if campos is None or campo in campos:
+            for k in chaves:
+                if k in dados:
+                    filtrado[k] = dados[k]
+    return filtrado
 
+def json_para(dados, filtro):
+    """ JSON do snapshot para um filtro, serializado uma vez por frame e filtro. """
+    global CACHE_FRAME_ID
+    frame_id = dados.get("frame_id")
+    if frame_id != CACHE_FRAME_ID:
+        # Frame novo: nenhuma entrada antiga serve mais (filtros abandonados não se acumulam)
+        CACHE_JSON.clear()
+        CACHE_FRAME_ID = frame_id
+    json_data = CACHE_JSON.get(filtro)
+    if json_data is None:
+        if filtro is None:
+            json_data = json.dumps(dados)
+        else:
+            json_data = json.dumps(filtrar_snapshot(dados, filtro[0], filtro[1]))
+        CACHE_JSON[filtro] = json_data
+    return json_data
+
+async def receber_assinaturas(websocket, cliente):
+    """ Lê mensagens do cliente: assinatura (filtro da conexão), pedido de histórico ou de rodada. """
+    async for mensagem in websocket:
+        try:
+            pedido = json.loads(mensagem)
+            if not isinstance(pedido, dict):
+                raise TypeError("a mensagem deve ser um objeto JSON")
+            if "historico" in pedido:
+                if not isinstance(pedido["historico"], dict):
+                    raise TypeError("'historico' deve ser um objeto")
+                await responder_historico(websocket, pedido["historico"])
+                continue
+            if "rodada" in pedido:
+                pedir_rodada(pedido["rodada"])
+                continue
+            assinatura = pedido["assinatura"]
+            cliente["filtro"] = chave_assinatura(assinatura)
+            print(f"[WS] Assinatura: {cliente['filtro']}")
+        except (ValueError, KeyError, TypeError, AttributeError, ZeroDivisionError) as e:
+            # Nunca deixa uma mensagem malformada encerrar a leitura da conexão
+            print(f"[WS] Mensagem inválida ignorada: {e}")
+
+def pedir_rodada(acao):
+    """ Agenda o início/fim de rodada para a thread de detecção (que é quem grava). """
+    global PEDIDO_RODADA
+    if acao not in ("iniciar", "encerrar"):
+        raise ValueError(f"ação de rodada desconhecida: {acao!r}")
+    if not PERSISTENCIA:
+        print("[WS] Pedido de rodada ignorado: registro de partidas desligado (BANCO_PARTIDAS = None).")
+        return
+    PEDIDO_RODADA = acao
+    print(f"[WS] Pedido de rodada: {acao}")
+
+async def responder_historico(websocket, pedido):
+    """ Envia as últimas poses pedidas numa única mensagem {"historico": {...}}. """
+    if HISTORICO is None:
+        await websocket.send(json.dumps({"historico": None}))
+        return
+    resposta = HISTORICO.consultar(pedido.get("personagens"), pedido.get("segundos"), pedido.get("periodo"))
+    await websocket.send(json.dumps({"historico": resposta}))
+    n = sum(len(p["t"]) for p in resposta["personagens"].values())
+    print(f"[WS] Histórico enviado: {n} poses de {len(resposta['personagens'])} personagens.")
 
 async def websocket_handler(websocket, path):
     """ Handler para cada conexão WebSocket. """
     print(f"[WS] Nova conexão estabelecida.")
     global CARROS_DETECTADOS
 
+    cliente = {"filtro": None}
+    leitor = asyncio.ensure_future(receber_assinaturas(websocket, cliente))
+    M_CLIENTES.inc()
     try:
         while True:
+            evento = EVENTO_ENVIO # Antes do snapshot: uma troca durante o envio não se perde
             data_to_send = CARROS_DETECTADOS 
-            if data_to_send:
-                json_data = json.dumps(data_to_send)
-                await websocket.send(json_data)
+            filtro = cliente["filtro"]
+            if data_to_send and websocket.transport.get_write_buffer_size() > LIMITE_BUFFER_ENVIO:
+                # Cliente lento: não empilha mais um snapshot no buffer; ele recebe o próximo
+                M_DESCARTES.inc()
+            elif data_to_send:
+                t_envio = time.perf_counter()
+                await websocket.send(json_para(data_to_send, filtro[:2] if filtro else None))
+                M_ENVIO.observar(time.perf_counter() - t_envio)
+                M_ENVIOS.inc()
+                if RASTREADOR:
+                    RASTREADOR.evento(data_to_send.get("frame_id"), "envio")
             
-            await asyncio.sleep(0.1) 
+            # Dorme o período do cliente, ou menos se o estado do jogo mudar (pausa)
+            try:
+                await asyncio.wait_for(evento.wait(), filtro[2] if filtro else PERIODO_ENVIO)
+            except asyncio.TimeoutError:
+                pass
             
     except Exception as e:
         print(f"[WS] Conexão fechada ou erro: {e}")
     finally:
-        pass
+        M_CLIENTES.dec()
+        leitor.cancel()
+
 
+def acordar_clientes():
+    """ Faz todos os handlers enviarem já o snapshot atual (chamado de qualquer thread). """
+    def trocar_evento():
+        global EVENTO_ENVIO
+        evento, EVENTO_ENVIO = EVENTO_ENVIO, asyncio.Event()
+        evento.set()
+    if LOOP_ASYNC and LOOP_ASYNC.is_running():
+        LOOP_ASYNC.call_soon_threadsafe(trocar_evento)
 
 def start_websocket_server():
     """ Inicia o servidor WebSocket. """
@@ -283,135 +733,461 @@ def start_websocket_server():
 # 4. Loop Principal (SÍNCRONO - OpenCV)
 # ----------------------------------------------------------------------
 
+def detectar_camera(frame_arena, t_captura, estado):
+    """
+    Detecção completa de um frame (personagens e, no Rocket League, a bola).
+
+    estado: {'cores', 'suavizadas', 'bola', 'buffers', 'escala', 'morfologia',
+    'parada', 'fator', 'resolucao_captura'} da câmera. Com 'parada', o sinal de
+    parada é procurado no HSV do ROI logo após a detecção, na mesma thread que
+    escreve esse buffer.
+    Com 'escala' < 1 a detecção roda numa cópia reduzida (buffer reaproveitado)
+    e as coordenadas voltam para a escala do frame_arena.
+    Retorna os objetos em coordenadas do ROI. Com MOSTRAR_IMAGEM, as detecções
+    são desenhadas no próprio frame_arena (uma visão do frame capturado, que
+    depois só é usado para exibição): sem cópia do frame nem escrita de volta.
+    """
+    cores = estado.get('cores') or CORES_CONFIG
+    escala = estado.get('escala', 1.0)
+    frame_deteccao = frame_arena
+    if escala != 1.0:
+        h, w = frame_arena.shape[:2]
+        tamanho = (int(w * escala), int(h * escala))
+        reduzido = estado.get('reduzido')
+        if reduzido is None or reduzido.shape[1::-1] != tamanho:
+            reduzido = estado['reduzido'] = np.empty((tamanho[1], tamanho[0], 3), np.uint8)
+        frame_deteccao = cv2.resize(frame_arena, tamanho, dst=reduzido, interpolation=cv2.INTER_AREA)
+
+    objetos = processar_frame(frame_deteccao, cores, estado.get('suavizadas'),
+                              buffers_para(estado, frame_deteccao, cores),
+                              estado.get('morfologia', True))
+
+    if estado.get('parada'):
+        if 'fator' not in estado:
+            # Várias câmeras: fator pela resolução que a câmera aceitou, como em aplicar_nivel
+            estado['fator'] = estado.get('resolucao_captura', RESOLUCAO_BASE)[0] / RESOLUCAO_BASE[0] or 1.0
+        checar_parada(t_captura, hsv=estado['buffers'].hsv, escala_hsv=estado.get('fator', 1.0) * escala)
+
+    rastreador_bola = estado.get('bola')
+    if rastreador_bola:
+        t_bola = time.perf_counter()
+        bola_arena = rastreador_bola.atualizar(frame_deteccao, t_captura)
+        M_BOLA.observar(time.perf_counter() - t_bola)
+        if bola_arena:
+            vx, vy = bola_arena['vx'], bola_arena['vy']
+            objetos.append({
+                "personagem": "bola",
+                "x_arena": bola_arena['x'],
+                "y_arena": bola_arena['y'],
+                "angulo_graus": round(float(np.degrees(np.arctan2(vy, vx))), 2) % 360,
+                "vx": vx, # px/s
+                "vy": vy
+            })
+
+    for obj in objetos:
+        obj['x_arena'] /= escala
+        obj['y_arena'] /= escala
+        if 'vx' in obj:
+            obj['vx'] = round(obj['vx'] / escala, 1)
+            obj['vy'] = round(obj['vy'] / escala, 1)
+        if 'caixa' in obj and escala != 1.0:
+            (cx, cy), (cw, ch), ang = obj['caixa']
+            obj['caixa'] = ((cx / escala, cy / escala), (cw / escala, ch / escala), ang)
+
+    if MOSTRAR_IMAGEM:
+        desenhar_deteccoes(frame_arena, objetos)
+    return objetos
+
+def publicar_deteccoes(frame_id, t_captura, objetos_globais, qualidade=None):
+    """
+    Aplica as regras do jogo (gols, zonas, colisões) aos objetos em coordenadas
+    globais e publica o snapshot para o WebSocket (com o nível do governador, se houver).
+
+    Retorna:
+        tuple: (status_zonas, colisoes)
+    """
+    global CARROS_DETECTADOS, ULTIMO_GOL, PAUSADO_GOL, ESTADO_PUBLICADO
+    t_regras = time.perf_counter()
+
+    pacman_pos_global = None
+    bola_pos_global = None
+    for obj in objetos_globais:
+        # 1. Obter a posição global do Pac-Man (e da bola)
+        if 'pac-man' in obj['personagem']:
+            pacman_pos_global = (obj['x_global'], obj['y_global'])
+        elif obj['personagem'] == 'bola':
+            bola_pos_global = (obj['x_global'], obj['y_global'])
+
+    # 1b. GOLS (Rocket League): cruzamento da trajetória da bola com as áreas de gol
+    gol = None
+    if JUIZ_GOLS:
+        gol = JUIZ_GOLS.atualizar(bola_pos_global)
+        if gol:
+            ULTIMO_GOL = {"gol": gol, "frame_id": frame_id, "t": round(t_captura, 4)}
+            PAUSADO_GOL = True
+            print(f"!!! GOL em {gol} !!! Placar: {JUIZ_GOLS.placar} (ESPAÇO para continuar)")
+
+    # 2. CHECAR ZONAS
+    status_zonas = checar_zonas(pacman_pos_global, ZONA_GATILHO_COORDS)
+
+    # 3. Empacotar TUDO para o WebSocket
+    dados_websocket = {
+        "frame_id": frame_id,
+        "t_captura": round(t_captura, 4),
+        "objetos": objetos_globais,
+        "zonas": status_zonas
+    }
+    if qualidade:
+        dados_websocket["qualidade"] = qualidade
+    if JUIZ_GOLS:
+        dados_websocket["placar"] = JUIZ_GOLS.placar
+        dados_websocket["ultimo_gol"] = ULTIMO_GOL
+    parada = bool(DETECTOR_PARADA and DETECTOR_PARADA.ativo)
+    estado_jogo = {"paused": PAUSADO_GOL or parada}
+    if DETECTOR_PARADA:
+        estado_jogo["parada"] = parada
+    dados_websocket["estado_jogo"] = estado_jogo
+
+    # Atualiza a variável global para o WebSocket
+    CARROS_DETECTADOS = dados_websocket
+    if estado_jogo != ESTADO_PUBLICADO:
+        # Pausa/retomada não espera o período de envio de cada cliente
+        ESTADO_PUBLICADO = estado_jogo
+        acordar_clientes()
+    if HISTORICO:
+        HISTORICO.registrar(t_captura, objetos_globais)
+    if RASTREADOR:
+        RASTREADOR.evento(frame_id, "captura", t_captura)
+        RASTREADOR.evento(frame_id, "processado")
+
+    # 4. CHECAR COLISÕES (usa a lista de objetos, não o dicionário empacotado)
+    colisoes = checar_colisoes(objetos_globais)
+    M_REGRAS.observar(time.perf_counter() - t_regras)
+    if colisoes:
+        M_COLISOES.inc()
+        print(f"!!! COLISÃO DETECTADA: Pac-Man tocou em {', '.join(colisoes)} !!!")
+        # Opcional: Enviar um alerta de colisão via WebSocket ou mudar o estado do jogo
+
+    if PERSISTENCIA:
+        registrar_partida(frame_id, t_captura, objetos_globais, status_zonas, colisoes, gol)
+
+    return status_zonas, colisoes
+
+def registrar_partida(frame_id, t_captura, objetos_globais, status_zonas, colisoes, gol):
+    """ Envia à persistência só as mudanças (início de colisão, entrada em zona, gol) e a trajetória. """
+    global COLISOES_ANTERIORES, ZONAS_ANTERIORES, PEDIDO_RODADA
+
+    pedido, PEDIDO_RODADA = PEDIDO_RODADA, None
+    if pedido == "iniciar":
+        PERSISTENCIA.iniciar_rodada(MODO_JOGO, DURACAO_RODADA.get(MODO_JOGO, 180), t_captura)
+    elif pedido == "encerrar":
+        PERSISTENCIA.encerrar_rodada(t_captura)
+
+    if PERSISTENCIA.rodada is not None and PERSISTENCIA.tempo_restante(t_captura) <= 0:
+        PERSISTENCIA.encerrar_rodada(t_captura)
+
+    novas = [f for f in colisoes
+             if t_captura - COLISOES_ANTERIORES.get(f, float("-inf")) > TEMPO_FORA_CONTATO]
+    for fantasma in colisoes:
+        COLISOES_ANTERIORES[fantasma] = t_captura
+    restante = PERSISTENCIA.tempo_restante(t_captura)
+    for fantasma in novas:
+        PERSISTENCIA.evento("colisao", t_captura, frame_id, fantasma, "pac-man")
+        if restante > 0:
+            PERSISTENCIA.pontuar(fantasma, round(restante), "captura_pacman", t_captura)
+    if novas and restante > 0:
+        # Captura: os pontos são o tempo restante, então a rodada acaba aqui
+        print(f"Pac-Man capturado por {', '.join(novas)}: +{round(restante)} pts. Rodada encerrada.")
+        PERSISTENCIA.encerrar_rodada(t_captura)
+
+    for zona, ativa in status_zonas.items():
+        if ativa and not ZONAS_ANTERIORES.get(zona, False):
+            PERSISTENCIA.evento("zona", t_captura, frame_id, "pac-man", zona)
+    ZONAS_ANTERIORES = status_zonas
+
+    if gol:
+        PERSISTENCIA.evento("gol", t_captura, frame_id, "bola", gol, dict(JUIZ_GOLS.placar))
+        if PERSISTENCIA.rodada is not None:
+            PERSISTENCIA.pontuar(gol, 1, "gol", t_captura)
+
+    if PERSISTENCIA.rodada is not None:
+        PERSISTENCIA.amostrar_trajetoria(t_captura, frame_id, objetos_globais)
+
+def checar_parada(t_captura, frame=None, hsv=None, escala_hsv=1.0):
+    """ Verifica o sinal de parada (no máximo a cada PERIODO_PARADA) e registra as mudanças. """
+    if not DETECTOR_PARADA or not DETECTOR_PARADA.verificar(t_captura, frame, hsv, escala_hsv):
+        return
+    M_PARADA.set(int(DETECTOR_PARADA.ativo))
+    print("!!! SINAL DE PARADA: jogo pausado !!!" if DETECTOR_PARADA.ativo else "Sinal de parada removido: jogo retomado.")
+    if PERSISTENCIA:
+        PERSISTENCIA.evento("parada" if DETECTOR_PARADA.ativo else "retomada", t_captura)
+
+def medir_frame(t_captura, t_anterior, t_leitura, ok=True):
+    """ Atualiza fps, frames perdidos e o tempo de captura (t_leitura: duração do cap.read). """
+    M_CAPTURA.observar(t_leitura)
+    if not ok:
+        M_FRAMES_PERDIDOS.inc()
+        return
+    M_FRAMES.inc()
+    if t_anterior is None:
+        return
+    dt = t_captura - t_anterior
+    if dt > 1.5 / FPS_CAMERA:
+        M_FRAMES_PERDIDOS.inc(int(round(dt * FPS_CAMERA)) - 1)
+    if dt > 0:
+        M_FPS.set(M_FPS.valor + PESO_MEDIA_METRICAS * (1.0 / dt - M_FPS.valor))
+
+def tratar_teclas(wait_delay):
+    """ Processa o teclado da janela OpenCV. Retorna False quando o usuário pede para sair. """
+    global PAUSADO_GOL
+    tecla = cv2.waitKey(wait_delay) & 0xFF
+    if tecla == ord('q'):
+        return False
+    if tecla == ord(' ') and PAUSADO_GOL:
+        PAUSADO_GOL = False
+        print("Jogo retomado após o gol.")
+    if tecla == ord('r') and PERSISTENCIA:
+        PERSISTENCIA.iniciar_rodada(MODO_JOGO, DURACAO_RODADA.get(MODO_JOGO, 180))
+    return True
+
+def aplicar_nivel(cap, nivel, estado_camera, roi_base):
+    """
+    Aplica um nível do governador: resolução de captura, escala e modo de detecção.
+
+    Retorna:
+        tuple: (fator de captura em relação a RESOLUCAO_BASE, ROI na resolução de captura)
+    """
+    w, h = nivel['resolucao']
+    if (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) != (w, h):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+    fator = cap.get(cv2.CAP_PROP_FRAME_WIDTH) / RESOLUCAO_BASE[0] or 1.0 # A câmera pode recusar a resolução
+    roi = tuple(int(round(v * fator)) for v in roi_base)
+
+    estado_camera['escala'] = nivel['escala']
+    estado_camera['morfologia'] = nivel['morfologia']
+    # Posições suavizadas e rastreamento da bola estão na escala antiga: recomeçam
+    for nome in estado_camera['suavizadas']:
+        estado_camera['suavizadas'][nome] = None
+    if estado_camera['bola']:
+        estado_camera['bola'].ajustar_escala(nivel['escala'])
+    estado_camera['fator'] = fator
+    return fator, roi
+
 def opencv_loop(loop, roi_coords):
-    global CARROS_DETECTADOS # Renomeada para OBJETOS_DETECTADOS para clareza
-    global CARROS_DETECTADOS, ZONA_GATILHO_COORDS # Incluir ZONA_GATILHO_COORDS
-    cap = cv2.VideoCapture(1, cv2.CAP_DSHOW)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-    cap.set(cv2.CAP_PROP_FPS, 30)
+    cap = captura.abrir_camera(INDICE_CAMERA, RESOLUCAO_BASE, FPS_CAMERA, CAMERA_CONFIG)
     
     if not cap.isOpened():
         print("Erro fatal: Câmera não pôde ser aberta.")
         sys.exit()
 
-    x_roi, y_roi, w_roi, h_roi = roi_coords
-    
     wait_delay = 1 if MOSTRAR_IMAGEM else 2 
+    frame_id = 0
+    estado_camera = {'cores': CORES_CONFIG, 'suavizadas': LAST_SMOOTHED_POSITIONS, 'bola': RASTREADOR_BOLA,
+                     'parada': PARADA_NO_ROI}
+    contador_alocacoes = ContadorAlocacoes() if MEDIR_ALOCACOES else None
+    frame_original = None
+
+    t_anterior = None
+    gov = governador.Governador(ORCAMENTO_FRAME) if USAR_GOVERNADOR else None
+    caixa_preta = gravador.GravadorVoo(GRAVADOR_PASTA, {"Cores": CORES_CONFIG, "ROI": roi_coords},
+                                       LIMITE_FRAME_LENTO) if GRAVADOR_PASTA else None
+    if gov:
+        fator, (x_roi, y_roi, w_roi, h_roi) = aplicar_nivel(cap, gov.nivel, estado_camera, roi_coords)
+    else:
+        fator, (x_roi, y_roi, w_roi, h_roi) = 1.0, roi_coords
     
     while cap.isOpened():
-        ret, frame_original = cap.read()
+        t_leitura = time.perf_counter()
+        ret, frame_original = cap.read(frame_original) # Reaproveita o buffer do frame anterior
+        t_captura = time.time()
+        medir_frame(t_captura, t_anterior, time.perf_counter() - t_leitura, ret)
         if not ret:
             break
+        frame_id += 1
+        t_anterior = t_captura
             
-        # ... (Checagem de cor de parada) ...
+        if not PARADA_NO_ROI:
+            checar_parada(t_captura, frame=frame_original)
 
         frame_arena = frame_original[y_roi : y_roi + h_roi, x_roi : x_roi + w_roi]
         
-        frame_processado_arena, objetos_detectados = processar_frame(frame_arena)
+        if caixa_preta:
+            t_frame = caixa_preta.inicio_frame(frame_arena)
+        objetos_detectados = detectar_camera(frame_arena, t_captura, estado_camera)
+        t_deteccao = time.perf_counter()
         
         # --- ATUALIZAÇÃO GLOBAL E FILTRADA ---
+        # (coordenadas publicadas sempre na RESOLUCAO_BASE, qualquer que seja a captura)
         dados_filtrados_e_globais = []
-        pacman_pos_global = None
         
         for obj in objetos_detectados:
-            x_global = obj['x_arena'] + x_roi
-            y_global = obj['y_arena'] + y_roi
-            
-            dados_filtrados_e_globais.append({
+            global_obj = {
                 "personagem": obj['personagem'],
-                "x_global": x_global, 
-                "y_global": y_global,
+                "x_global": int((obj['x_arena'] + x_roi) / fator), 
+                "y_global": int((obj['y_arena'] + y_roi) / fator),
                 "angulo_graus": obj['angulo_graus']
-            })
-            
-            # 1. Obter a posição global do Pac-Man
-            if 'pac-man' in obj['personagem']:
-                pacman_pos_global = (x_global, y_global)
+            }
+            if 'vx' in obj:
+                global_obj["vx"], global_obj["vy"] = round(obj['vx'] / fator, 1), round(obj['vy'] / fator, 1)
+            dados_filtrados_e_globais.append(global_obj)
 
-        # 2. CHECAR ZONAS
-        status_zonas = checar_zonas(pacman_pos_global, ZONA_GATILHO_COORDS)
-        
-        # 3. Empacotar TUDO para o WebSocket
-        dados_websocket = {
-            "objetos": dados_filtrados_e_globais,
-            "zonas": status_zonas
-        }
-        
-        # Atualiza a variável global para o WebSocket
-        CARROS_DETECTADOS = dados_websocket
-        
-        # 4. CHECAR COLISÕES (usa a lista de objetos, não o dicionário empacotado)
-        colisoes = checar_colisoes(dados_filtrados_e_globais)
+        status_zonas, colisoes = publicar_deteccoes(frame_id, t_captura, dados_filtrados_e_globais,
+                                                    gov.publicar() if gov else None)
+        if caixa_preta:
+            etapas = {"deteccao": t_deteccao - t_frame, "publicacao": time.perf_counter() - t_deteccao}
+            caixa_preta.fim_frame(t_frame, frame_id, etapas, estado_camera['buffers'].contornos)
+        M_TOTAL.observar(time.time() - t_captura)
+        if gov and gov.registrar(time.time() - t_captura):
+            fator, (x_roi, y_roi, w_roi, h_roi) = aplicar_nivel(cap, gov.nivel, estado_camera, roi_coords)
 
-        if colisoes:
-            print(f"!!! COLISÃO DETECTADA: Pac-Man tocou em {', '.join(colisoes)} !!!")
-            # Opcional: Enviar um alerta de colisão via WebSocket ou mudar o estado do jogo
-            
-            # Desenha um círculo de alerta no frame original (para colisão)
-            if MOSTRAR_IMAGEM:
+        # --- VISUALIZAÇÃO --- (O restante do loop de visualização permanece o mesmo)
+        if MOSTRAR_IMAGEM:
+            cv2.rectangle(frame_original, (x_roi, y_roi), (x_roi + w_roi, y_roi + h_roi), (255, 255, 0), 3)
+
+            if RASTREADOR_BOLA and RASTREADOR_BOLA.janela:
+                e = estado_camera.get('escala', 1.0)
+                bx0, by0, bx1, by1 = (int(v / e) for v in RASTREADOR_BOLA.janela)
+                cv2.rectangle(frame_original, (bx0 + x_roi, by0 + y_roi), (bx1 + x_roi, by1 + y_roi), (0, 165, 255), 1)
+
+        frame_exibicao = frame_original
+        if MOSTRAR_IMAGEM:
+            if fator != 1.0:
+                # Zonas, gols e nomes estão na resolução base
+                frame_exibicao = cv2.resize(frame_original, RESOLUCAO_BASE)
+
+            # Desenha um círculo de alerta no frame (para colisão)
+            if colisoes:
                  for obj in dados_filtrados_e_globais:
                      if obj['personagem'] == 'pac-man':
                          # Desenha um grande círculo vermelho no Pac-Man em caso de colisão
-                         cv2.circle(frame_original, (obj['x_global'], obj['y_global']), 
+                         cv2.circle(frame_exibicao, (obj['x_global'], obj['y_global']), 
                                     RAIO_PERSONAGEM_PIXELS + 10, (0, 0, 255), 3)
 
+            desenhar_sobreposicao(frame_exibicao, dados_filtrados_e_globais, status_zonas)
 
-        # --- VISUALIZAÇÃO --- (O restante do loop de visualização permanece o mesmo)
-        if MOSTRAR_IMAGEM:
-            
-            objetos_para_desenho = CARROS_DETECTADOS.get("objetos", [])
+        cv2.imshow('Detecção de Personagens (Websocket ON)', frame_exibicao)
+        if contador_alocacoes:
+            contador_alocacoes.frame()
+        
+        if not tratar_teclas(wait_delay):
+            break
 
-            frame_original[y_roi : y_roi + h_roi, x_roi : x_roi + w_roi] = frame_processado_arena
-            cv2.rectangle(frame_original, (x_roi, y_roi), (x_roi + w_roi, y_roi + h_roi), (255, 255, 0), 3)
+    cap.release()
+    cv2.destroyAllWindows()
+    # Para o loop assíncrono para garantir o fechamento limpo
+    if loop.is_running():
+        loop.stop()
+    print("Loop OpenCV encerrado. Encerrando servidor WebSocket.")
 
-            for obj in objetos_para_desenho:
-                 cv2.putText(frame_original, 
-                            f"{obj['personagem']}", 
-                            (obj['x_global'] - 50, obj['y_global'] - 20), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-            
-            # Adiciona uma legenda para o raio de colisão (opcional)
-            cv2.putText(frame_original, 
-                        f"Raio Colisao: {RAIO_PERSONAGEM_PIXELS}px", 
-                        (frame_original.shape[1] - 200, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-
-            cv2.imshow('Detecção de Personagens (Websocket ON)', frame_original)
-
-            for nome_zona, [zx, zy, zw, zh] in ZONA_GATILHO_COORDS.items():
-                cor_zona = (255, 0, 0) # Cor Padrão: Azul
-                
-                # Se a zona estiver ativa, muda a cor para verde
-                if status_zonas.get(nome_zona, False):
-                     cor_zona = (0, 255, 0) # Ativa: Verde
-                     POWER_UP = True
-                     print(f"Powerup: {POWER_UP}")
-                     
-                cv2.rectangle(frame_original, (zx, zy), (zx + zw, zy + zh), cor_zona, 2)
-                cv2.putText(frame_original, nome_zona.upper(), (zx, zy - 5), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, cor_zona, 1)
-        
-        y_offset = frame_original.shape[0] - 80
-        for i, (nome, status) in enumerate(status_zonas.items()):
-                cor_texto = (0, 255, 0) if status else (0, 0, 255)
-                cv2.putText(frame_original, 
-                        f"{nome}: {status}", 
-                        (frame_original.shape[1] - 250, y_offset + i * 20), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, cor_texto, 1)
+def desenhar_sobreposicao(frame, objetos_globais, status_zonas):
+    """ Desenha nomes, gols, zonas e legendas (coordenadas globais) sobre o frame. """
+    global POWER_UP
+    if JUIZ_GOLS:
+        for nome_gol, [gx, gy, gw, gh] in JUIZ_GOLS.gols.items():
+            cv2.rectangle(frame, (gx, gy), (gx + gw, gy + gh), (0, 0, 255), 2)
+            cv2.putText(frame, f"{nome_gol}: {JUIZ_GOLS.placar[nome_gol]}", (gx, gy - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
 
+    for obj in objetos_globais:
+         cv2.putText(frame, 
+                    f"{obj['personagem']}", 
+                    (obj['x_global'] - 50, obj['y_global'] - 20), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
+    
+    # Adiciona uma legenda para o raio de colisão (opcional)
+    cv2.putText(frame, 
+                f"Raio Colisao: {RAIO_PERSONAGEM_PIXELS}px", 
+                (frame.shape[1] - 200, 30), 
+                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
 
-        cv2.imshow('Detecção de Personagens (Websocket ON)', frame_original)
+    for nome_zona, [zx, zy, zw, zh] in ZONA_GATILHO_COORDS.items():
+        cor_zona = (255, 0, 0) # Cor Padrão: Azul
         
-        if cv2.waitKey(wait_delay) & 0xFF == ord('q'):
+        # Se a zona estiver ativa, muda a cor para verde
+        if status_zonas.get(nome_zona, False):
+             cor_zona = (0, 255, 0) # Ativa: Verde
+             POWER_UP = True
+             print(f"Powerup: {POWER_UP}")
+             
+        cv2.rectangle(frame, (zx, zy), (zx + zw, zy + zh), cor_zona, 2)
+        cv2.putText(frame, nome_zona.upper(), (zx, zy - 5), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, cor_zona, 1)
+
+    y_offset = frame.shape[0] - 80
+    for i, (nome, status) in enumerate(status_zonas.items()):
+            cor_texto = (0, 255, 0) if status else (0, 0, 255)
+            cv2.putText(frame, 
+                    f"{nome}: {status}", 
+                    (frame.shape[1] - 250, y_offset + i * 20), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, cor_texto, 1)
+
+def opencv_loop_multicamera(loop, cameras_config):
+    """
+    Uma thread por câmera (captura + detecção em paralelo); este loop funde a
+    leitura mais recente de cada câmera e publica um snapshot por novo frame.
+    """
+    condicao = threading.Condition()
+    cameras = []
+    for i, cfg in enumerate(cameras_config):
+        cores = dict(cfg.get('Cores', CORES_CONFIG)) # Calibração própria da câmera (opcional)
+        # Sinal de parada: só no ROI da 1ª câmera, dentro da thread dela
+        estado = {'cores': cores, 'suavizadas': {}, 'bola': None, 'parada': i == 0}
+        if CFG_BOLA:
+            estado['bola'] = bola.RastreadorBola(cores.pop('bola', CFG_BOLA))
+        cameras.append(multicamera.Camera(cfg, detectar_camera, condicao, estado, exibir=MOSTRAR_IMAGEM))
+    for camera in cameras:
+        camera.iniciar()
+
+    wait_delay = 1 if MOSTRAR_IMAGEM else 2
+    frame_id = 0
+    vistos = [0] * len(cameras)
+    # Visão fundida: nenhuma câmera vê a arena toda, então desenha num quadro da resolução base
+    arena = np.zeros((RESOLUCAO_BASE[1], RESOLUCAO_BASE[0], 3), np.uint8) if MOSTRAR_IMAGEM else None
+    contador_alocacoes = ContadorAlocacoes() if MEDIR_ALOCACOES else None
+
+    while any(c.rodando for c in cameras):
+        with condicao:
+            condicao.wait_for(lambda: any(c.contador != v for c, v in zip(cameras, vistos)), timeout=1.0)
+            vistos = [c.contador for c in cameras]
+            leituras = [c.leitura for c in cameras if c.leitura is not None]
+            if MOSTRAR_IMAGEM:
+                # Dentro do lock: a thread da câmera reescreve a cópia de exibição
+                for c in cameras:
+                    if c.frame is not None:
+                        cv2.imshow(f'Camera {c.indice} (Websocket ON)', c.frame)
+        if not leituras:
+            continue
+
+        # Fusão por instante: só entram leituras próximas da mais nova
+        t_mais_nova = max(t for t, _ in leituras)
+        usadas = [(t, objetos) for t, objetos in leituras if t_mais_nova - t <= multicamera.JANELA_FUSAO]
+        t_captura = min(t for t, _ in usadas)
+        objetos_globais = multicamera.fundir([objetos for _, objetos in usadas])
+
+        frame_id += 1
+        M_FRAMES.inc()
+        status_zonas, colisoes = publicar_deteccoes(frame_id, t_captura, objetos_globais)
+
+        if MOSTRAR_IMAGEM:
+            arena[:] = 0
+            for obj in objetos_globais:
+                cor = (0, 0, 255) if colisoes and obj['personagem'] == 'pac-man' else (255, 255, 255)
+                cv2.circle(arena, (obj['x_global'], obj['y_global']), RAIO_PERSONAGEM_PIXELS, cor, 2)
+            desenhar_sobreposicao(arena, objetos_globais, status_zonas)
+            cv2.imshow('Arena (fusao das cameras)', arena)
+
+        if contador_alocacoes:
+            contador_alocacoes.frame()
+        if not tratar_teclas(wait_delay):
             break
 
-    cap.release()
+    for camera in cameras:
+        camera.parar()
     cv2.destroyAllWindows()
-    # Para o loop assíncrono para garantir o fechamento limpo
     if loop.is_running():
         loop.stop()
-    print("Loop OpenCV encerrado. Encerrando servidor WebSocket.")
+    print("Loop OpenCV (várias câmeras) encerrado. Encerrando servidor WebSocket.")
 
 
 # ----------------------------------------------------------------------
@@ -423,11 +1199,24 @@ if __name__ == "__main__":
     if not ROI_COORDS:
         sys.exit() 
 
+    if RASTREIO_ARQUIVO:
+        RASTREADOR = rastreio.Rastreador(RASTREIO_ARQUIVO, "servidor")
+    if PORTA_METRICAS:
+        metricas.iniciar_servidor_http(REGISTRO, PORTA_METRICAS)
+    if BANCO_PARTIDAS:
+        PERSISTENCIA = persistencia.Persistencia(BANCO_PARTIDAS)
+    if DETECTAR_PARADA:
+        DETECTOR_PARADA = DetectorParada()
+
     loop = asyncio.get_event_loop()
+    LOOP_ASYNC = loop
     
     ws_server = loop.run_until_complete(start_websocket_server())
     
-    loop.run_in_executor(None, opencv_loop, loop, ROI_COORDS)
+    if CAMERAS_CONFIG:
+        loop.run_in_executor(None, opencv_loop_multicamera, loop, CAMERAS_CONFIG)
+    else:
+        loop.run_in_executor(None, opencv_loop, loop, ROI_COORDS)
     
     try:
         loop.run_forever()
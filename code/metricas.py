@@ -0,0 +1,159 @@
+# metricas.py - Métricas no formato de texto do Prometheus, sem dependências
+#
+# Contadores, medidores e histogramas são objetos simples em memória: no loop
+# de frames, registrar uma amostra é uma soma de inteiros (histograma: uma
+# busca binária nos limites). A formatação do texto só acontece quando alguém
+# lê o endpoint HTTP, numa thread própria.
+#
+# Uso:
+#     REGISTRO = Registro()
+#     FRAMES = REGISTRO.contador("mecathron_frames_total", "Frames capturados")
+#     ETAPA = REGISTRO.histograma("mecathron_etapa_segundos", "Tempo por etapa", rotulo="etapa")
+#     FRAMES.inc(); ETAPA.com("captura").observar(0.004)
+#     iniciar_servidor_http(REGISTRO, 9100)   # GET http://host:9100/metrics
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites padrão (segundos) para tempos de etapa: 0.5 ms a 1 s
+LIMITES_TEMPO = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Contador:
+    __slots__ = ("valor",)
+
+    def __init__(self):
+        self.valor = 0
+
+    def inc(self, n=1):
+        self.valor += n
+
+    def amostras(self, nome, rotulos):
+        yield nome, rotulos, self.valor
+
+
+class Medidor:
+    __slots__ = ("valor",)
+
+    def __init__(self):
+        self.valor = 0
+
+    def set(self, valor):
+        self.valor = valor
+
+    def inc(self, n=1):
+        self.valor += n
+
+    def dec(self, n=1):
+        self.valor -= n
+
+    def amostras(self, nome, rotulos):
+        yield nome, rotulos, self.valor
+
+
+class Histograma:
+    __slots__ = ("limites", "contagens", "soma", "n")
+
+    def __init__(self, limites=LIMITES_TEMPO):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1) # Último balde = +Inf
+        self.soma = 0.0
+        self.n = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.n += 1
+
+    def amostras(self, nome, rotulos):
+        acumulado = 0
+        for limite, c in zip(self.limites, self.contagens):
+            acumulado += c
+            yield nome + "_bucket", rotulos + (("le", repr(limite)),), acumulado
+        yield nome + "_bucket", rotulos + (("le", "+Inf"),), self.n
+        yield nome + "_sum", rotulos, self.soma
+        yield nome + "_count", rotulos, self.n
+
+
+class Familia:
+    """ Métrica com um rótulo (ex. personagem, etapa): um filho por valor do rótulo. """
+
+    def __init__(self, nome, tipo, ajuda, fabrica, rotulo):
+        self.nome = nome
+        self.tipo = tipo
+        self.ajuda = ajuda
+        self.fabrica = fabrica
+        self.rotulo = rotulo
+        self.filhos = {}
+
+    def com(self, valor):
+        filho = self.filhos.get(valor)
+        if filho is None:
+            filho = self.filhos[valor] = self.fabrica()
+        return filho
+
+    def amostras(self):
+        for valor, filho in list(self.filhos.items()):
+            yield from filho.amostras(self.nome, ((self.rotulo, str(valor)),))
+
+
+class Registro:
+    def __init__(self):
+        self.metricas = [] # (nome, tipo, ajuda, objeto)
+
+    def _registrar(self, nome, tipo, ajuda, fabrica, rotulo):
+        if rotulo:
+            metrica = Familia(nome, tipo, ajuda, fabrica, rotulo)
+        else:
+            metrica = fabrica()
+        self.metricas.append((nome, tipo, ajuda, metrica))
+        return metrica
+
+    def contador(self, nome, ajuda, rotulo=None):
+        return self._registrar(nome, "counter", ajuda, Contador, rotulo)
+
+    def medidor(self, nome, ajuda, rotulo=None):
+        return self._registrar(nome, "gauge", ajuda, Medidor, rotulo)
+
+    def histograma(self, nome, ajuda, rotulo=None, limites=LIMITES_TEMPO):
+        return self._registrar(nome, "histogram", ajuda, lambda: Histograma(limites), rotulo)
+
+    def texto(self):
+        """ Exposição no formato de texto do Prometheus (versão 0.0.4). """
+        linhas = []
+        for nome, tipo, ajuda, metrica in self.metricas:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            amostras = metrica.amostras() if isinstance(metrica, Familia) else metrica.amostras(nome, ())
+            for nome_amostra, rotulos, valor in amostras:
+                if rotulos:
+                    texto_rotulos = ",".join(f'{k}="{v}"' for k, v in rotulos)
+                    linhas.append(f"{nome_amostra}{{{texto_rotulos}}} {valor}")
+                else:
+                    linhas.append(f"{nome_amostra} {valor}")
+        return "\n".join(linhas) + "\n"
+
+
+def iniciar_servidor_http(registro, porta, host="0.0.0.0"):
+    """ Serve GET /metrics numa thread daemon. Retorna o servidor (para shutdown). """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            corpo = registro.texto().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass # Sem uma linha no console a cada coleta
+
+    servidor = ThreadingHTTPServer((host, porta), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    print(f"[MÉTRICAS] Endpoint em http://{host}:{porta}/metrics")
+    return servidor
@@ -0,0 +1,172 @@
+# multicamera.py - Captura com várias câmeras e fusão em coordenadas globais
+#
+# Cada câmera roda em uma thread própria (captura + detecção; o OpenCV libera
+# o GIL nas operações pesadas) com ROI, resolução, fps e cores próprios.
+# As detecções são levadas ao sistema de coordenadas comum da arena por uma
+# homografia 3x3 ("Homografia") ou por um deslocamento simples ("Deslocamento").
+#
+# A fusão usa a leitura mais recente de cada câmera, descarta leituras mais
+# velhas que JANELA_FUSAO e, nas áreas de sobreposição, junta as detecções do
+# mesmo personagem (média ponderada pela distância até a borda do ROI: a borda
+# é onde a lente distorce mais e onde o robô pode estar cortado).
+#
+# Configuração (bloco "Cameras" do arquivo da arena):
+#   "Cameras": [
+#       {"Indice": 0, "ROI": [x, y, w, h], "Resolucao": [1280, 720], "FPS": 60,
+#        "Deslocamento": [0, 0], "Camera": {"exposicao": 150, "balanco_branco": 4500}},
+#       {"Indice": 1, "ROI": [...], "Homografia": [[...], [...], [...]], "Cores": {...}}
+#   ]
+import math
+import time
+import threading
+
+import numpy as np
+
+import captura
+
+# --- PARÂMETROS PADRÃO ---
+RESOLUCAO_PADRAO = (1280, 720)
+FPS_PADRAO = 60
+JANELA_FUSAO = 0.05     # Leituras mais velhas que isso (s) em relação à mais nova ficam fora do frame fundido
+DIST_DUPLICATA = 80     # Detecções do mesmo personagem a menos disso (px) são o mesmo robô
+DT_VELOCIDADE = 0.1     # Passo (s) usado para levar vetores de velocidade pela homografia
+
+
+def matriz_camera(cfg):
+    """ Homografia 3x3 frame da câmera -> coordenadas globais da arena. """
+    if 'Homografia' in cfg:
+        return np.array(cfg['Homografia'], dtype=np.float64)
+    dx, dy = cfg.get('Deslocamento', (0, 0))
+    return np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]], dtype=np.float64)
+
+
+def transformar(matriz, x, y):
+    gx, gy, gw = matriz @ (x, y, 1.0)
+    return float(gx / gw), float(gy / gw)
+
+
+class Camera:
+    """
+    Captura e detecção de uma câmera em thread própria.
+
+    detectar(frame_arena, t_captura, estado) -> objetos em coordenadas do ROI
+    ('x_arena', 'y_arena', 'angulo_graus' e opcionalmente 'vx', 'vy'); pode
+    desenhar no próprio frame_arena. A cada frame, 'leitura' vira (t_captura,
+    objetos globais) e 'condicao' é notificada. Ao abrir a câmera, a resolução
+    que o driver aceitou vai para estado['resolucao_captura'].
+    """
+
+    def __init__(self, cfg, detectar, condicao, estado, exibir=False):
+        self.indice = cfg['Indice']
+        self.roi = tuple(cfg['ROI'])
+        self.resolucao = tuple(cfg.get('Resolucao', RESOLUCAO_PADRAO))
+        self.fps = cfg.get('FPS', FPS_PADRAO)
+        self.backend = cfg.get('Backend')         # None = nativo do sistema (ver captura.py)
+        self.cfg_camera = cfg.get('Camera', {})   # Formato, buffer, exposição, balanço de branco
+        self.matriz = matriz_camera(cfg)
+        self.detectar = detectar
+        self.condicao = condicao
+        self.estado = estado
+        self.exibir = exibir
+
+        self.leitura = None        # (t_captura, [objetos globais])
+        self.frame = None          # Último frame completo com o desenho da detecção (cópia para exibição)
+        self.contador = 0          # Frames processados (a fusão compara para saber se há novidade)
+        self.rodando = False
+        self.thread = None
+
+    def iniciar(self):
+        self.rodando = True
+        self.thread = threading.Thread(target=self._executar, daemon=True)
+        self.thread.start()
+
+    def parar(self):
+        self.rodando = False
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _executar(self):
+        cap = captura.abrir_camera(self.indice, self.resolucao, self.fps, self.cfg_camera, self.backend)
+        if not cap.isOpened():
+            print(f"[CAM {self.indice}] Erro: câmera não pôde ser aberta.")
+            self.rodando = False
+            return
+        self.estado['resolucao_captura'] = captura.formato_negociado(cap)['resolucao']
+
+        x_roi, y_roi, w_roi, h_roi = self.roi
+        frame = None
+        while self.rodando:
+            ret, frame = cap.read(frame) # Reaproveita o buffer do frame anterior
+            if not ret:
+                print(f"[CAM {self.indice}] Falha na leitura; câmera encerrada.")
+                break
+            t_captura = time.time()
+            frame_arena = frame[y_roi : y_roi + h_roi, x_roi : x_roi + w_roi]
+            objetos = self.detectar(frame_arena, t_captura, self.estado)
+            globais = [self._para_global(obj) for obj in objetos]
+
+            with self.condicao:
+                self.leitura = (t_captura, globais)
+                if self.exibir:
+                    # O buffer de captura é reaproveitado: a exibição recebe a sua própria cópia
+                    if self.frame is None or self.frame.shape != frame.shape:
+                        self.frame = frame.copy()
+                    else:
+                        np.copyto(self.frame, frame)
+                self.contador += 1
+                self.condicao.notify_all()
+
+        self.rodando = False
+        cap.release()
+
+    def _para_global(self, obj):
+        x_roi, y_roi, w_roi, h_roi = self.roi
+        xa, ya = obj['x_arena'], obj['y_arena']
+        x, y = xa + x_roi, ya + y_roi
+        gx, gy = transformar(self.matriz, x, y)
+
+        # Ângulo: convenção do servidor (anti-horário, Y para cima); leva o vetor de direção pela homografia
+        a = math.radians(obj['angulo_graus'])
+        hx, hy = transformar(self.matriz, x + 10 * math.cos(a), y - 10 * math.sin(a))
+        angulo = math.degrees(math.atan2(-(hy - gy), hx - gx)) % 360
+
+        glob = {
+            "personagem": obj['personagem'],
+            "x_global": gx,
+            "y_global": gy,
+            "angulo_graus": round(angulo, 2),
+            "_margem": min(xa, ya, w_roi - xa, h_roi - ya),
+        }
+        if 'vx' in obj:
+            vx, vy = transformar(self.matriz, x + obj['vx'] * DT_VELOCIDADE, y + obj['vy'] * DT_VELOCIDADE)
+            glob["vx"] = round((vx - gx) / DT_VELOCIDADE, 1)
+            glob["vy"] = round((vy - gy) / DT_VELOCIDADE, 1)
+        return glob
+
+
+def fundir(listas, dist_duplicata=DIST_DUPLICATA):
+    """
+    Junta as detecções de várias câmeras (listas de objetos globais) em uma só lista.
+
+    Por personagem, a detecção mais longe da borda do seu ROI é a referência;
+    as que estão a menos de dist_duplicata dela entram na média ponderada, as
+    demais (detecção falsa em outra câmera) são descartadas.
+    """
+    por_nome = {}
+    for objetos in listas:
+        for obj in objetos:
+            por_nome.setdefault(obj['personagem'], []).append(obj)
+
+    fundidos = []
+    for candidatos in por_nome.values():
+        melhor = max(candidatos, key=lambda o: o['_margem'])
+        iguais = [o for o in candidatos
+                  if math.hypot(o['x_global'] - melhor['x_global'], o['y_global'] - melhor['y_global']) <= dist_duplicata]
+        pesos = [max(o['_margem'], 1) for o in iguais]
+        total = sum(pesos)
+
+        obj = {k: v for k, v in melhor.items() if k != '_margem'}
+        obj['x_global'] = int(round(sum(o['x_global'] * p for o, p in zip(iguais, pesos)) / total))
+        obj['y_global'] = int(round(sum(o['y_global'] * p for o, p in zip(iguais, pesos)) / total))
+        fundidos.append(obj)
+    return fundidos
@@ -0,0 +1,219 @@
+# persistencia.py - Registro das partidas em SQLite (fora do loop de detecção)
+#
+# Rodadas, eventos (colisões, entradas em zonas, gols), pontos e amostras de
+# trajetória vão para um banco SQLite. Quem chama só enfileira uma tupla numa
+# fila limitada (put_nowait: se a fila encher, o registro é descartado e
+# contado, nunca bloqueia); uma thread escritora junta até TAMANHO_LOTE linhas
+# por transação.
+#
+# Consultas (pelo servidor ou pela linha de comando):
+#     python persistencia.py mecathron_partidas.db placar         # acumulado de todas as rodadas
+#     python persistencia.py mecathron_partidas.db rodadas
+#     python persistencia.py mecathron_partidas.db replay <rodada>
+import sys
+import json
+import time
+import queue
+import sqlite3
+import threading
+
+TAMANHO_FILA = 10000
+TAMANHO_LOTE = 500
+INTERVALO_ESCRITA = 0.5   # s máximos entre transações quando há pouco movimento
+PERIODO_TRAJETORIA = 0.2  # s entre amostras de trajetória gravadas
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS rodadas (
+    id INTEGER PRIMARY KEY, modo TEXT, inicio REAL, fim REAL, duracao_s REAL);
+CREATE TABLE IF NOT EXISTS eventos (
+    rodada INTEGER, t REAL, frame_id INTEGER, tipo TEXT, personagem TEXT, alvo TEXT, dados TEXT);
+CREATE TABLE IF NOT EXISTS pontos (
+    rodada INTEGER, t REAL, personagem TEXT, pontos REAL, motivo TEXT);
+CREATE TABLE IF NOT EXISTS trajetorias (
+    rodada INTEGER, t REAL, frame_id INTEGER, personagem TEXT, x REAL, y REAL, angulo REAL);
+CREATE INDEX IF NOT EXISTS eventos_rodada ON eventos (rodada, t);
+CREATE INDEX IF NOT EXISTS pontos_personagem ON pontos (personagem);
+CREATE INDEX IF NOT EXISTS trajetorias_rodada ON trajetorias (rodada, t);
+"""
+
+INSERCOES = {
+    "rodada_inicio": "INSERT INTO rodadas (id, modo, inicio, duracao_s) VALUES (?, ?, ?, ?)",
+    "rodada_fim": "UPDATE rodadas SET fim = ? WHERE id = ?",
+    "eventos": "INSERT INTO eventos VALUES (?, ?, ?, ?, ?, ?, ?)",
+    "pontos": "INSERT INTO pontos VALUES (?, ?, ?, ?, ?)",
+    "trajetorias": "INSERT INTO trajetorias VALUES (?, ?, ?, ?, ?, ?, ?)",
+}
+
+
+def conectar(arquivo):
+    conexao = sqlite3.connect(arquivo, check_same_thread=False)
+    conexao.execute("PRAGMA journal_mode=WAL") # Leituras não esperam a escritora
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+class Persistencia:
+    def __init__(self, arquivo, periodo_trajetoria=PERIODO_TRAJETORIA):
+        self.arquivo = arquivo
+        self.periodo_trajetoria = periodo_trajetoria
+        self.fila = queue.Queue(maxsize=TAMANHO_FILA)
+        self.descartados = 0
+
+        conexao = conectar(arquivo)
+        self.ultima_rodada = conexao.execute("SELECT COALESCE(MAX(id), 0) FROM rodadas").fetchone()[0]
+        conexao.close()
+        self.rodada = None        # Rodada em andamento (None = entre rodadas)
+        self.inicio_rodada = None
+        self.duracao_rodada = None
+        self.ultima_trajetoria = 0.0
+
+        threading.Thread(target=self._escritor, daemon=True).start()
+
+    # --- Registro (chamado pelo loop de detecção: nunca bloqueia) ---
+    def _enfileirar(self, tabela, linha):
+        try:
+            self.fila.put_nowait((tabela, linha))
+        except queue.Full:
+            self.descartados += 1
+
+    def iniciar_rodada(self, modo, duracao_s, t=None):
+        if self.rodada is not None:
+            self.encerrar_rodada(t)
+        t = time.time() if t is None else t
+        self.ultima_rodada += 1
+        self.rodada = self.ultima_rodada
+        self.inicio_rodada = t
+        self.duracao_rodada = duracao_s
+        self._enfileirar("rodada_inicio", (self.rodada, modo, t, duracao_s))
+        print(f"[PARTIDA] Rodada {self.rodada} iniciada ({modo}, {duracao_s:.0f} s).")
+        return self.rodada
+
+    def encerrar_rodada(self, t=None):
+        if self.rodada is None:
+            return
+        self._enfileirar("rodada_fim", (time.time() if t is None else t, self.rodada))
+        print(f"[PARTIDA] Rodada {self.rodada} encerrada.")
+        self.rodada = None
+
+    def tempo_restante(self, t):
+        """ Segundos restantes da rodada em andamento (0 fora de rodada). """
+        if self.rodada is None:
+            return 0.0
+        return max(0.0, self.duracao_rodada - (t - self.inicio_rodada))
+
+    def evento(self, tipo, t, frame_id=None, personagem=None, alvo=None, dados=None):
+        self._enfileirar("eventos", (self.rodada, t, frame_id, tipo, personagem, alvo,
+                                     json.dumps(dados) if dados is not None else None))
+
+    def pontuar(self, personagem, pontos, motivo, t):
+        self._enfileirar("pontos", (self.rodada, t, personagem, pontos, motivo))
+
+    def amostrar_trajetoria(self, t, frame_id, objetos):
+        """ Grava as posições no máximo uma vez a cada periodo_trajetoria. """
+        if t - self.ultima_trajetoria < self.periodo_trajetoria:
+            return
+        self.ultima_trajetoria = t
+        for obj in objetos:
+            self._enfileirar("trajetorias", (self.rodada, t, frame_id, obj["personagem"],
+                                             obj["x_global"], obj["y_global"], obj.get("angulo_graus")))
+
+    # --- Escrita em lotes ---
+    def _escritor(self):
+        conexao = conectar(self.arquivo)
+        while True:
+            try:
+                lote = [self.fila.get(timeout=INTERVALO_ESCRITA)]
+            except queue.Empty:
+                continue
+            while len(lote) < TAMANHO_LOTE:
+                try:
+                    lote.append(self.fila.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conexao:
+                    # Mantém a ordem entre tabelas (ex. início de rodada antes dos seus eventos)
+                    for tabela, linha in lote:
+                        conexao.execute(INSERCOES[tabela], linha)
+            except sqlite3.Error as e:
+                print(f"[PARTIDA] Erro ao gravar {len(lote)} registros: {e}")
+
+
+# ----------------------------------------------------------------------
+# Consultas
+# ----------------------------------------------------------------------
+
+def placar(arquivo, rodada=None):
+    """ [(personagem, pontos, rodadas)] do maior para o menor; acumulado ou de uma rodada. """
+    conexao = conectar(arquivo)
+    try:
+        sql = ("SELECT personagem, SUM(pontos), COUNT(DISTINCT rodada) FROM pontos "
+               + ("WHERE rodada = ? " if rodada is not None else "")
+               + "GROUP BY personagem ORDER BY SUM(pontos) DESC")
+        return conexao.execute(sql, (rodada,) if rodada is not None else ()).fetchall()
+    finally:
+        conexao.close()
+
+
+def rodadas(arquivo):
+    """ [(id, modo, inicio, fim, n_eventos)] """
+    conexao = conectar(arquivo)
+    try:
+        return conexao.execute(
+            "SELECT r.id, r.modo, r.inicio, r.fim, COUNT(e.rowid) FROM rodadas r "
+            "LEFT JOIN eventos e ON e.rodada = r.id GROUP BY r.id ORDER BY r.id").fetchall()
+    finally:
+        conexao.close()
+
+
+def replay(arquivo, rodada):
+    """
+    Linha do tempo de uma rodada: lista de (t, tipo, dados) com eventos, pontos
+    e amostras de trajetória (tipo "posicoes": {personagem: (x, y, angulo)}) em ordem.
+    """
+    conexao = conectar(arquivo)
+    try:
+        linha_tempo = []
+        for t, frame_id, tipo, personagem, alvo, dados in conexao.execute(
+                "SELECT t, frame_id, tipo, personagem, alvo, dados FROM eventos WHERE rodada = ?", (rodada,)):
+            linha_tempo.append((t, tipo, {"frame_id": frame_id, "personagem": personagem, "alvo": alvo,
+                                          "dados": json.loads(dados) if dados else None}))
+        for t, personagem, pontos, motivo in conexao.execute(
+                "SELECT t, personagem, pontos, motivo FROM pontos WHERE rodada = ?", (rodada,)):
+            linha_tempo.append((t, "pontos", {"personagem": personagem, "pontos": pontos, "motivo": motivo}))
+
+        posicoes = {}
+        for t, personagem, x, y, angulo in conexao.execute(
+                "SELECT t, personagem, x, y, angulo FROM trajetorias WHERE rodada = ? ORDER BY t", (rodada,)):
+            posicoes.setdefault(t, {})[personagem] = (x, y, angulo)
+        linha_tempo.extend((t, "posicoes", p) for t, p in posicoes.items())
+
+        linha_tempo.sort(key=lambda item: item[0])
+        return linha_tempo
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Uso: python persistencia.py <banco.db> placar [rodada] | rodadas | replay <rodada>")
+        sys.exit(1)
+    banco, comando = sys.argv[1], sys.argv[2]
+    if comando == "placar":
+        rodada = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        for i, (personagem, pontos, n) in enumerate(placar(banco, rodada), 1):
+            print(f"{i:2d}. {personagem:15s} {pontos:8.1f} pts ({n} rodadas)")
+    elif comando == "rodadas":
+        for id_, modo, inicio, fim, n in rodadas(banco):
+            duracao = f"{fim - inicio:.0f} s" if fim else "em andamento"
+            print(f"#{id_} {modo} {time.strftime('%d/%m %H:%M:%S', time.localtime(inicio))} ({duracao}, {n} eventos)")
+    elif comando == "replay":
+        rodada = int(sys.argv[3])
+        linha_tempo = replay(banco, rodada)
+        t0 = linha_tempo[0][0] if linha_tempo else 0
+        for t, tipo, dados in linha_tempo:
+            print(f"{t - t0:8.2f}s {tipo:10s} {json.dumps(dados, ensure_ascii=False)}")
+    else:
+        print(f"Comando desconhecido: {comando}")
+        sys.exit(1)
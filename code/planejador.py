@@ -0,0 +1,186 @@
+# planejador.py - Campo de fluxo (flow field) sobre uma grade de ocupação da arena
+#
+# A arena é rasterizada em uma grade grossa (paredes/obstáculos do arquivo de
+# configuração + demais robôs de cada snapshot). A partir da célula do alvo é
+# calculada a distância de todas as células (transformada de distância) e, para
+# cada célula, a direção do vizinho mais próximo do alvo. O resultado fica em
+# cache: só é recalculado quando a célula do alvo ou o conjunto de células
+# ocupadas muda. A consulta da direção em cada passo de controle é O(1).
+import heapq
+import json
+import math
+
+# --- PARÂMETROS DA GRADE ---
+TAMANHO_CELULA = 40   # Pixels (coordenadas globais) por célula
+RAIO_ROBO = 60        # Raio usado para inflar paredes e outros robôs (pixels)
+
+# Vizinhança 8-conectada: (dx, dy, custo)
+VIZINHOS = [
+    (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+    (1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)),
+]
+
+
+def carregar_mapa(arquivo):
+    """
+    Lê o retângulo da arena e os obstáculos fixos.
+
+    Formato (compatível com pac-man_arena_rois.json):
+        {"arena": [x, y, w, h], "obstaculos": [[x, y, w, h], ...]}
+
+    Retorna:
+        tuple: (arena, obstaculos)
+    """
+    with open(arquivo, 'r') as f:
+        config = json.load(f)
+    return tuple(config['arena']), [tuple(r) for r in config.get('obstaculos', [])]
+
+
+class CampoFluxo:
+    """ Grade de ocupação + campo de direções em cache para um robô. """
+
+    def __init__(self, arena, obstaculos=(), celula=TAMANHO_CELULA, raio=RAIO_ROBO):
+        self.x0, self.y0, w, h = arena
+        self.celula = celula
+        self.raio = raio
+        self.colunas = max(1, math.ceil(w / celula))
+        self.linhas = max(1, math.ceil(h / celula))
+
+        # Ocupação estática (paredes), calculada uma única vez
+        self.estatico = bytearray(self.colunas * self.linhas)
+        for x, y, rw, rh in obstaculos:
+            self._marcar_retangulo(self.estatico, x, y, rw, rh)
+
+        self._chave = None     # (célula do alvo, células ocupadas por robôs)
+        self._direcao = None   # Direção (graus) por célula, ou None
+        self.recalculos = 0
+
+    # ------------------------------------------------------------------
+    # Rasterização
+    # ------------------------------------------------------------------
+    def indice(self, x, y):
+        """ Índice da célula que contém o ponto global (x, y), ou None se fora da arena. """
+        c = int((x - self.x0) // self.celula)
+        l = int((y - self.y0) // self.celula)
+        if 0 <= c < self.colunas and 0 <= l < self.linhas:
+            return l * self.colunas + c
+        return None
+
+    def _faixa(self, ini, fim, n):
+        return max(0, int(ini // self.celula)), min(n - 1, int(fim // self.celula))
+
+    def _marcar_retangulo(self, grade, x, y, w, h):
+        c0, c1 = self._faixa(x - self.x0 - self.raio, x - self.x0 + w + self.raio, self.colunas)
+        l0, l1 = self._faixa(y - self.y0 - self.raio, y - self.y0 + h + self.raio, self.linhas)
+        for l in range(l0, l1 + 1):
+            base = l * self.colunas
+            for c in range(c0, c1 + 1):
+                grade[base + c] = 1
+
+    def _celulas_robo(self, x, y):
+        """ Células cobertas por um robô (círculo inflado) centrado em (x, y). """
+        celulas = []
+        c0, c1 = self._faixa(x - self.x0 - self.raio, x - self.x0 + self.raio, self.colunas)
+        l0, l1 = self._faixa(y - self.y0 - self.raio, y - self.y0 + self.raio, self.linhas)
+        limite = (self.raio + self.celula / 2) ** 2
+        for l in range(l0, l1 + 1):
+            cy = self.y0 + (l + 0.5) * self.celula
+            for c in range(c0, c1 + 1):
+                cx = self.x0 + (c + 0.5) * self.celula
+                if (cx - x) ** 2 + (cy - y) ** 2 <= limite:
+                    celulas.append(l * self.colunas + c)
+        return celulas
+
+    # ------------------------------------------------------------------
+    # Campo de fluxo
+    # ------------------------------------------------------------------
+    def atualizar(self, alvo_xy, robos_xy=()):
+        """
+        Atualiza o campo para o alvo e os robôs-obstáculo do snapshot atual.
+
+        Só recalcula se a célula do alvo ou o conjunto de células ocupadas
+        mudou (robôs andando dentro da mesma célula não invalidam o cache).
+
+        Retorna:
+            bool: True se o campo foi recalculado.
+        """
+        alvo = self.indice(*alvo_xy)
+        ocupadas = set()
+        for x, y in robos_xy:
+            ocupadas.update(self._celulas_robo(x, y))
+        ocupadas.discard(alvo)
+        chave = (alvo, frozenset(ocupadas))
+
+        if chave == self._chave:
+            return False
+        self._chave = chave
+        self._direcao = self._calcular(alvo, ocupadas)
+        self.recalculos += 1
+        return True
+
+    def _calcular(self, alvo, ocupadas):
+        n = self.colunas * self.linhas
+        direcao = [None] * n
+        if alvo is None:
+            return direcao
+
+        bloqueado = bytearray(self.estatico)
+        for i in ocupadas:
+            bloqueado[i] = 1
+        bloqueado[alvo] = 0
+
+        # Transformada de distância (Dijkstra a partir do alvo)
+        dist = [math.inf] * n
+        dist[alvo] = 0.0
+        fila = [(0.0, alvo)]
+        cols = self.colunas
+        while fila:
+            d, i = heapq.heappop(fila)
+            if d > dist[i]:
+                continue
+            l, c = divmod(i, cols)
+            for dx, dy, custo in self._vizinhos_livres(c, l, bloqueado):
+                j = (l + dy) * cols + (c + dx)
+                nd = d + custo
+                if nd < dist[j]:
+                    dist[j] = nd
+                    heapq.heappush(fila, (nd, j))
+
+        # Cada célula aponta para o vizinho de menor distância.
+        # Células bloqueadas também recebem direção: é a rota de saída de
+        # um robô que entrou na zona inflada de uma parede.
+        for i in range(n):
+            if i == alvo:
+                continue
+            l, c = divmod(i, cols)
+            melhor, passo = dist[i], None
+            for dx, dy, _ in self._vizinhos_livres(c, l, bloqueado):
+                j = (l + dy) * cols + (c + dx)
+                if dist[j] < melhor:
+                    melhor, passo = dist[j], (dx, dy)
+            if passo is not None:
+                # Mesmo padrão de angulo_para_alvo (atan2 no eixo da imagem)
+                direcao[i] = math.degrees(math.atan2(passo[1], passo[0]))
+        return direcao
+
+    def _vizinhos_livres(self, c, l, bloqueado):
+        cols, linhas = self.colunas, self.linhas
+        for dx, dy, custo in VIZINHOS:
+            nc, nl = c + dx, l + dy
+            if not (0 <= nc < cols and 0 <= nl < linhas):
+                continue
+            if bloqueado[nl * cols + nc]:
+                continue
+            # Diagonal não corta quina de obstáculo
+            if dx and dy and (bloqueado[l * cols + nc] or bloqueado[nl * cols + c]):
+                continue
+            yield dx, dy, custo
+
+    def direcao(self, x, y):
+        """ Direção (graus) a seguir a partir do ponto (x, y), ou None (sem rota / já no alvo). """
+        if self._direcao is None:
+            return None
+        i = self.indice(x, y)
+        if i is None:
+            return None
+        return self._direcao[i]
@@ -0,0 +1,168 @@
+# rastreio.py - Rastreamento de latência ponta a ponta (câmera -> comando do motor)
+#
+# Cada snapshot do servidor leva um "frame_id". Servidor e controlador gravam
+# eventos (frame_id, etapa, instante) em arquivos JSON-lines:
+#
+#   servidor:     captura -> processado -> envio (por cliente WebSocket)
+#   controlador:  recebido -> decidido -> enviado (por robô)
+#
+# A gravação é feita por uma thread própria (o loop só enfileira uma tupla).
+#
+# Coletor (une os arquivos e mostra histogramas por etapa):
+#     python rastreio.py rastreio_servidor.jsonl rastreio_controle.jsonl [...]
+#
+# Os relógios das máquinas não são sincronizados: para cada arquivo de cliente
+# o coletor estima o deslocamento como o menor (recebido - envio) observado,
+# ou seja, assume que o frame mais rápido atravessou a rede em ~0 ms.
+# Com NTP/PTP configurado, use --sem-ajuste.
+import sys
+import json
+import time
+import queue
+import threading
+
+ETAPAS_SERVIDOR = ("captura", "processado", "envio")
+ETAPAS_CLIENTE = ("recebido", "decidido", "enviado")
+
+
+class Rastreador:
+    """ Grava eventos de rastreio em JSON-lines sem bloquear quem chama. """
+
+    def __init__(self, arquivo, origem):
+        self.arquivo = arquivo
+        self.origem = origem
+        self.fila = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._escritor, daemon=True)
+        self.thread.start()
+
+    def evento(self, frame_id, etapa, t=None, robo=None):
+        if frame_id is None:
+            return
+        self.fila.put((frame_id, etapa, time.time() if t is None else t, robo))
+
+    def fechar(self):
+        self.fila.put(None)
+        self.thread.join(timeout=2)
+
+    def _escritor(self):
+        with open(self.arquivo, 'a') as f:
+            while True:
+                item = self.fila.get()
+                if item is None:
+                    break
+                frame_id, etapa, t, robo = item
+                registro = {"origem": self.origem, "frame_id": frame_id, "etapa": etapa, "t": t}
+                if robo is not None:
+                    registro["robo"] = robo
+                f.write(json.dumps(registro) + "\n")
+                if self.fila.empty():
+                    f.flush()
+
+
+# ----------------------------------------------------------------------
+# Coletor
+# ----------------------------------------------------------------------
+
+def carregar(arquivos):
+    """ Retorna (servidor, clientes): servidor[frame][etapa] e clientes[arquivo][frame][(etapa, robo)]. """
+    servidor = {}
+    clientes = {}
+    for arquivo in arquivos:
+        with open(arquivo, 'r') as f:
+            for linha in f:
+                try:
+                    ev = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                fid, etapa, t = ev["frame_id"], ev["etapa"], ev["t"]
+                if etapa in ETAPAS_SERVIDOR:
+                    etapas = servidor.setdefault(fid, {})
+                    # "envio" acontece uma vez por cliente conectado: guarda o primeiro
+                    etapas[etapa] = min(t, etapas.get(etapa, t))
+                else:
+                    chave = (etapa, ev.get("robo"))
+                    etapas = clientes.setdefault(arquivo, {}).setdefault(fid, {})
+                    etapas[chave] = min(t, etapas.get(chave, t))
+    return servidor, clientes
+
+
+def latencias(servidor, clientes, ajustar=True):
+    """ Calcula as amostras (ms) de cada etapa. """
+    estagios = {nome: [] for nome in ("processamento", "espera_publicacao", "rede",
+                                      "espera_controle", "envio_comando", "total")}
+    for t in servidor.values():
+        if "captura" in t and "processado" in t:
+            estagios["processamento"].append(t["processado"] - t["captura"])
+        if "processado" in t and "envio" in t:
+            estagios["espera_publicacao"].append(t["envio"] - t["processado"])
+
+    for arquivo, frames in clientes.items():
+        # Deslocamento de relógio do cliente em relação ao servidor
+        deltas = [ev[("recebido", None)] - servidor[fid]["envio"]
+                  for fid, ev in frames.items()
+                  if ("recebido", None) in ev and "envio" in servidor.get(fid, {})]
+        offset = min(deltas) if (ajustar and deltas) else 0.0
+        if ajustar and deltas:
+            print(f"[COLETOR] {arquivo}: deslocamento de relógio estimado {offset*1000:.1f} ms")
+
+        for fid, ev in frames.items():
+            srv = servidor.get(fid, {})
+            recebido = ev.get(("recebido", None))
+            if recebido is not None and "envio" in srv:
+                estagios["rede"].append(recebido - offset - srv["envio"])
+            robos = {robo for (etapa, robo) in ev if etapa == "decidido"}
+            for robo in robos:
+                decidido = ev[("decidido", robo)]
+                enviado = ev.get(("enviado", robo))
+                if recebido is not None:
+                    estagios["espera_controle"].append(decidido - recebido)
+                if enviado is not None:
+                    estagios["envio_comando"].append(enviado - decidido)
+                    if "captura" in srv:
+                        estagios["total"].append(enviado - offset - srv["captura"])
+
+    return {k: [v * 1000 for v in vs] for k, vs in estagios.items()}
+
+
+def percentil(ordenados, p):
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def histograma(amostras, n_bins=10, largura=40):
+    ordenados = sorted(amostras)
+    lo, hi = ordenados[0], ordenados[-1]
+    passo = (hi - lo) / n_bins or 1.0
+    contagem = [0] * n_bins
+    for v in ordenados:
+        contagem[min(n_bins - 1, int((v - lo) / passo))] += 1
+    maior = max(contagem)
+    linhas = []
+    for i, c in enumerate(contagem):
+        barra = "#" * int(round(largura * c / maior)) if maior else ""
+        linhas.append(f"    {lo + i*passo:8.1f} - {lo + (i+1)*passo:8.1f} ms | {barra} {c}")
+    return linhas
+
+
+def relatorio(estagios):
+    for nome, amostras in estagios.items():
+        if not amostras:
+            print(f"\n## {nome}: sem amostras")
+            continue
+        ordenados = sorted(amostras)
+        print(f"\n## {nome} (n={len(ordenados)}): p50={percentil(ordenados, 50):.1f} "
+              f"p90={percentil(ordenados, 90):.1f} p99={percentil(ordenados, 99):.1f} "
+              f"max={ordenados[-1]:.1f} ms")
+        for linha in histograma(ordenados):
+            print(linha)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print("Uso: python rastreio.py <servidor.jsonl> <cliente.jsonl> [...] [--sem-ajuste]")
+        sys.exit(1)
+    servidor, clientes = carregar(args)
+    relatorio(latencias(servidor, clientes, ajustar="--sem-ajuste" not in sys.argv))
@@ -0,0 +1,169 @@
+# relay.py - Retransmissor (relay) do servidor de visão
+#
+# Assina UMA vez o servidor de visão (ou outro relay) e retransmite cada
+# mensagem para muitos clientes, no mesmo protocolo. Assim o PC da arena
+# atende só os relays e o custo de fan-out fica fora da máquina de detecção.
+#
+#   * A mensagem é repassada com os mesmos bytes (recv sem decodificar,
+#     send como frame de texto): nada é decodificado nem serializado de novo.
+#   * Compressão desligada: cada cliente recebe o mesmo frame, sem deflate por conexão.
+#   * Cada cliente tem uma "caixa" com a última mensagem: cliente lento perde
+#     mensagens intermediárias em vez de acumular buffer (memória limitada).
+#   * Encadeável: um relay pode assinar outro relay.
+#
+# Mensagens dos clientes:
+#   * {"historico": ...} é repassado ao upstream numa conexão própria e a
+#     resposta volta só para quem pediu ({"historico": null} se falhar);
+#   * {"rodada": ...} é repassado ao upstream;
+#   * ASSINATURAS NÃO SÃO SUPORTADAS: todos recebem o fluxo completo (o relay
+#     não decodifica os snapshots). Quem enviar {"assinatura": ...} recebe
+#     {"erro": "..."} uma vez; assine direto no servidor se precisar do filtro.
+#
+# Uso: python relay.py [ws://servidor:8765] [porta_local]
+import sys
+import json
+import time
+import asyncio
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed, WebSocketException
+
+# --- CONFIGURAÇÕES ---
+UPSTREAM_URI = "ws://192.168.1.101:8765"   # Servidor de visão (ou outro relay)
+RELAY_HOST = "0.0.0.0"
+RELAY_PORT = 8766
+BACKOFF_MIN = 0.5
+BACKOFF_MAX = 8.0
+PERIODO_ESTATISTICAS = 10.0                # Segundos entre linhas de status (0 = desliga)
+TIMEOUT_UPSTREAM = 2.0                     # s para um pedido repassado (histórico) ser respondido
+
+
+class Relay:
+    def __init__(self, upstream_uri):
+        self.upstream_uri = upstream_uri
+        self.ultima = None        # Última mensagem (bytes) recebida do upstream
+        self.clientes = {}        # conexão -> asyncio.Event ("há mensagem nova")
+        self.recebidas = 0
+        self.enviadas = 0
+        self.descartadas = 0      # Mensagens substituídas antes de um cliente lento enviá-las
+
+    # --- Upstream ---
+    async def assinar(self):
+        espera = BACKOFF_MIN
+        while True:
+            try:
+                async with connect(self.upstream_uri, compression=None) as ws:
+                    print(f"[RELAY] Conectado ao upstream {self.upstream_uri}.")
+                    espera = BACKOFF_MIN
+                    while True:
+                        self.ultima = await ws.recv(decode=False)
+                        self.recebidas += 1
+                        for evento in self.clientes.values():
+                            if evento.is_set():
+                                self.descartadas += 1
+                            evento.set()
+            except (OSError, WebSocketException) as e:
+                print(f"[RELAY] Upstream indisponível ({e}). Nova tentativa em {espera:.1f}s...")
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, BACKOFF_MAX)
+
+    async def repassar(self, mensagem, esperar_resposta):
+        """ Envia um pedido ao upstream numa conexão própria; retorna a resposta com "historico" (ou None). """
+        async with connect(self.upstream_uri, compression=None, open_timeout=TIMEOUT_UPSTREAM) as ws:
+            await ws.send(mensagem)
+            if not esperar_resposta:
+                return None
+            async with asyncio.timeout(TIMEOUT_UPSTREAM):
+                async for resposta in ws:
+                    # O upstream também manda snapshots nessa conexão: espera a resposta do pedido
+                    if '"historico"' in resposta and "historico" in json.loads(resposta):
+                        return resposta
+        return None
+
+    # --- Downstream ---
+    async def ler_cliente(self, websocket):
+        """ Trata as mensagens do cliente (histórico e rodada são repassados; assinatura é recusada). """
+        avisado = False
+        try:
+            async for mensagem in websocket:
+                avisado = await self.tratar_pedido(websocket, mensagem, avisado)
+        except ConnectionClosed:
+            pass
+        finally:
+            evento = self.clientes.get(websocket)
+            if evento:
+                evento.set() # Acorda o handler, que encerra no próximo send
+
+    async def tratar_pedido(self, websocket, mensagem, avisado):
+        """ Retorna True se o cliente já foi avisado de que assinaturas não são suportadas. """
+        try:
+            pedido = json.loads(mensagem)
+        except ValueError:
+            return avisado
+        if not isinstance(pedido, dict):
+            return avisado
+        if "historico" in pedido:
+            try:
+                resposta = await self.repassar(mensagem, True)
+            except (OSError, WebSocketException, TimeoutError, ValueError) as e:
+                print(f"[RELAY] Histórico não obtido do upstream: {e}")
+                resposta = None
+            await websocket.send(resposta or json.dumps({"historico": None}))
+        elif "rodada" in pedido:
+            try:
+                await self.repassar(mensagem, False)
+            except (OSError, WebSocketException, TimeoutError) as e:
+                print(f"[RELAY] Pedido de rodada não repassado: {e}")
+        elif "assinatura" in pedido and not avisado:
+            print(f"[RELAY] Assinatura de {websocket.remote_address} recusada (fluxo completo).")
+            await websocket.send(json.dumps({"erro": "assinatura não suportada pelo relay; "
+                                                      "o fluxo completo será enviado"}))
+            return True
+        return avisado
+
+    async def handler(self, websocket):
+        evento = asyncio.Event()
+        if self.ultima is not None:
+            evento.set() # Cliente novo recebe o estado atual imediatamente
+        self.clientes[websocket] = evento
+        leitor = asyncio.create_task(self.ler_cliente(websocket))
+        print(f"[RELAY] Cliente conectado: {websocket.remote_address} ({len(self.clientes)} ativos).")
+        try:
+            while True:
+                await evento.wait()
+                evento.clear()
+                await websocket.send(self.ultima, text=True)
+                self.enviadas += 1
+        except ConnectionClosed:
+            pass
+        finally:
+            leitor.cancel()
+            del self.clientes[websocket]
+            print(f"[RELAY] Cliente desconectado ({len(self.clientes)} ativos).")
+
+    async def estatisticas(self):
+        t0 = time.monotonic()
+        while PERIODO_ESTATISTICAS > 0:
+            await asyncio.sleep(PERIODO_ESTATISTICAS)
+            dt = time.monotonic() - t0
+            t0 = time.monotonic()
+            print(f"[RELAY] clientes={len(self.clientes)} recebidas={self.recebidas/dt:.1f}/s "
+                  f"enviadas={self.enviadas/dt:.1f}/s descartadas={self.descartadas}")
+            self.recebidas = self.enviadas = 0
+
+
+async def main():
+    upstream = sys.argv[1] if len(sys.argv) > 1 else UPSTREAM_URI
+    porta = int(sys.argv[2]) if len(sys.argv) > 2 else RELAY_PORT
+    relay = Relay(upstream)
+    async with serve(relay.handler, RELAY_HOST, porta, compression=None):
+        print(f"[RELAY] Retransmitindo {upstream} em ws://{RELAY_HOST}:{porta}")
+        await asyncio.gather(relay.assinar(), relay.estatisticas())
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nRelay encerrado pelo usuário (Ctrl+C).")
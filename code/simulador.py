@@ -0,0 +1,266 @@
+# simulador.py - Arena simulada: substitui o servidor de visão e os ESP32
+#
+# Modela robôs de tração diferencial que obedecem a comandos
+# {"motor1_vel", "motor2_vel"} com latência e ruído configuráveis.
+#   * Visão: ws://HOST:8765, mesmo formato do mecathron_server.py
+#     ({"objetos": [...], "zonas": {...}}).
+#   * Robôs: um servidor WebSocket por robô (como o firmware, porta própria),
+#     com telemetria {"motor1": {"vel"}, "motor2": {"vel"}} a 10 Hz.
+# ESCALA_TEMPO > 1 roda mais rápido que o tempo real.
+#
+# Para usar com o controller.py, aponte WEBSOCKET_URI_GAME para o simulador e
+# as URIs dos robôs para ws://127.0.0.1:<porta> (ver ROBOS_SIM).
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+from collections import deque
+from websockets.server import serve
+
+import rastreio
+
+# --- CONFIGURAÇÃO DO SIMULADOR ---
+ARQUIVO_SIM = None          # Opcional: JSON com {"arena": [...], "robos": [...], "zonas": {...}}
+WEBSOCKET_HOST = "127.0.0.1"
+WEBSOCKET_PORT = 8765       # Porta da "visão" (igual ao mecathron_server.py)
+
+ESCALA_TEMPO = 1.0          # 1.0 = tempo real; 5.0 = 5x mais rápido
+DT_FISICA = 0.01            # Passo de integração (s simulados)
+FPS_CAMERA = 30             # Frequência dos snapshots "capturados"
+PERIODO_ENVIO = 0.1         # Intervalo de envio da visão por cliente (como o servidor real)
+PERIODO_TELEMETRIA = 0.1    # Telemetria do firmware (10 Hz)
+
+LATENCIA_VISAO = 0.08       # Idade do snapshot publicado (s)
+LATENCIA_COMANDO = 0.03     # Atraso até o comando chegar aos motores (s)
+RUIDO_POSICAO = 1.5         # Desvio padrão (px) da posição publicada
+RUIDO_ANGULO = 2.0          # Desvio padrão (graus) do ângulo publicado
+
+# --- MODELO DO ROBÔ ---
+PX_POR_PWM = 1.2            # Velocidade da roda (px/s) por unidade de PWM
+ZONA_MORTA_PWM = 40         # Abaixo disso o motor não vence o atrito
+DISTANCIA_RODAS = 60        # Distância entre rodas (px)
+PWM_MAX = 255
+
+RASTREIO_ARQUIVO = None     # Ex: "rastreio_servidor.jsonl" (mesmos eventos do servidor real)
+
+ARENA = (301, 12, 1087, 1028)  # [x, y, w, h] global, como em pac-man_arena_rois.json
+ROBOS_SIM = [
+    {"personagem": "pac-man",    "porta": 8100, "x": 500,  "y": 500, "angulo": 0,   "roteiro": "circulo"},
+    {"personagem": "fantasma_1", "porta": 8101, "x": 1200, "y": 200, "angulo": 180},
+    {"personagem": "fantasma_2", "porta": 8102, "x": 1200, "y": 900, "angulo": 180},
+    {"personagem": "fantasma_3", "porta": 8103, "x": 400,  "y": 150, "angulo": 0},
+    {"personagem": "fantasma_4", "porta": 8104, "x": 400,  "y": 900, "angulo": 0},
+]
+ZONAS = {}
+
+
+class RoboSimulado:
+    """ Estado físico de um robô de tração diferencial. """
+
+    def __init__(self, personagem, x, y, angulo, porta=None, roteiro=None):
+        self.personagem = personagem
+        self.porta = porta
+        self.roteiro = roteiro
+        self.x = float(x)
+        self.y = float(y)
+        self.theta = math.radians(angulo) # Eixo da imagem (Y para baixo)
+        self.m1 = 0                       # PWM aplicado (esquerdo)
+        self.m2 = 0                       # PWM aplicado (direito)
+        self.pendentes = deque()          # (t_aplicacao, m1, m2)
+        self.cliente = None               # Único cliente autorizado (como o firmware)
+
+    def comandar(self, t, m1, m2):
+        self.pendentes.append((t + LATENCIA_COMANDO, m1, m2))
+
+    def passo(self, t, dt):
+        while self.pendentes and self.pendentes[0][0] <= t:
+            _, self.m1, self.m2 = self.pendentes.popleft()
+
+        if self.roteiro == "circulo" and self.cliente is None:
+            self.m1, self.m2 = 140, 100 # Sem controlador: anda em círculos
+
+        v_esq = velocidade_roda(self.m1)
+        v_dir = velocidade_roda(self.m2)
+        v = (v_esq + v_dir) / 2
+        # Esquerda mais rápida -> gira no sentido horário da imagem (ângulo cresce)
+        w = (v_esq - v_dir) / DISTANCIA_RODAS
+
+        self.theta = (self.theta + w * dt) % (2 * math.pi)
+        self.x += v * math.cos(self.theta) * dt
+        self.y += v * math.sin(self.theta) * dt
+
+        # Paredes da arena
+        ax, ay, aw, ah = ARENA
+        self.x = min(max(self.x, ax), ax + aw)
+        self.y = min(max(self.y, ay), ay + ah)
+
+    def observar(self):
+        """ Objeto no formato publicado pelo servidor de visão (com ruído). """
+        return {
+            "personagem": self.personagem,
+            "x_global": int(round(self.x + random.gauss(0, RUIDO_POSICAO))),
+            "y_global": int(round(self.y + random.gauss(0, RUIDO_POSICAO))),
+            "angulo_graus": round((math.degrees(self.theta) + random.gauss(0, RUIDO_ANGULO)) % 360, 2),
+        }
+
+    def telemetria(self):
+        return {
+            "motor1": {"vel": self.m1},
+            "motor2": {"vel": self.m2},
+            "presenca": {"esq": 0, "dir": 0, "tras": 0},
+            "distancia_cm": 0,
+        }
+
+
+def velocidade_roda(pwm):
+    pwm = max(-PWM_MAX, min(PWM_MAX, pwm))
+    if abs(pwm) < ZONA_MORTA_PWM:
+        return 0.0
+    return pwm * PX_POR_PWM
+
+
+def checar_zonas(objetos):
+    """ Mesmo critério do servidor: zona ativa se o Pac-Man estiver dentro do retângulo. """
+    status = {nome: False for nome in ZONAS}
+    pac = next((o for o in objetos if 'pac-man' in o['personagem']), None)
+    if pac is None:
+        return status
+    for nome, (zx, zy, zw, zh) in ZONAS.items():
+        if zx <= pac['x_global'] <= zx + zw and zy <= pac['y_global'] <= zy + zh:
+            status[nome] = True
+    return status
+
+
+class Simulacao:
+    def __init__(self, robos):
+        self.robos = robos
+        self.t = 0.0
+        self.snapshots = deque() # (t_sim, frame_id, json) dos últimos frames "capturados"
+        self.publicado = None    # JSON atual da visão (já com a latência aplicada)
+        self.frame_id = 0
+        self.frame_publicado = None
+        self.rastreador = rastreio.Rastreador(RASTREIO_ARQUIVO, "servidor") if RASTREIO_ARQUIVO else None
+
+    def capturar(self):
+        self.frame_id += 1
+        t_captura = time.time()
+        objetos = [r.observar() for r in self.robos]
+        dados = {"frame_id": self.frame_id, "t_captura": round(t_captura, 4),
+                 "objetos": objetos, "zonas": checar_zonas(objetos)}
+        self.snapshots.append((self.t, self.frame_id, json.dumps(dados)))
+        if self.rastreador:
+            self.rastreador.evento(self.frame_id, "captura", t_captura)
+
+    def publicar(self):
+        # Publica o frame mais novo que já "venceu" a latência da visão
+        while self.snapshots and self.snapshots[0][0] <= self.t - LATENCIA_VISAO:
+            _, self.frame_publicado, self.publicado = self.snapshots.popleft()
+            if self.rastreador:
+                self.rastreador.evento(self.frame_publicado, "processado")
+
+    async def fisica(self):
+        periodo_camera = 1.0 / FPS_CAMERA
+        proxima_captura = 0.0
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        while True:
+            for robo in self.robos:
+                robo.passo(self.t, DT_FISICA)
+            self.t += DT_FISICA
+            if self.t >= proxima_captura:
+                self.capturar()
+                proxima_captura += periodo_camera
+            self.publicar()
+
+            # Mantém o tempo simulado na escala pedida em relação ao relógio real
+            atraso = inicio + self.t / ESCALA_TEMPO - loop.time()
+            if atraso > 0:
+                await asyncio.sleep(atraso)
+            else:
+                await asyncio.sleep(0)
+
+    async def handler_visao(self, websocket, path=None):
+        print("[SIM][VISÃO] Nova conexão.")
+        try:
+            while True:
+                if self.publicado:
+                    await websocket.send(self.publicado)
+                    if self.rastreador:
+                        self.rastreador.evento(self.frame_publicado, "envio")
+                await asyncio.sleep(PERIODO_ENVIO / ESCALA_TEMPO)
+        except Exception as e:
+            print(f"[SIM][VISÃO] Conexão fechada: {e}")
+
+    def handler_robo(self, robo):
+        async def handler(websocket, path=None):
+            if robo.cliente is not None:
+                await websocket.send(json.dumps({"status": "erro", "mensagem": "Proibido. IP nao autorizado. Conexao de controle ja estabelecida."}))
+                return
+            robo.cliente = websocket
+            print(f"[SIM][{robo.personagem}] Cliente de controle conectado.")
+            telemetria = asyncio.ensure_future(self.enviar_telemetria(robo, websocket))
+            try:
+                async for msg in websocket:
+                    try:
+                        cmd = json.loads(msg)
+                    except json.JSONDecodeError:
+                        await websocket.send('{"status":"erro", "mensagem":"JSON de comando invalido."}')
+                        continue
+                    if "motor1_vel" in cmd and "motor2_vel" in cmd:
+                        robo.comandar(self.t, int(cmd["motor1_vel"]), int(cmd["motor2_vel"]))
+                        await websocket.send(json.dumps({"status": "ok", "mensagem": "Comandos de motor recebidos e aplicados via WS."}))
+                    else:
+                        await websocket.send('{"status":"erro", "mensagem":"JSON incompleto. Esperado: motor1_vel, motor2_vel"}')
+            except Exception as e:
+                print(f"[SIM][{robo.personagem}] Conexão fechada: {e}")
+            finally:
+                telemetria.cancel()
+                robo.cliente = None
+                robo.comandar(self.t, 0, 0) # Como o firmware perderia o link: para
+        return handler
+
+    async def enviar_telemetria(self, robo, websocket):
+        while True:
+            await asyncio.sleep(PERIODO_TELEMETRIA / ESCALA_TEMPO)
+            await websocket.send(json.dumps(robo.telemetria()))
+
+
+def carregar_config(arquivo):
+    global ARENA, ROBOS_SIM, ZONAS
+    with open(arquivo, 'r') as f:
+        config = json.load(f)
+    ARENA = tuple(config.get('arena', ARENA))
+    ROBOS_SIM = config.get('robos', ROBOS_SIM)
+    ZONAS = config.get('zonas', ZONAS)
+
+
+async def main():
+    arquivo = sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_SIM
+    if arquivo:
+        carregar_config(arquivo)
+
+    robos = [RoboSimulado(r['personagem'], r['x'], r['y'], r.get('angulo', 0),
+                          r.get('porta'), r.get('roteiro')) for r in ROBOS_SIM]
+    sim = Simulacao(robos)
+
+    servidores = [await serve(sim.handler_visao, WEBSOCKET_HOST, WEBSOCKET_PORT)]
+    print(f"[SIM] Visão em ws://{WEBSOCKET_HOST}:{WEBSOCKET_PORT} (escala de tempo {ESCALA_TEMPO}x)")
+    for robo in robos:
+        if robo.porta:
+            servidores.append(await serve(sim.handler_robo(robo), WEBSOCKET_HOST, robo.porta))
+            print(f"[SIM] {robo.personagem} em ws://{WEBSOCKET_HOST}:{robo.porta}")
+
+    try:
+        await sim.fisica()
+    finally:
+        for s in servidores:
+            s.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nSimulador encerrado pelo usuário (Ctrl+C).")